@@ -1,17 +1,27 @@
+from datetime import datetime
+
 import jwt
 from app.core.config import settings
-from app.core.security import oauth2_scheme
+from app.core.security import oauth2_scheme, token_cache
+from app.core.startup import warm_up
 from app.crud.user import get_user_by_username
 from app.db.session import get_db
 from app.models.user import User
 from fastapi import Depends, HTTPException, Request, status
 from jwt.exceptions import InvalidTokenError
+from sqlalchemy import DateTime
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import make_transient_to_detached
 
 
 async def get_current_user(
     db: AsyncSession = Depends(get_db), token: str = Depends(oauth2_scheme)
 ) -> User:
+    # Tokens verified recently skip decoding and the user lookup
+    cached_user = await token_cache.get(token)
+    if cached_user is not None:
+        return await db.merge(_user_from_snapshot(cached_user), load=False)
+
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -36,8 +46,48 @@ async def get_current_user(
             detail="Inactive user",
             headers={"WWW-Authenticate": "Bearer"},
         )
+    await token_cache.put(token, payload.get("exp"), _user_snapshot(user))
     return user
 
 
-def get_llm_rails(request: Request):
+# Never shared through the cache; no dependency reads it from the current user
+_SNAPSHOT_EXCLUDED = {"hashed_password"}
+
+
+def _user_snapshot(user: User) -> dict:
+    """JSON serializable copy of the user's columns."""
+    snapshot = {}
+    for column in User.__table__.columns:
+        if column.key in _SNAPSHOT_EXCLUDED:
+            continue
+        value = getattr(user, column.key)
+        snapshot[column.key] = (
+            value.isoformat() if isinstance(value, datetime) else value
+        )
+    return snapshot
+
+
+def _user_from_snapshot(snapshot: dict) -> User:
+    """Detached user that can be merged into a session without a query."""
+    values = {}
+    for column in User.__table__.columns:
+        if column.key in snapshot:
+            value = snapshot[column.key]
+            if value is not None and isinstance(column.type, DateTime):
+                value = datetime.fromisoformat(value)
+            values[column.key] = value
+    user = User(**values)
+    make_transient_to_detached(user)
+    return user
+
+
+async def get_llm_rails(request: Request):
+    # Guardrails are loaded in the background; early requests wait for them
+    try:
+        await warm_up.wait("rails")
+    except Exception:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Guardrails are unavailable",
+        )
     return request.app.state.llm_rails
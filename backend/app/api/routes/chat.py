@@ -1,13 +1,22 @@
 from app.api.deps import get_current_user, get_llm_rails
+from app.core.config import settings
 from app.crud.chat import create_chat, delete_chat, get_chat_by_id, get_chats_by_user_id
 from app.crud.knowledge import get_knowledge_base_by_ids_and_user_id
 from app.db.session import get_db
 from app.models.user import User
 from app.schemas.chat import ChatCreate, ChatResponse
+from app.schemas.retrieval import RetrievalFilter
+from app.services.admission import AdmissionRejected, chat_admission
 from app.services.chat_service import generate_response
-from fastapi import APIRouter, Depends, HTTPException
-from fastapi.responses import StreamingResponse
-from nemoguardrails.integrations.langchain.runnable_rails import RunnableRails
+from app.services.streaming import (
+    STREAM_PROTOCOLS,
+    ClosingStreamingResponse,
+    accepts_gzip,
+    encode_stream,
+)
+from fastapi import APIRouter, Depends, HTTPException, Request
+from langchain_core.runnables import Runnable
+from pydantic import ValidationError
 from sqlalchemy.ext.asyncio import AsyncSession
 
 router = APIRouter(prefix="/chat", tags=["chat"])
@@ -73,9 +82,10 @@ async def get_chat(
 async def create_message(
     chat_id: int,
     messages: dict,
+    request: Request,
     db: AsyncSession = Depends(get_db),
     user: User = Depends(get_current_user),
-    rails_service: RunnableRails = Depends(get_llm_rails),
+    rails_service: Runnable = Depends(get_llm_rails),
 ):
     chat = await get_chat_by_id(db, chat_id, user.id)
     if not chat:
@@ -86,19 +96,64 @@ async def create_message(
     if last_user_message["role"] != "user":
         raise HTTPException(status_code=400, detail="Last message must be from user")
 
+    # Optional metadata filters restricting retrieval to a subset of the chunks
+    try:
+        retrieval_filter = RetrievalFilter.model_validate(messages.get("filters") or {})
+    except ValidationError as e:
+        raise HTTPException(status_code=422, detail=e.errors())
+
+    stream_protocol = messages.get("stream_protocol", "data")
+    if stream_protocol not in STREAM_PROTOCOLS:
+        raise HTTPException(
+            status_code=422,
+            detail=f"stream_protocol must be one of {', '.join(STREAM_PROTOCOLS)}",
+        )
+    compress = settings.STREAM_COMPRESSION_ENABLED and accepts_gzip(
+        request.headers.get("accept-encoding", "")
+    )
+
     # Get knowledge base ids of the chat
     knowledge_base_ids = [kb.id for kb in chat.knowledge_bases]
 
-    async def response_stream():
-        async for chunk in generate_response(
-            user_id=user.id,
-            query=last_user_message["content"],
-            messages=messages,
-            knowledge_base_ids=knowledge_base_ids,
-            chat_id=chat_id,
-            db=db,
-            rails_service=rails_service,
-        ):
-            yield chunk
-
-    return StreamingResponse(response_stream(), media_type="text/event-stream")
+    # Shed load before streaming starts so clients get a proper status code
+    try:
+        admission = await chat_admission.acquire(user.id)
+    except AdmissionRejected as e:
+        raise HTTPException(
+            status_code=e.status_code,
+            detail=f"Too many chat requests ({e.reason}), retry later",
+            headers={"Retry-After": str(e.retry_after)},
+        )
+
+    async def response_parts():
+        # Released as soon as generation ends; the response releases the slot
+        # too in case the body is never iterated (release is idempotent)
+        try:
+            async for part in generate_response(
+                user_id=user.id,
+                query=last_user_message["content"],
+                messages=messages,
+                knowledge_base_ids=knowledge_base_ids,
+                chat_id=chat_id,
+                db=db,
+                rails_service=rails_service,
+                retrieval_filter=retrieval_filter,
+                # Opt-in per-stage latency breakdown streamed at the end
+                include_timings=bool(messages.get("debug")),
+                admission=admission,
+            ):
+                yield part
+        finally:
+            admission.release()
+
+    headers = {"Cache-Control": "no-cache"}
+    if compress:
+        headers.update({"Content-Encoding": "gzip", "Vary": "Accept-Encoding"})
+    if stream_protocol == "data":
+        headers["X-Vercel-AI-Data-Stream"] = "v1"
+    return ClosingStreamingResponse(
+        encode_stream(response_parts(), stream_protocol, compress),
+        media_type="text/event-stream",
+        headers=headers,
+        on_close=admission.release,
+    )
@@ -1,15 +1,19 @@
 import asyncio
-from typing import List
+from typing import List, Optional
 
 from app.api.deps import get_current_user
+from app.core.config import settings
+from app.core.metrics import INGESTION_QUEUE_DEPTH
 from app.crud.document import delete_document, get_upload_by_ids, upload_documents
 from app.crud.knowledge import (
     create_document,
     create_knowledge_base,
+    find_or_create_documents,
     get_document_by_id,
     get_documents_by_knowledge_base_id,
     get_knowledge_base_by_id,
     get_knowledge_base_by_user_id,
+    knowledge_base_exists,
     preview_documents,
 )
 from app.crud.task import get_processing_tasks_by_ids
@@ -17,15 +21,22 @@ from app.db.session import get_db
 from app.models.task import ProcessingTask
 from app.models.user import User
 from app.schemas.knowledge import (
+    BulkDocumentRequest,
+    BulkDocumentResponse,
     DocumentBase,
     KnowledgeBaseCreate,
     KnowledgeBaseResponse,
     PreviewRequest,
 )
-from app.schemas.retrieval import TestRetrievalRequest
+from app.schemas.retrieval import BatchRetrievalQuery, TestRetrievalRequest
 from app.schemas.task import TaskStatus, TaskStatusResponse
-from app.services.document_processor import process_document_background
-from app.services.retrieval import retrieve_documents
+from app.services.chunk_batches import CHUNK_BATCH_TYPES, read_chunk_batch
+from app.services.document_processor import (
+    process_document_background,
+    store_chunk_batch,
+)
+from app.services.embeddings.embedding_factory import EmbeddingFactory
+from app.services.retrieval import evaluate_retrieval, retrieve_documents
 from fastapi import (
     APIRouter,
     BackgroundTasks,
@@ -33,8 +44,11 @@ from fastapi import (
     File,
     HTTPException,
     Query,
+    Request,
     UploadFile,
 )
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
 from sqlalchemy.ext.asyncio import AsyncSession
 
 router = APIRouter(prefix="/knowledge-base", tags=["knowledge-base"])
@@ -55,10 +69,11 @@ async def get_knowledge_bases(
     current_user: User = Depends(get_current_user),
     skip: int = 0,
     limit: int = 100,
+    name: Optional[str] = None,
     db: AsyncSession = Depends(get_db),
 ) -> List[KnowledgeBaseResponse]:
     knowledge_bases = await get_knowledge_base_by_user_id(
-        db, current_user.id, skip=skip, limit=limit
+        db, current_user.id, skip=skip, limit=limit, name=name
     )
     return [KnowledgeBaseResponse.model_validate(kb) for kb in knowledge_bases]
 
@@ -124,6 +139,79 @@ async def create_document_route(
     return {"status": "success"}
 
 
+@router.post("/{knowledge_base_id}/documents/bulk", response_model=BulkDocumentResponse)
+async def bulk_create_documents_route(
+    knowledge_base_id: int,
+    request: BulkDocumentRequest,
+    create: bool = True,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+) -> BulkDocumentResponse:
+    if not await knowledge_base_exists(db, knowledge_base_id, current_user.id):
+        raise HTTPException(status_code=404, detail="Knowledge base not found")
+    documents = await find_or_create_documents(
+        db, request.documents, knowledge_base_id, create=create
+    )
+    return BulkDocumentResponse(documents=documents)
+
+
+@router.post("/{knowledge_base_id}/documents/{document_id}/chunks")
+async def add_document_chunks_route(
+    knowledge_base_id: int,
+    document_id: int,
+    request: Request,
+    embedding_model: str = Query(
+        ..., description="Model the embeddings were computed with"
+    ),
+    replace: bool = Query(
+        False, description="Drop the chunks stored for the document so far first"
+    ),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """Store a batch of chunks embedded elsewhere, sent as Arrow IPC or .npz."""
+    content_type = request.headers.get("content-type", "").split(";")[0].strip()
+    if content_type not in CHUNK_BATCH_TYPES:
+        raise HTTPException(
+            status_code=415,
+            detail=f"Expected one of: {', '.join(CHUNK_BATCH_TYPES)}",
+        )
+    body = bytearray()
+    async for part in request.stream():
+        body.extend(part)
+        if len(body) > settings.CHUNK_BATCH_MAX_BYTES:
+            raise HTTPException(status_code=413, detail="Chunk batch too large")
+
+    document = await get_document_by_id(
+        db, document_id, knowledge_base_id, current_user.id
+    )
+    if not document:
+        raise HTTPException(status_code=404, detail="Document not found")
+
+    embeddings = EmbeddingFactory.create()
+    if embedding_model != embeddings.model:
+        raise HTTPException(
+            status_code=422,
+            detail=f"Embeddings must come from {embeddings.model}",
+        )
+    try:
+        batch = await asyncio.to_thread(read_chunk_batch, bytes(body), content_type)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    dimension = await asyncio.to_thread(EmbeddingFactory.dimension)
+    if len(batch.texts) and batch.dimension != dimension:
+        raise HTTPException(
+            status_code=422,
+            detail=f"Expected {dimension} dimensional embeddings",
+        )
+
+    try:
+        stored = await asyncio.to_thread(store_chunk_batch, batch, document, replace)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"document_id": document.id, "chunks": stored}
+
+
 @router.get("/{knowledge_base_id}/documents")
 async def list_documents_route(
     knowledge_base_id: int,
@@ -216,8 +304,8 @@ async def process_documents_route(
         add_processing_tasks_to_queue,
         task_data,
         knowledge_base_id,
-        1000,
-        200,
+        settings.CHUNK_SIZE,
+        settings.CHUNK_OVERLAP,
     )
 
     return {"tasks": task_info}
@@ -248,7 +336,8 @@ async def add_processing_tasks_to_queue(
     chunk_overlap: int,
 ):
     for data in task_data:
-        asyncio.create_task(
+        INGESTION_QUEUE_DEPTH.inc()
+        task = asyncio.create_task(
             process_document_background(
                 data["temp_path"],
                 data["file_name"],
@@ -258,6 +347,7 @@ async def add_processing_tasks_to_queue(
                 chunk_overlap,
             )
         )
+        task.add_done_callback(lambda _: INGESTION_QUEUE_DEPTH.dec())
 
 
 @router.get("/{knowledge_base_id}/documents/tasks")
@@ -305,6 +395,9 @@ async def test_retrieval(
         test_retrieval_request.query,
         knowledge_base.id,
         test_retrieval_request.top_k,
+        dense_weight=knowledge_base.dense_weight,
+        sparse_weight=knowledge_base.sparse_weight,
+        retrieval_filter=test_retrieval_request.filters,
     )
     response = []
     for doc, score in results:
@@ -316,3 +409,43 @@ async def test_retrieval(
             }
         )
     return {"results": response}
+
+
+@router.post("/test-retrieval/batch")
+async def test_retrieval_batch(
+    kb_id: int = Query(...),
+    top_k: int = Query(10, ge=1),
+    batch_size: int = Query(64, ge=1),
+    concurrency: int = Query(8, ge=1, le=64),
+    file: UploadFile = File(..., description="JSONL file, one query per line"),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    knowledge_base = await get_knowledge_base_by_id(db, kb_id, current_user.id)
+    if not knowledge_base:
+        raise HTTPException(status_code=404, detail="Knowledge base not found")
+
+    queries = []
+    content = (await file.read()).decode()
+    for line_number, line in enumerate(content.splitlines(), 1):
+        if not line.strip():
+            continue
+        try:
+            queries.append(BatchRetrievalQuery.model_validate_json(line))
+        except ValidationError as e:
+            raise HTTPException(
+                status_code=422, detail=f"Invalid query on line {line_number}: {e}"
+            )
+
+    return StreamingResponse(
+        evaluate_retrieval(
+            queries,
+            knowledge_base.id,
+            top_k=top_k,
+            batch_size=batch_size,
+            concurrency=concurrency,
+            dense_weight=knowledge_base.dense_weight,
+            sparse_weight=knowledge_base.sparse_weight,
+        ),
+        media_type="application/x-ndjson",
+    )
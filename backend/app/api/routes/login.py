@@ -2,7 +2,7 @@ from datetime import timedelta
 from typing import Any
 
 from app.core.config import settings
-from app.core.security import create_access_token, verify_password
+from app.core.security import averify_password, create_access_token
 from app.crud.user import get_user_by_email, get_user_by_username
 from app.db.session import get_db
 from app.models.user import User
@@ -24,7 +24,9 @@ async def login_access_token(
     OAuth2 compatible token login, get an access token for future requests.
     """
     user = await get_user_by_username(db, form_data.username)
-    if not user or not verify_password(form_data.password, str(user.hashed_password)):
+    if not user or not await averify_password(
+        form_data.password, str(user.hashed_password)
+    ):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
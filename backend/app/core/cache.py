@@ -0,0 +1,301 @@
+import json
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Optional, Sequence, Tuple
+
+import redis
+import redis.asyncio as aredis
+from app.core.config import settings
+from app.core.logger import logger
+from app.core.metrics import record_cache
+
+INVALIDATION_CHANNEL = f"{settings.CACHE_KEY_PREFIX}:cache-invalidation"
+_MISSING = object()
+
+
+class LocalLRU:
+    """Thread-safe in-process LRU with per-entry expiry."""
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return default
+            expires_at, value = entry
+            if time.monotonic() >= expires_at:
+                del self._entries[key]
+                return default
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: float):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def pop(self, key: Hashable):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class InvalidationBus:
+    """Broadcast cache invalidations to every worker process and replica.
+
+    Messages go over a Redis pub/sub channel and are dispatched by a listener
+    thread to the callbacks subscribed to their namespace. A process ignores
+    its own messages, since it already invalidated locally before publishing.
+    """
+
+    def __init__(self):
+        self.origin = uuid.uuid4().hex
+        self._callbacks: Dict[str, List[Callable[[Optional[str]], None]]] = {}
+        self._thread = None
+
+    def subscribe(self, namespace: str, callback: Callable[[Optional[str]], None]):
+        """Call `callback(key)` on remote invalidations; key None means all."""
+        self._callbacks.setdefault(namespace, []).append(callback)
+
+    def publish(self, namespace: str, key: Optional[str] = None):
+        message = json.dumps({"origin": self.origin, "ns": namespace, "key": key})
+        try:
+            get_redis().publish(INVALIDATION_CHANNEL, message)
+        except redis.RedisError as e:
+            logger.warning(f"Failed to broadcast invalidation of {namespace}: {e}")
+
+    def start(self):
+        if self._thread is not None:
+            return
+        try:
+            pubsub = get_redis(timeout=None).pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(**{INVALIDATION_CHANNEL: self._dispatch})
+            self._thread = pubsub.run_in_thread(
+                sleep_time=1.0, daemon=True, exception_handler=self._on_error
+            )
+        except redis.RedisError as e:
+            logger.warning(f"Cache invalidation bus unavailable: {e}")
+
+    def stop(self):
+        if self._thread is not None:
+            self._thread.stop()
+            self._thread = None
+
+    def _dispatch(self, message: dict):
+        try:
+            payload = json.loads(message["data"])
+        except (TypeError, ValueError):
+            return
+        if payload.get("origin") == self.origin:
+            return
+        for callback in self._callbacks.get(payload.get("ns"), []):
+            try:
+                callback(payload.get("key"))
+            except Exception as e:
+                logger.error(f"Cache invalidation callback failed: {e}")
+
+    @staticmethod
+    def _on_error(error: Exception, pubsub, thread):
+        # The next read reconnects and resubscribes; don't spin meanwhile
+        logger.warning(f"Cache invalidation listener error: {error}")
+        time.sleep(settings.CACHE_REDIS_RETRY_SECONDS)
+
+
+class TwoTierCache:
+    """Per-process LRU in front of a Redis tier shared by all workers.
+
+    Lookups try the local LRU, then Redis (filling the LRU on a hit); writes
+    go to both. Values must be JSON serializable unless `shared` is False, in
+    which case only the local tier is used. Invalidations are broadcast so
+    every process drops its copy. When Redis fails the cache keeps working
+    locally and retries Redis after CACHE_REDIS_RETRY_SECONDS.
+    """
+
+    def __init__(
+        self,
+        namespace: str,
+        ttl: float,
+        max_size: int,
+        shared: bool = True,
+        bus: Optional[InvalidationBus] = None,
+    ):
+        self.namespace = namespace
+        self.ttl = ttl
+        self.shared = shared and settings.SHARED_CACHE_ENABLED
+        self.local = LocalLRU(max_size)
+        self._redis_down_until = 0.0
+        self._bus = bus or cache_bus
+        self._bus.subscribe(namespace, self._on_remote_invalidation)
+
+    def _redis_key(self, key: str) -> str:
+        return f"{settings.CACHE_KEY_PREFIX}:{self.namespace}:{key}"
+
+    def _redis_available(self) -> bool:
+        return self.shared and time.monotonic() >= self._redis_down_until
+
+    def _redis_failed(self, error: Exception):
+        logger.warning(f"Shared cache {self.namespace} unavailable: {error}")
+        self._redis_down_until = time.monotonic() + settings.CACHE_REDIS_RETRY_SECONDS
+
+    def _on_remote_invalidation(self, key: Optional[str]):
+        if key is None:
+            self.local.clear()
+        else:
+            self.local.pop(key)
+
+    def get(self, key: str) -> Any:
+        return self.get_many([key])[0]
+
+    def get_many(self, keys: Sequence[str]) -> List[Any]:
+        values = [self.local.get(key, _MISSING) for key in keys]
+        missing = [i for i, value in enumerate(values) if value is _MISSING]
+        if missing and self._redis_available():
+            try:
+                found = get_redis().mget([self._redis_key(keys[i]) for i in missing])
+            except redis.RedisError as e:
+                self._redis_failed(e)
+                found = [None] * len(missing)
+            for i, raw in zip(missing, found):
+                if raw is not None:
+                    values[i] = json.loads(raw)
+                    self.local.set(keys[i], values[i], self.ttl)
+        hits = sum(value is not _MISSING for value in values)
+        record_cache(self.namespace, hit=True, count=hits)
+        record_cache(self.namespace, hit=False, count=len(values) - hits)
+        return [None if value is _MISSING else value for value in values]
+
+    def get_shared(self, key: str) -> Any:
+        """Read `key` from Redis only, replacing the local copy when found."""
+        if not self._redis_available():
+            return None
+        try:
+            raw = get_redis().get(self._redis_key(key))
+        except redis.RedisError as e:
+            self._redis_failed(e)
+            return None
+        if raw is None:
+            return None
+        value = json.loads(raw)
+        self.local.set(key, value, self.ttl)
+        return value
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        self.set_many({key: value}, ttl)
+
+    def set_many(self, items: Dict[str, Any], ttl: Optional[float] = None):
+        ttl = self.ttl if ttl is None else ttl
+        if ttl <= 0:
+            return
+        for key, value in items.items():
+            self.local.set(key, value, ttl)
+        if items and self._redis_available():
+            try:
+                with get_redis().pipeline(transaction=False) as pipe:
+                    for key, value in items.items():
+                        pipe.set(
+                            self._redis_key(key), json.dumps(value), px=int(ttl * 1000)
+                        )
+                    pipe.execute()
+            except redis.RedisError as e:
+                self._redis_failed(e)
+
+    async def aget(self, key: str) -> Any:
+        value = self.local.get(key, _MISSING)
+        if value is _MISSING and self._redis_available():
+            try:
+                raw = await get_async_redis().get(self._redis_key(key))
+            except redis.RedisError as e:
+                self._redis_failed(e)
+                raw = None
+            if raw is not None:
+                value = json.loads(raw)
+                self.local.set(key, value, self.ttl)
+        record_cache(self.namespace, hit=value is not _MISSING)
+        return None if value is _MISSING else value
+
+    async def aset(self, key: str, value: Any, ttl: Optional[float] = None):
+        ttl = self.ttl if ttl is None else ttl
+        if ttl <= 0:
+            return
+        self.local.set(key, value, ttl)
+        if self._redis_available():
+            try:
+                await get_async_redis().set(
+                    self._redis_key(key), json.dumps(value), px=int(ttl * 1000)
+                )
+            except redis.RedisError as e:
+                self._redis_failed(e)
+
+    def invalidate(self, key: Optional[str] = None):
+        """Drop `key` (or everything when None) here, in Redis and in all workers."""
+        if key is None:
+            self.local.clear()
+        else:
+            self.local.pop(key)
+        if self._redis_available():
+            try:
+                client = get_redis()
+                if key is None:
+                    pattern = self._redis_key("*")
+                    for redis_key in client.scan_iter(match=pattern, count=500):
+                        client.delete(redis_key)
+                else:
+                    client.delete(self._redis_key(key))
+            except redis.RedisError as e:
+                self._redis_failed(e)
+        self._bus.publish(self.namespace, key)
+
+
+_redis_clients: Dict[Optional[float], redis.Redis] = {}
+_async_redis: Optional[aredis.Redis] = None
+
+
+def get_redis(timeout: Optional[float] = _MISSING) -> redis.Redis:
+    """Shared client for the cache Redis; a short timeout keeps lookups cheap."""
+    if timeout is _MISSING:
+        timeout = settings.CACHE_REDIS_TIMEOUT
+    client = _redis_clients.get(timeout)
+    if client is None:
+        client = _redis_clients[timeout] = redis.Redis(
+            host=settings.REDIS_HOST,
+            port=settings.REDIS_PORT,
+            socket_timeout=timeout,
+            socket_connect_timeout=settings.CACHE_REDIS_TIMEOUT,
+        )
+    return client
+
+
+def get_async_redis() -> aredis.Redis:
+    global _async_redis
+    if _async_redis is None:
+        _async_redis = aredis.Redis(
+            host=settings.REDIS_HOST,
+            port=settings.REDIS_PORT,
+            socket_timeout=settings.CACHE_REDIS_TIMEOUT,
+            socket_connect_timeout=settings.CACHE_REDIS_TIMEOUT,
+        )
+    return _async_redis
+
+
+async def close_cache_clients():
+    global _async_redis
+    for client in _redis_clients.values():
+        client.close()
+    _redis_clients.clear()
+    if _async_redis is not None:
+        await _async_redis.aclose()
+        _async_redis = None
+
+
+cache_bus = InvalidationBus()
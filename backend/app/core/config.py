@@ -1,5 +1,6 @@
+import json
 import os
-from typing import Optional
+from typing import Dict, List, Optional
 
 from pydantic_settings import BaseSettings
 
@@ -24,6 +25,12 @@ class Settings(BaseSettings):
     ACCESS_TOKEN_EXPIRE_MINUTES: int = int(
         os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "10080")
     )
+    PASSWORD_HASH_WORKERS: int = int(
+        os.getenv("PASSWORD_HASH_WORKERS", str(os.cpu_count() or 4))
+    )
+    # Seconds the user of a verified token is reused without a database lookup
+    AUTH_TOKEN_CACHE_TTL: int = int(os.getenv("AUTH_TOKEN_CACHE_TTL", "60"))
+    AUTH_TOKEN_CACHE_SIZE: int = int(os.getenv("AUTH_TOKEN_CACHE_SIZE", "10000"))
 
     # Chat Provider Settings
     CHAT_PROVIDER: str = os.getenv("CHAT_PROVIDER", "gemini")
@@ -42,11 +49,101 @@ class Settings(BaseSettings):
 
     # Milvus Settings
     MILVUS_URI: str = os.getenv("MILVUS_URI", "http://localhost:19530")
+    # Largest chunk batch with precomputed embeddings accepted in one request
+    CHUNK_BATCH_MAX_BYTES: int = int(
+        os.getenv("CHUNK_BATCH_MAX_BYTES", str(64 * 1024 * 1024))
+    )
+
+    # Hybrid Retrieval Settings
+    HYBRID_SEARCH_ENABLED: bool = (
+        os.getenv("HYBRID_SEARCH_ENABLED", "true").lower() == "true"
+    )
+    HYBRID_RANKER: str = os.getenv("HYBRID_RANKER", "weighted")
+    HYBRID_RRF_K: int = int(os.getenv("HYBRID_RRF_K", "60"))
+    HYBRID_DENSE_WEIGHT: float = float(os.getenv("HYBRID_DENSE_WEIGHT", "0.6"))
+    HYBRID_SPARSE_WEIGHT: float = float(os.getenv("HYBRID_SPARSE_WEIGHT", "0.4"))
+
+    # Chunking & Context Settings
+    CHUNK_SIZE: int = int(os.getenv("CHUNK_SIZE", "1000"))
+    CHUNK_OVERLAP: int = int(os.getenv("CHUNK_OVERLAP", "200"))
+    CONTEXT_TOKEN_BUDGET: int = int(os.getenv("CONTEXT_TOKEN_BUDGET", "3000"))
+    # Seconds between background saves of an answer while it streams
+    MESSAGE_CHECKPOINT_INTERVAL: float = float(
+        os.getenv("MESSAGE_CHECKPOINT_INTERVAL", "2")
+    )
+    # Share one generation among identical first-turn questions in flight
+    CHAT_COALESCING_ENABLED: bool = (
+        os.getenv("CHAT_COALESCING_ENABLED", "true").lower() == "true"
+    )
+
+    # Chat Streaming Settings
+    STREAM_FLUSH_INTERVAL_MS: int = int(os.getenv("STREAM_FLUSH_INTERVAL_MS", "20"))
+    STREAM_FLUSH_BYTES: int = int(os.getenv("STREAM_FLUSH_BYTES", "256"))
+    # gzip chat streams for clients that accept it
+    STREAM_COMPRESSION_ENABLED: bool = (
+        os.getenv("STREAM_COMPRESSION_ENABLED", "false").lower() == "true"
+    )
+
+    # Chat Admission Control Settings, per worker process
+    ADMISSION_CONTROL_ENABLED: bool = (
+        os.getenv("ADMISSION_CONTROL_ENABLED", "true").lower() == "true"
+    )
+    ADMISSION_INITIAL_LIMIT: int = int(os.getenv("ADMISSION_INITIAL_LIMIT", "32"))
+    ADMISSION_MIN_LIMIT: int = int(os.getenv("ADMISSION_MIN_LIMIT", "4"))
+    ADMISSION_MAX_LIMIT: int = int(os.getenv("ADMISSION_MAX_LIMIT", "128"))
+    ADMISSION_PER_USER_LIMIT: int = int(os.getenv("ADMISSION_PER_USER_LIMIT", "3"))
+    ADMISSION_MAX_QUEUE: int = int(os.getenv("ADMISSION_MAX_QUEUE", "64"))
+    ADMISSION_QUEUE_TIMEOUT: float = float(os.getenv("ADMISSION_QUEUE_TIMEOUT", "5"))
+    # Time to first token above which the limit backs off
+    ADMISSION_LATENCY_TARGET_MS: int = int(
+        os.getenv("ADMISSION_LATENCY_TARGET_MS", "4000")
+    )
+    ADMISSION_BACKOFF: float = float(os.getenv("ADMISSION_BACKOFF", "0.7"))
+
+    # Reranker Settings
+    RERANKER_PROVIDER: str = os.getenv("RERANKER_PROVIDER", "none")
+    RERANKER_MODEL: str = os.getenv("RERANKER_MODEL", "Xenova/ms-marco-MiniLM-L-6-v2")
+    RERANK_CANDIDATES: int = int(os.getenv("RERANK_CANDIDATES", "20"))
+    RERANK_TOP_K: int = int(os.getenv("RERANK_TOP_K", "4"))
+    RERANK_TOKEN_BUDGET: int = int(os.getenv("RERANK_TOKEN_BUDGET", "2000"))
+    RERANK_BATCH_SIZE: int = int(os.getenv("RERANK_BATCH_SIZE", "32"))
+    RERANK_CACHE_SIZE: int = int(os.getenv("RERANK_CACHE_SIZE", "10000"))
+    RERANK_CACHE_TTL: int = int(os.getenv("RERANK_CACHE_TTL", "86400"))
 
     # Gemini Settings
     GOOGLE_API_KEY: str = os.getenv("GOOGLE_API_KEY", "")
     GOOGLE_GENAI_MODEL: str = os.getenv("GOOGLE_GENAI_MODEL", "gemini-2.5-flash")
 
+    # Model Routing Settings, model names as exposed by the LiteLLM gateway
+    MODEL_ROUTING_ENABLED: bool = (
+        os.getenv("MODEL_ROUTING_ENABLED", "false").lower() == "true"
+    )
+    ROUTER_FAST_MODEL: str = os.getenv("ROUTER_FAST_MODEL", "gemini-2.5-flash-lite")
+    ROUTER_STRONG_MODEL: str = os.getenv("ROUTER_STRONG_MODEL", "gemini-2.5-pro")
+    QUERY_REWRITE_MODEL: str = os.getenv("QUERY_REWRITE_MODEL", "gemini-2.0-flash-lite")
+    GUARDRAILS_MODEL: str = os.getenv("GUARDRAILS_MODEL", "gemini-2.0-flash-lite")
+    # A question is routed to the strong model once its score reaches this
+    ROUTER_STRONG_THRESHOLD: float = float(os.getenv("ROUTER_STRONG_THRESHOLD", "2"))
+    ROUTER_LONG_QUERY_TOKENS: int = int(os.getenv("ROUTER_LONG_QUERY_TOKENS", "40"))
+    ROUTER_DEEP_HISTORY: int = int(os.getenv("ROUTER_DEEP_HISTORY", "6"))
+    # Top rerank score below which retrieval is considered uncertain
+    ROUTER_LOW_RERANK_SCORE: float = float(os.getenv("ROUTER_LOW_RERANK_SCORE", "0"))
+    # USD per million input / output tokens, used for cost metrics
+    LLM_PRICES: Dict[str, List[float]] = json.loads(
+        os.getenv(
+            "LLM_PRICES",
+            json.dumps(
+                {
+                    "gemini-2.5-pro": [1.25, 10.0],
+                    "gemini-2.5-flash": [0.3, 2.5],
+                    "gemini-2.5-flash-lite": [0.1, 0.4],
+                    "gemini-2.0-flash": [0.1, 0.4],
+                    "gemini-2.0-flash-lite": [0.075, 0.3],
+                }
+            ),
+        )
+    )
+
     # vLLM Embedding Settings
     EMBEDDING_MODEL: str = os.getenv("EMBEDDING_MODEL", "multilingual-e5-base")
 
@@ -54,15 +151,69 @@ class Settings(BaseSettings):
     MODEL_BASE_URL: str = os.getenv("MODEL_BASE_URL", "http://litellm:4000")
     API_KEY: str = os.getenv("API_KEY", "")
 
+    # Model HTTP Client Settings
+    HTTP_MAX_CONNECTIONS: int = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = int(
+        os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", "20")
+    )
+    HTTP_KEEPALIVE_EXPIRY: float = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "30"))
+    HTTP_CONNECT_TIMEOUT: float = float(os.getenv("HTTP_CONNECT_TIMEOUT", "5"))
+    HTTP_READ_TIMEOUT: float = float(os.getenv("HTTP_READ_TIMEOUT", "120"))
+    HTTP2_ENABLED: bool = os.getenv("HTTP2_ENABLED", "false").lower() == "true"
+    # Retries of failed connection attempts, done by the transport
+    HTTP_CONNECT_RETRIES: int = int(os.getenv("HTTP_CONNECT_RETRIES", "1"))
+    # Retries of failed requests, done by the OpenAI client with backoff
+    HTTP_MAX_RETRIES: int = int(os.getenv("HTTP_MAX_RETRIES", "2"))
+
     # Cache Settings
     REDIS_HOST: str = os.getenv("REDIS_CACHE_HOST", "localhost")
     REDIS_PORT: int = int(os.getenv("REDIS_CACHE_PORT", "6379"))
+    # App caches keep a per-process LRU in front of Redis, shared by all workers
+    SHARED_CACHE_ENABLED: bool = (
+        os.getenv("SHARED_CACHE_ENABLED", "true").lower() == "true"
+    )
+    CACHE_KEY_PREFIX: str = os.getenv("CACHE_KEY_PREFIX", "llmops")
+    # Redis calls slower than this fall back to the local tier
+    CACHE_REDIS_TIMEOUT: float = float(os.getenv("CACHE_REDIS_TIMEOUT", "0.1"))
+    CACHE_REDIS_RETRY_SECONDS: float = float(
+        os.getenv("CACHE_REDIS_RETRY_SECONDS", "5")
+    )
+    QUERY_EMBEDDING_CACHE_TTL: int = int(
+        os.getenv("QUERY_EMBEDDING_CACHE_TTL", "86400")
+    )
+    QUERY_EMBEDDING_CACHE_SIZE: int = int(
+        os.getenv("QUERY_EMBEDDING_CACHE_SIZE", "1000")
+    )
 
     # Langfuse Settings
     LANGFUSE_HOST: str = os.getenv("LANGFUSE_HOST", "")
     LANGFUSE_PUBLIC_KEY: str = os.getenv("LANGFUSE_PUBLIC_KEY", "")
     LANGFUSE_SECRET_KEY: str = os.getenv("LANGFUSE_SECRET_KEY", "")
 
+    # Tracing Settings
+    LANGFUSE_TRACING_ENABLED: bool = (
+        os.getenv("LANGFUSE_TRACING_ENABLED", "true").lower() == "true"
+    )
+    # Share of requests traced regardless of outcome
+    LANGFUSE_SAMPLE_RATE: float = float(os.getenv("LANGFUSE_SAMPLE_RATE", "1.0"))
+    # Record every request and always export failed or slow ones
+    LANGFUSE_TAIL_SAMPLING: bool = (
+        os.getenv("LANGFUSE_TAIL_SAMPLING", "true").lower() == "true"
+    )
+    LANGFUSE_SLOW_TRACE_MS: int = int(os.getenv("LANGFUSE_SLOW_TRACE_MS", "10000"))
+    LANGFUSE_MAX_PENDING_SPANS: int = int(
+        os.getenv("LANGFUSE_MAX_PENDING_SPANS", "10000")
+    )
+    LANGFUSE_MAX_QUEUE_SIZE: int = int(os.getenv("LANGFUSE_MAX_QUEUE_SIZE", "2048"))
+    LANGFUSE_FLUSH_AT: int = int(os.getenv("LANGFUSE_FLUSH_AT", "256"))
+    LANGFUSE_FLUSH_INTERVAL: float = float(os.getenv("LANGFUSE_FLUSH_INTERVAL", "5"))
+
+    # Prompt Cache Settings
+    PROMPT_LABEL: str = os.getenv("PROMPT_LABEL", "production")
+    # Comma separated version pins, e.g. "qa_system:3,document_prompt:1"
+    PROMPT_VERSIONS: str = os.getenv("PROMPT_VERSIONS", "")
+    PROMPT_CACHE_TTL_SECONDS: int = int(os.getenv("PROMPT_CACHE_TTL_SECONDS", "60"))
+
     @property
     def get_database_url(self) -> str:
         if self.SQLALCHEMY_DATABASE_URI:
@@ -0,0 +1,461 @@
+import asyncio
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Optional
+from uuid import UUID
+
+from app.core.config import settings
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+from prometheus_client import (
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+# Latencies of the RAG hot path range from a few ms (cache hits) to minutes
+LATENCY_BUCKETS = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+    120.0,
+)
+
+TIME_TO_FIRST_TOKEN = Histogram(
+    "rag_time_to_first_token_seconds",
+    "Time from receiving a chat request to streaming the first answer token",
+    buckets=LATENCY_BUCKETS,
+)
+GENERATION_SECONDS = Histogram(
+    "rag_generation_seconds",
+    "Total time spent producing a chat answer",
+    buckets=LATENCY_BUCKETS,
+)
+QUERY_REWRITE_SECONDS = Histogram(
+    "rag_query_rewrite_seconds",
+    "LLM time spent rewriting the question from the chat history",
+    buckets=LATENCY_BUCKETS,
+)
+GUARDRAILS_SECONDS = Histogram(
+    "rag_guardrails_seconds",
+    "Time spent in input or output guardrails",
+    ["direction"],
+    buckets=LATENCY_BUCKETS,
+)
+EMBEDDING_SECONDS = Histogram(
+    "rag_embedding_seconds",
+    "Embedding request latency",
+    ["operation"],
+    buckets=LATENCY_BUCKETS,
+)
+VECTOR_SEARCH_SECONDS = Histogram(
+    "rag_vector_search_seconds",
+    "Milvus search latency",
+    ["mode"],
+    buckets=LATENCY_BUCKETS,
+)
+
+LLM_CALL_SECONDS = Histogram(
+    "rag_llm_call_seconds",
+    "LLM call latency by chain stage and model",
+    ["stage", "model"],
+    buckets=LATENCY_BUCKETS,
+)
+
+LLM_TOKENS = Counter(
+    "rag_llm_tokens_total",
+    "LLM tokens reported by the provider",
+    ["direction", "model"],
+)
+LLM_COST = Counter(
+    "rag_llm_cost_usd_total",
+    "Estimated LLM spend from token usage and the configured prices",
+    ["stage", "model"],
+)
+MODEL_ROUTES = Counter(
+    "rag_model_routes_total",
+    "Model routing decisions by stage and tier",
+    ["stage", "tier", "model"],
+)
+CACHE_REQUESTS = Counter(
+    "rag_cache_requests_total",
+    "Cache lookups by cache and result",
+    ["cache", "result"],
+)
+INGESTION_CHUNKS = Counter(
+    "rag_ingestion_chunks_total",
+    "Chunks written to the vector store",
+)
+TRACES = Counter(
+    "rag_traces_total",
+    "Langfuse traces by sampling decision",
+    ["decision"],
+)
+TRACE_SPANS = Counter(
+    "rag_trace_spans_total",
+    "Langfuse spans by outcome: exported, dropped on overflow or sampled out",
+    ["outcome"],
+)
+
+INFLIGHT_STREAMS = Gauge(
+    "rag_inflight_streams",
+    "Chat responses currently being streamed",
+    multiprocess_mode="livesum",
+)
+DB_POOL_CHECKED_OUT = Gauge(
+    "rag_db_pool_checked_out",
+    "Database connections currently checked out of the pool",
+    multiprocess_mode="livesum",
+)
+DB_POOL_SIZE = Gauge(
+    "rag_db_pool_size",
+    "Database connections kept open by the pool",
+    multiprocess_mode="livesum",
+)
+INGESTION_QUEUE_DEPTH = Gauge(
+    "rag_ingestion_queue_depth",
+    "Document processing tasks queued or running",
+    multiprocess_mode="livesum",
+)
+ADMISSION_LIMIT = Gauge(
+    "rag_admission_limit",
+    "Adaptive concurrency limit for chat streams",
+    multiprocess_mode="livesum",
+)
+STARTUP_SECONDS = Gauge(
+    "rag_startup_seconds",
+    "Worker startup phase durations, slowest worker since the last deploy",
+    ["phase"],
+    multiprocess_mode="max",
+)
+ADMISSION_REJECTIONS = Counter(
+    "rag_admission_rejections_total",
+    "Chat requests shed by admission control",
+    ["reason"],
+)
+ADMISSION_WAIT = Histogram(
+    "rag_admission_wait_seconds",
+    "Time chat requests spent queued for admission",
+    buckets=LATENCY_BUCKETS,
+)
+EVENT_LOOP_LAG = Histogram(
+    "rag_event_loop_lag_seconds",
+    "How late the event loop woke up a periodic timer",
+    buckets=LATENCY_BUCKETS,
+)
+PROCESS_RSS = Gauge(
+    "rag_process_resident_memory_bytes",
+    "Resident memory of the API workers",
+    multiprocess_mode="livesum",
+)
+
+
+async def monitor_event_loop(interval: float = 0.5):
+    """Sample event loop lag and resident memory until cancelled."""
+    loop = asyncio.get_running_loop()
+    page_size = os.sysconf("SC_PAGE_SIZE")
+    while True:
+        scheduled = loop.time()
+        await asyncio.sleep(interval)
+        EVENT_LOOP_LAG.observe(max(loop.time() - scheduled - interval, 0.0))
+        try:
+            with open("/proc/self/statm") as statm:
+                PROCESS_RSS.set(int(statm.read().split()[1]) * page_size)
+        except OSError:
+            pass
+
+
+def render_metrics() -> bytes:
+    """Exposition text, aggregated over all workers when running multiprocess."""
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry)
+    return generate_latest(REGISTRY)
+
+
+# Timings of the chat request being served in the current context, if any
+_current_request: ContextVar[Optional["StageMetricsHandler"]] = ContextVar(
+    "current_request_metrics", default=None
+)
+
+
+def record_cache(cache: str, hit: bool, count: int = 1):
+    if count:
+        CACHE_REQUESTS.labels(cache=cache, result="hit" if hit else "miss").inc(count)
+        request = _current_request.get()
+        if request is not None:
+            request.add_cache(cache, hit, count)
+
+
+def record_route(stage: str, tier: str, model: str):
+    MODEL_ROUTES.labels(stage=stage, tier=tier, model=model).inc()
+    request = _current_request.get()
+    if request is not None:
+        request.routes[stage] = {"tier": tier, "model": model}
+
+
+@contextmanager
+def observe(histogram: Histogram, stage: Optional[str] = None, **labels: str):
+    """Time the wrapped block into `histogram` and the current request's `stage`."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        metric = histogram.labels(**labels) if labels else histogram
+        metric.observe(elapsed)
+        request = _current_request.get()
+        if stage and request is not None:
+            request.add_stage(stage, elapsed)
+
+
+class StageMetricsHandler(BaseCallbackHandler):
+    """Per-request callback handler timing the stages of the RAG chain.
+
+    Query rewrite is the LLM call the history aware retriever makes while the
+    retrieval chain fetches documents; the answer is the LLM call made by the
+    stuff documents chain. Guardrails have no runs of their own, so their time
+    is whatever the request spent before the retrieval chain started (input
+    rails) and after it finished (output rails).
+
+    Besides feeding the Prometheus metrics, the handler keeps the request's own
+    breakdown (see `summary`). Guardrails run the chain in a worker thread,
+    so the handler re-binds itself to that context when the chain starts so
+    that embedding, search and cache timings are attributed to the request.
+    """
+
+    run_inline = True
+
+    REWRITE_CHAIN = "retrieve_documents"
+    ANSWER_CHAIN = "stuff_documents_chain"
+    RAG_CHAIN = "retrieval_chain"
+
+    def __init__(self):
+        self.started_at = time.perf_counter()
+        self.chain_started_at = self.started_at
+        self.first_token_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.stages: Dict[str, float] = {}
+        self.tokens: Dict[str, int] = {"input": 0, "output": 0}
+        self.cost_usd = 0.0
+        self.cache: Dict[str, Dict[str, int]] = {}
+        self.routes: Dict[str, Dict[str, str]] = {}
+        self._models: Dict[UUID, str] = {}
+        self._runs: Dict[UUID, tuple] = {}
+        self._started: Dict[UUID, float] = {}
+        self._rag_started: Optional[float] = None
+        self._rag_ended: Optional[float] = None
+
+    def bind(self):
+        """Attribute timings recorded in the current context to this request."""
+        _current_request.set(self)
+
+    def add_stage(self, stage: str, seconds: float):
+        self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+
+    def add_cache(self, cache: str, hit: bool, count: int = 1):
+        counts = self.cache.setdefault(cache, {"hits": 0, "misses": 0})
+        counts["hits" if hit else "misses"] += count
+
+    def on_chain_start(
+        self,
+        serialized: Optional[Dict[str, Any]],
+        inputs: Any,
+        *,
+        run_id: UUID,
+        parent_run_id: Optional[UUID] = None,
+        **kwargs: Any,
+    ) -> None:
+        name = kwargs.get("name")
+        self._runs[run_id] = ("chain", name, parent_run_id)
+        if name == self.RAG_CHAIN and self._rag_started is None:
+            self._rag_started = time.perf_counter()
+            self.bind()
+
+    def on_chain_end(self, outputs: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        _, name, _ = self._runs.get(run_id, (None, None, None))
+        if name == self.RAG_CHAIN:
+            self._rag_ended = time.perf_counter()
+
+    def on_retriever_start(
+        self,
+        serialized: Optional[Dict[str, Any]],
+        query: str,
+        *,
+        run_id: UUID,
+        parent_run_id: Optional[UUID] = None,
+        **kwargs: Any,
+    ) -> None:
+        self._runs[run_id] = ("retriever", kwargs.get("name"), parent_run_id)
+        self._started[run_id] = time.perf_counter()
+
+    def on_retriever_end(self, documents: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        started = self._started.pop(run_id, None)
+        if started is None:
+            return
+        # A retriever nested in another one (e.g. under the reranker) is the
+        # plain search; the outermost one covers the whole retrieval
+        stage = "search" if self._inside(run_id, kind="retriever") else "retrieval"
+        self.add_stage(stage, time.perf_counter() - started)
+
+    def on_chat_model_start(
+        self,
+        serialized: Optional[Dict[str, Any]],
+        messages: Any,
+        *,
+        run_id: UUID,
+        parent_run_id: Optional[UUID] = None,
+        **kwargs: Any,
+    ) -> None:
+        self._runs[run_id] = ("llm", None, parent_run_id)
+        self._started[run_id] = time.perf_counter()
+        self._models[run_id] = _model_name(kwargs)
+
+    def on_llm_start(
+        self,
+        serialized: Optional[Dict[str, Any]],
+        prompts: Any,
+        *,
+        run_id: UUID,
+        parent_run_id: Optional[UUID] = None,
+        **kwargs: Any,
+    ) -> None:
+        self._runs[run_id] = ("llm", None, parent_run_id)
+        self._started[run_id] = time.perf_counter()
+        self._models[run_id] = _model_name(kwargs)
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any) -> None:
+        model = self._models.pop(run_id, "unknown")
+        if self._inside(run_id, name=self.REWRITE_CHAIN):
+            stage = "query_rewrite"
+        elif self._inside(run_id, name=self.ANSWER_CHAIN):
+            stage = "answer"
+        else:
+            stage = "other"
+
+        started = self._started.pop(run_id, None)
+        if started is not None:
+            elapsed = time.perf_counter() - started
+            LLM_CALL_SECONDS.labels(stage=stage, model=model).observe(elapsed)
+            if stage == "query_rewrite":
+                QUERY_REWRITE_SECONDS.observe(elapsed)
+            if stage != "other":
+                self.add_stage(stage, elapsed)
+
+        input_tokens, output_tokens = _token_usage(response)
+        if input_tokens:
+            LLM_TOKENS.labels(direction="input", model=model).inc(input_tokens)
+            self.tokens["input"] += input_tokens
+        if output_tokens:
+            LLM_TOKENS.labels(direction="output", model=model).inc(output_tokens)
+            self.tokens["output"] += output_tokens
+        input_price, output_price = settings.LLM_PRICES.get(model, (0.0, 0.0))
+        cost = (input_tokens * input_price + output_tokens * output_price) / 1e6
+        if cost:
+            LLM_COST.labels(stage=stage, model=model).inc(cost)
+            self.cost_usd += cost
+
+    def _inside(
+        self, run_id: UUID, name: Optional[str] = None, kind: Optional[str] = None
+    ) -> bool:
+        parent = self._runs.get(run_id, (None, None, None))[2]
+        while parent is not None:
+            parent_kind, parent_name, grandparent = self._runs.get(
+                parent, (None, None, None)
+            )
+            if (name is None or parent_name == name) and (
+                kind is None or parent_kind == kind
+            ):
+                return True
+            parent = grandparent
+        return False
+
+    def mark_chain_start(self):
+        """Mark the moment the guarded chain is invoked."""
+        self.chain_started_at = time.perf_counter()
+        self.bind()
+
+    def mark_first_token(self):
+        if self.first_token_at is None:
+            self.first_token_at = time.perf_counter()
+            TIME_TO_FIRST_TOKEN.observe(self.first_token_at - self.started_at)
+
+    def finish(self):
+        """Record the request level timings once the response is complete."""
+        self.finished_at = time.perf_counter()
+        GENERATION_SECONDS.observe(self.finished_at - self.started_at)
+        rag_started = self._rag_started or self.finished_at
+        self.stages["guardrails_input"] = rag_started - self.chain_started_at
+        if self._rag_ended is not None:
+            self.stages["guardrails_output"] = self.finished_at - self._rag_ended
+        GUARDRAILS_SECONDS.labels(direction="input").observe(
+            self.stages["guardrails_input"]
+        )
+        if "guardrails_output" in self.stages:
+            GUARDRAILS_SECONDS.labels(direction="output").observe(
+                self.stages["guardrails_output"]
+            )
+
+    def summary(self) -> Dict[str, Any]:
+        """Latency breakdown in milliseconds, tokens, cache use, routes and cost."""
+        end = self.finished_at or time.perf_counter()
+        stages = dict(self.stages)
+        if "retrieval" in stages and "search" in stages:
+            # What the outer retriever adds on top of its search is the rerank
+            stages["rerank"] = stages["retrieval"] - stages["search"]
+        stages["setup"] = self.chain_started_at - self.started_at
+        if self.first_token_at is not None:
+            stages["time_to_first_token"] = self.first_token_at - self.started_at
+        stages["total"] = end - self.started_at
+        return {
+            "stages_ms": {k: round(v * 1000, 1) for k, v in stages.items()},
+            "tokens": dict(self.tokens),
+            "cache": {k: dict(v) for k, v in self.cache.items()},
+            "routes": {k: dict(v) for k, v in self.routes.items()},
+            "cost_usd": round(self.cost_usd, 6),
+        }
+
+
+def _model_name(kwargs: Dict[str, Any]) -> str:
+    params = kwargs.get("invocation_params") or {}
+    metadata = kwargs.get("metadata") or {}
+    return (
+        params.get("model")
+        or params.get("model_name")
+        or metadata.get("ls_model_name")
+        or "unknown"
+    )
+
+
+def _token_usage(response: LLMResult) -> tuple:
+    usage = (response.llm_output or {}).get("token_usage") or {}
+    if usage:
+        return usage.get("prompt_tokens", 0), usage.get("completion_tokens", 0)
+
+    input_tokens = output_tokens = 0
+    for generations in response.generations:
+        for generation in generations:
+            metadata = getattr(
+                getattr(generation, "message", None), "usage_metadata", None
+            )
+            if metadata:
+                input_tokens += metadata.get("input_tokens", 0)
+                output_tokens += metadata.get("output_tokens", 0)
+    return input_tokens, output_tokens
@@ -1,12 +1,22 @@
+import asyncio
+import hashlib
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from typing import Optional
 
 import jwt
+from app.core.cache import TwoTierCache
 from app.core.config import settings
 from fastapi.security import APIKeyHeader, OAuth2PasswordBearer
 from passlib.context import CryptContext
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# bcrypt releases the GIL, so a thread pool spreads hashing over the cores
+# without blocking the event loop
+_password_executor = ThreadPoolExecutor(
+    max_workers=settings.PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash"
+)
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login/access-token")
 api_key_header = APIKeyHeader(name="X-API-Key", auto_error=False)
@@ -20,6 +30,18 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
+async def averify_password(plain_password: str, hashed_password: str) -> bool:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        _password_executor, verify_password, plain_password, hashed_password
+    )
+
+
+async def aget_password_hash(password: str) -> str:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_password_executor, get_password_hash, password)
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     to_encode = data.copy()
     if expires_delta:
@@ -33,3 +55,41 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
         to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM
     )
     return encoded_jwt
+
+
+class VerifiedTokenCache:
+    """Users of recently verified access tokens, keyed by the token's digest.
+
+    Entries live in the cache shared by all workers until the token expires or
+    for `ttl` seconds, whichever is sooner, so a deactivated user is locked out
+    within `ttl`. Users are stored as JSON serializable column snapshots.
+    """
+
+    def __init__(self, ttl: float, max_size: int):
+        self.ttl = ttl
+        self._cache = TwoTierCache("auth_token", ttl, max_size)
+
+    @staticmethod
+    def _key(token: str) -> str:
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    async def get(self, token: str) -> Optional[dict]:
+        entry = await self._cache.aget(self._key(token))
+        if entry is None or time.time() >= entry["expires_at"]:
+            return None
+        return entry["user"]
+
+    async def put(self, token: str, exp: Optional[float], user: dict):
+        expires_at = time.time() + self.ttl
+        if exp is not None:
+            expires_at = min(expires_at, exp)
+        await self._cache.aset(
+            self._key(token),
+            {"expires_at": expires_at, "user": user},
+            ttl=expires_at - time.time(),
+        )
+
+
+token_cache = VerifiedTokenCache(
+    ttl=settings.AUTH_TOKEN_CACHE_TTL, max_size=settings.AUTH_TOKEN_CACHE_SIZE
+)
@@ -0,0 +1,149 @@
+import asyncio
+import os
+import sys
+import time
+from contextlib import contextmanager
+from typing import Awaitable, Callable, Dict, Optional, Sequence
+
+from app.core.logger import logger
+from app.core.metrics import STARTUP_SECONDS
+
+
+def process_uptime() -> Optional[float]:
+    """Seconds since this process was started, interpreter boot included."""
+    try:
+        with open("/proc/self/stat") as f:
+            # Fields after the command name; the start time is field 22
+            start_ticks = int(f.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/uptime") as f:
+            uptime = float(f.read().split()[0])
+    except (OSError, ValueError, IndexError):
+        return None
+    return uptime - start_ticks / os.sysconf("SC_CLK_TCK")
+
+
+class StartupProfile:
+    """Durations of the startup phases of this worker.
+
+    "boot" is the time from process start until the app's lifespan begins,
+    which is dominated by imports, and "ready" the time until every warm-up
+    hook finished. Phases are exported as the rag_startup_seconds gauge and
+    logged together once the worker is ready.
+    """
+
+    def __init__(self):
+        self.phases: Dict[str, float] = {}
+
+    def record(self, phase: str, seconds: float):
+        self.phases[phase] = seconds
+        STARTUP_SECONDS.labels(phase=phase).set(seconds)
+
+    @contextmanager
+    def phase(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - started)
+
+    def mark(self, phase: str):
+        """Record the process age under `phase`."""
+        uptime = process_uptime()
+        if uptime is not None:
+            self.record(phase, uptime)
+
+    def report(self) -> str:
+        phases = ", ".join(
+            f"{name} {seconds:.2f}s" for name, seconds in self.phases.items()
+        )
+        return f"Startup profile: {phases} ({len(sys.modules)} modules loaded)"
+
+
+class WarmUp:
+    """Run warm-up hooks in the background once the worker starts serving.
+
+    Hooks import heavy modules, open connection pools and load models while
+    the worker already answers requests. Hooks run concurrently unless they
+    name hooks to run `after`, which keeps imports of overlapping packages in
+    sequence. Requests that need a hook's result await it with `wait`;
+    readiness is reported once every hook finished and the required ones
+    succeeded.
+    """
+
+    def __init__(self, profile: StartupProfile):
+        self.profile = profile
+        self._hooks: Dict[str, Callable[[], Awaitable]] = {}
+        self._required: Dict[str, bool] = {}
+        self._after: Dict[str, Sequence[str]] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._done: Optional[asyncio.Task] = None
+
+    def add(
+        self,
+        name: str,
+        hook: Callable[[], Awaitable],
+        required: bool = False,
+        after: Sequence[str] = (),
+    ):
+        self._hooks[name] = hook
+        self._required[name] = required
+        self._after[name] = after
+
+    def start(self):
+        for name, hook in self._hooks.items():
+            self._tasks[name] = asyncio.create_task(self._run(name, hook))
+        self._done = asyncio.create_task(self._finish())
+
+    async def _run(self, name: str, hook: Callable[[], Awaitable]):
+        await asyncio.gather(
+            *(self._tasks[other] for other in self._after[name]),
+            return_exceptions=True,
+        )
+        try:
+            with self.profile.phase(f"warm_up.{name}"):
+                await hook()
+        except Exception as e:
+            logger.error(f"Warm-up of {name} failed: {e}")
+            raise
+
+    async def _finish(self):
+        await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+        self.profile.mark("ready")
+        logger.info(self.profile.report())
+
+    async def wait(self, name: str):
+        """Wait for a hook, raising its error if it failed."""
+        await asyncio.shield(self._tasks[name])
+
+    def status(self) -> Dict[str, str]:
+        status = {}
+        for name, task in self._tasks.items():
+            if not task.done():
+                status[name] = "pending"
+            elif task.cancelled() or task.exception() is not None:
+                status[name] = "failed"
+            else:
+                status[name] = "ready"
+        return status
+
+    @property
+    def ready(self) -> bool:
+        if self._done is None:
+            return False
+        status = self.status()
+        return all(
+            state == "ready" if self._required[name] else state != "pending"
+            for name, state in status.items()
+        )
+
+    async def stop(self):
+        for task in [*self._tasks.values(), self._done]:
+            if task is not None and not task.done():
+                task.cancel()
+        await asyncio.gather(
+            *self._tasks.values(), *filter(None, [self._done]), return_exceptions=True
+        )
+
+
+startup_profile = StartupProfile()
+warm_up = WarmUp(startup_profile)
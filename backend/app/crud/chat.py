@@ -1,7 +1,8 @@
+from sqlalchemy import insert, update
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from sqlalchemy.orm import selectinload
-from app.models.chat import Chat
+from app.models.chat import Chat, Message
 from app.schemas.chat import ChatCreate
 from app.models.knowledge import KnowledgeBase
 from typing import List
@@ -59,3 +60,21 @@ async def delete_chat(db: AsyncSession, chat: Chat):
     # Delete chat and its messages
     await db.delete(chat)
     await db.commit()
+
+
+async def create_messages(
+    db: AsyncSession, chat_id: int, messages: List[dict]
+) -> List[int]:
+    """Insert several messages of a chat in one statement, returning their ids."""
+    result = await db.execute(
+        insert(Message).returning(Message.id, sort_by_parameter_order=True),
+        [{"chat_id": chat_id, **message} for message in messages],
+    )
+    ids = list(result.scalars())
+    await db.commit()
+    return ids
+
+
+async def update_message(db: AsyncSession, message_id: int, **values):
+    await db.execute(update(Message).where(Message.id == message_id).values(**values))
+    await db.commit()
@@ -91,8 +91,7 @@ async def delete_document(db: AsyncSession, document: Document):
         collection_name=f"knowledge_base_{document.knowledge_base_id}",
         embedding_function=EmbeddingFactory.create(),
     )
-    if hasattr(vector_store, "delete_by_document_id"):
-        vector_store.delete_by_document_id(document.id)
+    vector_store.delete_by_document_id(document.id)
 
     # Find and delete associated tasks and uploads
     result = await db.execute(
@@ -2,8 +2,14 @@ from typing import Dict, List, Optional, Sequence
 
 from app.models.document import Document, DocumentUpload
 from app.models.knowledge import KnowledgeBase
-from app.schemas.knowledge import DocumentBase, KnowledgeBaseCreate, PreviewResponse
+from app.schemas.knowledge import (
+    DocumentBase,
+    DocumentRegistration,
+    KnowledgeBaseCreate,
+    PreviewResponse,
+)
 from app.services.document_processor import preview_document
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from sqlalchemy.orm import selectinload
@@ -17,6 +23,8 @@ async def create_knowledge_base(
     kb = KnowledgeBase(
         name=knowledge_base.name,
         description=knowledge_base.description,
+        dense_weight=knowledge_base.dense_weight,
+        sparse_weight=knowledge_base.sparse_weight,
         user_id=user_id,
     )
     db.add(kb)
@@ -33,9 +41,13 @@ async def create_knowledge_base(
 
 
 async def get_knowledge_base_by_user_id(
-    db: AsyncSession, user_id: int, skip: int = 0, limit: int = 100
+    db: AsyncSession,
+    user_id: int,
+    skip: int = 0,
+    limit: int = 100,
+    name: Optional[str] = None,
 ) -> Sequence[KnowledgeBase]:
-    result = await db.execute(
+    query = (
         select(KnowledgeBase)
         .options(
             selectinload(KnowledgeBase.documents).selectinload(
@@ -43,9 +55,10 @@ async def get_knowledge_base_by_user_id(
             )
         )
         .filter(KnowledgeBase.user_id == user_id)
-        .offset(skip)
-        .limit(limit)
     )
+    if name is not None:
+        query = query.filter(KnowledgeBase.name == name)
+    result = await db.execute(query.offset(skip).limit(limit))
     return result.scalars().all()
 
 
@@ -68,6 +81,19 @@ async def get_knowledge_base_by_id(
     return kb
 
 
+async def knowledge_base_exists(
+    db: AsyncSession, knowledge_base_id: int, user_id: int
+) -> bool:
+    """Ownership check without loading the knowledge base's documents."""
+    result = await db.execute(
+        select(KnowledgeBase.id).filter(
+            KnowledgeBase.id == knowledge_base_id,
+            KnowledgeBase.user_id == user_id,
+        )
+    )
+    return result.scalar_one_or_none() is not None
+
+
 async def get_knowledge_base_by_ids_and_user_id(
     db: AsyncSession, knowledge_base_ids: List[int], user_id: int
 ) -> Sequence[KnowledgeBase]:
@@ -184,3 +210,77 @@ async def get_documents_by_knowledge_base_id(
         )
     )
     return result.scalars().all()
+
+
+async def get_documents_by_file_names(
+    db: AsyncSession, knowledge_base_id: int, file_names: Sequence[str]
+) -> Dict[str, Document]:
+    result = await db.execute(
+        select(Document).filter(
+            Document.knowledge_base_id == knowledge_base_id,
+            Document.file_name.in_(file_names),
+        )
+    )
+    return {document.file_name: document for document in result.scalars().all()}
+
+
+async def find_or_create_documents(
+    db: AsyncSession,
+    documents: Sequence[DocumentBase],
+    knowledge_base_id: int,
+    create: bool = True,
+) -> List[DocumentRegistration]:
+    """Look up documents by file name with one query and add the missing ones.
+
+    With `create` False nothing is written and missing files are reported as
+    such, so callers can register a file only once it has been ingested.
+    """
+    # File names are unique per knowledge base, the first record of a name wins
+    records: Dict[str, DocumentBase] = {}
+    for document in documents:
+        records.setdefault(document.file_name, document)
+    existing = await get_documents_by_file_names(db, knowledge_base_id, list(records))
+    created = {}
+    if create:
+        created = {
+            file_name: Document(
+                file_name=record.file_name,
+                file_path=record.file_path,
+                file_size=record.file_size,
+                file_hash=record.file_hash,
+                content_type=record.content_type,
+                knowledge_base_id=knowledge_base_id,
+            )
+            for file_name, record in records.items()
+            if file_name not in existing
+        }
+        if created:
+            db.add_all(created.values())
+            try:
+                await db.commit()
+            except IntegrityError:
+                # Another request registered some of them first, report those
+                # as existing and add the rest
+                await db.rollback()
+                return await find_or_create_documents(
+                    db, documents, knowledge_base_id, create
+                )
+
+    results = []
+    for document in documents:
+        file_name = document.file_name
+        if file_name in existing:
+            stored, status = existing[file_name], "exists"
+        elif file_name in created:
+            stored, status = created[file_name], "created"
+        else:
+            stored, status = None, "missing"
+        results.append(
+            DocumentRegistration(
+                file_name=file_name,
+                document_id=stored.id if stored else None,
+                file_hash=stored.file_hash if stored else None,
+                status=status,
+            )
+        )
+    return results
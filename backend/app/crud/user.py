@@ -1,4 +1,4 @@
-from app.core.security import get_password_hash
+from app.core.security import aget_password_hash
 from app.models.user import User
 from app.schemas.user import UserCreate
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -9,7 +9,7 @@ async def create_user(db: AsyncSession, user_in: UserCreate) -> User:
     user = User(
         email=user_in.email,
         username=user_in.username,
-        hashed_password=get_password_hash(user_in.password),
+        hashed_password=await aget_password_hash(user_in.password),
     )
     db.add(user)
     await db.commit()
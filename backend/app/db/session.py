@@ -1,9 +1,21 @@
 from typing import AsyncGenerator
 
 from app.core.config import settings
+from app.core.metrics import DB_POOL_CHECKED_OUT, DB_POOL_SIZE
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 
 async_engine = create_async_engine(settings.get_database_url)
+
+
+@event.listens_for(async_engine.sync_engine, "checkout")
+@event.listens_for(async_engine.sync_engine, "checkin")
+def _update_pool_metrics(*args):
+    pool = async_engine.sync_engine.pool
+    DB_POOL_CHECKED_OUT.set(pool.checkedout())
+    DB_POOL_SIZE.set(pool.checkedin() + pool.checkedout())
+
+
 AsyncSessionLocal = async_sessionmaker(
     bind=async_engine, class_=AsyncSession, expire_on_commit=False
 )
@@ -1,5 +1,5 @@
 from app.models.base import Base, TimestampMixin
-from sqlalchemy import Column, ForeignKey, Integer, String, Table, Text
+from sqlalchemy import JSON, Column, ForeignKey, Integer, String, Table, Text
 from sqlalchemy.orm import relationship
 
 chat_knowledge_bases = Table(
@@ -35,5 +35,9 @@ class Message(Base, TimestampMixin):
     chat_id = Column(Integer, ForeignKey("chats.id"), nullable=False)
     content = Column(Text, nullable=False)
     role = Column(String, nullable=False)
+    # Prompt name -> Langfuse version (None for local defaults) used for the answer
+    prompt_versions = Column(JSON, nullable=True)
+    # Per-stage latency breakdown, token counts and cache use of the answer
+    timings = Column(JSON, nullable=True)
 
     chat = relationship("Chat", back_populates="messages")
@@ -1,5 +1,5 @@
 from app.models.base import Base, TimestampMixin
-from sqlalchemy import Column, ForeignKey, Integer, String, Text
+from sqlalchemy import Column, Float, ForeignKey, Integer, String, Text
 from sqlalchemy.orm import relationship
 
 
@@ -10,6 +10,9 @@ class KnowledgeBase(Base, TimestampMixin):
     name = Column(String(255), index=True)
     description = Column(Text, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    # Hybrid search fusion weights, fall back to the global settings when unset
+    dense_weight = Column(Float, nullable=True)
+    sparse_weight = Column(Float, nullable=True)
 
     # Relationships
     user = relationship("User", back_populates="knowledge_bases")
@@ -4,9 +4,11 @@ from typing import Dict, List, Optional
 
 from app.core.config import settings
 from app.prompts.manager import DEFAULT_PROMPTS, prompt_manager
+from app.services.langfuse_tracing import langfuse_tracing
 
 
 def main():
+    langfuse_tracing.start()
     lf = prompt_manager._lf_client
     prompt_specs: Dict[str, Dict[str, Optional[List[str]]]] = {
         "qa_system": {"name": "llmops/qa_system"},
@@ -1,9 +1,14 @@
+import asyncio
 import os
-from typing import Dict, Optional
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
 
+from app.core.cache import TwoTierCache, cache_bus
 from app.core.config import settings
 from app.core.logger import logger
-from langfuse import Langfuse
+from app.services.langfuse_tracing import langfuse_tracing
 
 # Fallback local prompt definitions for quick iteration
 DEFAULT_PROMPTS: Dict[str, str] = {
@@ -30,6 +35,18 @@ DEFAULT_PROMPTS: Dict[str, str] = {
     ),
     "document_prompt": ("\n\n- {page_content}\n\n"),
 }
+# Cached prompts outlive their refresh interval, so the last version fetched
+# keeps being served while Langfuse is unreachable
+PROMPT_ENTRY_TTL = 7 * 24 * 3600
+
+
+def parse_version_pins(pins: str) -> Dict[str, int]:
+    """Parse "name:version" pairs separated by commas."""
+    result = {}
+    for pin in filter(None, (p.strip() for p in pins.split(","))):
+        name, version = pin.split(":", 1)
+        result[name.strip()] = int(version)
+    return result
 
 
 class PromptManager:
@@ -40,41 +57,162 @@ class PromptManager:
             and settings.LANGFUSE_SECRET_KEY
         )
         self.prompts = DEFAULT_PROMPTS
+        self.version_pins = parse_version_pins(settings.PROMPT_VERSIONS)
+
+        # Langfuse prompts are served from this cache and refreshed in the
+        # background once stale, so lookups never wait on the network. Entries
+        # are {"prompt", "version", "fetched_at"} and shared by all workers, so
+        # a prompt is fetched once per refresh interval for the deployment
+        self._cache = TwoTierCache("prompt", PROMPT_ENTRY_TTL, max_size=256)
+        self._next_refresh: Dict[str, float] = {}
+        self._refreshing: Set[str] = set()
+        self._lock = threading.Lock()
+        self._listeners: List[Callable[[str, Optional[int]], None]] = []
+        self._executor = ThreadPoolExecutor(
+            max_workers=2, thread_name_prefix="prompt-refresh"
+        )
+
+        # A new version seen by one worker makes the others refetch right away
+        cache_bus.subscribe("prompt", self._on_remote_change)
+
+    @property
+    def _lf_client(self):
+        # Share the tracing client so Langfuse is only initialized once
+        return langfuse_tracing.client
+
+    def subscribe(self, listener: Callable[[str, Optional[int]], None]):
+        """Register a callback invoked with (name, version) when a prompt changes."""
+        self._listeners.append(listener)
 
-        if self.use_langfuse:
+    def _notify(self, name: str, version: Optional[int]):
+        for listener in self._listeners:
             try:
-                self._lf_client = Langfuse(
-                    host=settings.LANGFUSE_HOST,
-                    public_key=settings.LANGFUSE_PUBLIC_KEY,
-                    secret_key=settings.LANGFUSE_SECRET_KEY,
-                )
+                listener(name, version)
             except Exception as e:
-                logger.error(f"Error loading prompts from Langfuse: {e}")
-                self._lf_client = None
-                self.use_langfuse = False
+                logger.error(f"Prompt change listener failed for {name}: {e}")
 
-    def get_prompt(self, name: str, variables: Optional[dict] = None) -> str:
+    def _fetch(self, name: str) -> Optional[Dict[str, Any]]:
+        pinned_version = self.version_pins.get(name)
+        try:
+            prompt = self._lf_client.get_prompt(
+                f"llmops/{name}",
+                version=pinned_version,
+                label=None if pinned_version else settings.PROMPT_LABEL,
+                cache_ttl_seconds=0,
+            )
+        except Exception as e:
+            logger.error(f"Error getting prompt from Langfuse: {e}")
+            return None
+        return {
+            "prompt": prompt.prompt,
+            "version": prompt.version,
+            "fetched_at": time.time(),
+        }
+
+    def _refresh(self, name: str):
+        previous = self._cache.local.get(name)
+        # Another worker may have fetched the prompt recently
+        entry = self._cache.get_shared(name) or previous
+        fetched = False
+        if (
+            entry is None
+            or time.time() - entry["fetched_at"] >= settings.PROMPT_CACHE_TTL_SECONDS
+        ):
+            prompt = self._fetch(name)
+            if prompt is not None:
+                entry, fetched = prompt, True
+                self._cache.set(name, entry)
+
+        with self._lock:
+            self._refreshing.discard(name)
+            self._next_refresh[name] = (
+                time.monotonic() + settings.PROMPT_CACHE_TTL_SECONDS
+            )
+
+        if entry is not None and (
+            previous is None
+            or previous["version"] != entry["version"]
+            or previous["prompt"] != entry["prompt"]
+        ):
+            logger.info(f"Loaded prompt {name} version {entry['version']}")
+            self._notify(name, entry["version"])
+            if fetched and previous is not None:
+                cache_bus.publish("prompt", name)
+        return entry
+
+    def _on_remote_change(self, name: Optional[str]):
+        if not self.use_langfuse:
+            return
+        with self._lock:
+            for key in [name] if name else list(self._next_refresh):
+                self._next_refresh[key] = 0
+        for key in [name] if name else list(self.prompts):
+            self._schedule_refresh(key)
+
+    def _schedule_refresh(self, name: str):
+        with self._lock:
+            if name in self._refreshing or time.monotonic() < self._next_refresh.get(
+                name, 0
+            ):
+                return
+            self._refreshing.add(name)
+        self._executor.submit(self._refresh, name)
+
+    async def warm_up(self):
+        """Fetch every known prompt so the first requests hit a warm cache."""
+        if self.use_langfuse and self._lf_client is None:
+            logger.error("Langfuse client unavailable, using local prompts")
+            self.use_langfuse = False
         if self.use_langfuse and self._lf_client:
-            try:
-                prompt_key = f"llmops/{name}"
-                prompt = self._lf_client.get_prompt(prompt_key)
-                if variables:
-                    compiled_prompt = prompt.compile(**variables)
-                    return compiled_prompt
-                return prompt.compile()
-            except Exception as e:
-                logger.error(f"Error getting prompt from Langfuse: {e}")
-                pass
+            await asyncio.gather(
+                *(asyncio.to_thread(self._refresh, name) for name in self.prompts)
+            )
+
+    def get_prompt_with_version(
+        self, name: str, variables: Optional[dict] = None
+    ) -> Tuple[str, Optional[int]]:
+        """Return the compiled prompt and its Langfuse version (None if local)."""
+        if self.use_langfuse and self._lf_client:
+            # Stale-while-revalidate: serve the cached prompt, refresh behind it
+            self._schedule_refresh(name)
+            entry = self._cache.get(name)
+            if entry is not None:
+                # Loaded with the client, so this import is already done
+                from langfuse.model import TemplateParser
+
+                return (
+                    TemplateParser.compile_template(entry["prompt"], variables or {}),
+                    entry["version"],
+                )
 
         tmpl = self.prompts.get(name)
         if tmpl is None:
             raise KeyError(f"Prompt {name} not found")
         if variables:
-            return tmpl.format(**variables)
-        return tmpl
+            return tmpl.format(**variables), None
+        return tmpl, None
+
+    def get_prompt(self, name: str, variables: Optional[dict] = None) -> str:
+        return self.get_prompt_with_version(name, variables)[0]
+
+    async def aget_prompt_with_version(
+        self, name: str, variables: Optional[dict] = None
+    ) -> Tuple[str, Optional[int]]:
+        if self.use_langfuse and self._lf_client and name not in self._next_refresh:
+            # Never fetched: load once off the event loop instead of serving defaults
+            await asyncio.to_thread(self._refresh, name)
+        return self.get_prompt_with_version(name, variables)
+
+    async def aget_prompt(self, name: str, variables: Optional[dict] = None) -> str:
+        return (await self.aget_prompt_with_version(name, variables))[0]
+
+    def get_prompt_version(self, name: str) -> Optional[int]:
+        entry = self._cache.local.get(name)
+        return entry["version"] if entry is not None else None
 
     def set_prompt(self, prompt_name: str, prompt: str):
         self.prompts[prompt_name] = prompt
+        self._notify(prompt_name, None)
 
 
 prompt_manager = PromptManager()
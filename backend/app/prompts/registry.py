@@ -0,0 +1,76 @@
+import threading
+from typing import Dict, Optional, Tuple
+
+from app.core.metrics import record_cache
+from app.prompts.manager import PromptManager, prompt_manager
+from langchain_core.prompts import (
+    BasePromptTemplate,
+    ChatPromptTemplate,
+    MessagesPlaceholder,
+    PromptTemplate,
+)
+
+# (kind, prompt name, prompt version, variables signature)
+TemplateKey = Tuple[str, str, Optional[int], Tuple]
+
+
+def variables_signature(variables: Optional[dict]) -> Tuple:
+    return tuple(sorted((variables or {}).items()))
+
+
+class PromptTemplateRegistry:
+    """Compiled LangChain templates keyed by prompt name, version and variables.
+
+    Templates are parsed once per prompt version and dropped as soon as the
+    prompt manager reports a change. Each template carries its prompt name and
+    version in `metadata`.
+    """
+
+    def __init__(self, manager: PromptManager):
+        self.manager = manager
+        self._templates: Dict[TemplateKey, BasePromptTemplate] = {}
+        self._lock = threading.Lock()
+        manager.subscribe(self.invalidate)
+
+    def invalidate(self, name: str, version: Optional[int] = None):
+        with self._lock:
+            for key in [key for key in self._templates if key[1] == name]:
+                del self._templates[key]
+
+    async def _get(self, kind: str, name: str, variables: Optional[dict], build):
+        text, version = await self.manager.aget_prompt_with_version(name, variables)
+        key = (kind, name, version, variables_signature(variables))
+        with self._lock:
+            template = self._templates.get(key)
+        record_cache("prompt_template", hit=template is not None)
+        if template is None:
+            template = build(text)
+            template.metadata = {"prompt_name": name, "prompt_version": version}
+            with self._lock:
+                self._templates[key] = template
+        return template
+
+    async def get_chat_prompt(
+        self, name: str, variables: Optional[dict] = None
+    ) -> ChatPromptTemplate:
+        """System prompt followed by the chat history and the user input."""
+        return await self._get(
+            "chat",
+            name,
+            variables,
+            lambda text: ChatPromptTemplate.from_messages(
+                [
+                    ("system", text),
+                    MessagesPlaceholder("chat_history"),
+                    ("human", "{input}"),
+                ]
+            ),
+        )
+
+    async def get_prompt_template(
+        self, name: str, variables: Optional[dict] = None
+    ) -> PromptTemplate:
+        return await self._get("text", name, variables, PromptTemplate.from_template)
+
+
+prompt_registry = PromptTemplateRegistry(prompt_manager)
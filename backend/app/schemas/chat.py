@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 from pydantic import BaseModel
 
 
@@ -15,6 +15,8 @@ class MessageCreate(MessageBase):
 class MessageResponse(MessageBase):
     id: int
     chat_id: int
+    prompt_versions: Optional[Dict[str, Optional[int]]] = None
+    timings: Optional[Dict[str, Any]] = None
     created_at: datetime
     updated_at: datetime
 
@@ -1,6 +1,7 @@
 from datetime import datetime
-from typing import List, Optional
+from typing import List, Literal, Optional
 
+from app.core.config import settings
 from app.schemas.task import ProcessingTask
 from pydantic import BaseModel, Field
 
@@ -8,6 +9,8 @@ from pydantic import BaseModel, Field
 class KnowledgeBaseBase(BaseModel):
     name: str
     description: Optional[str] = None
+    dense_weight: Optional[float] = Field(default=None, ge=0, le=1)
+    sparse_weight: Optional[float] = Field(default=None, ge=0, le=1)
 
 
 class KnowledgeBaseCreate(KnowledgeBaseBase):
@@ -22,6 +25,21 @@ class DocumentBase(BaseModel):
     content_type: str
 
 
+class BulkDocumentRequest(BaseModel):
+    documents: List[DocumentBase] = Field(max_length=1000)
+
+
+class DocumentRegistration(BaseModel):
+    file_name: str
+    document_id: Optional[int] = None
+    file_hash: Optional[str] = None
+    status: Literal["exists", "created", "missing"]
+
+
+class BulkDocumentResponse(BaseModel):
+    documents: List[DocumentRegistration]
+
+
 class DocumentResponse(DocumentBase):
     id: int
     knowledge_base_id: int
@@ -46,8 +64,8 @@ class KnowledgeBaseResponse(KnowledgeBaseBase):
 
 class PreviewRequest(BaseModel):
     document_ids: List[int]
-    chunk_size: int = 1000
-    chunk_overlap: int = 200
+    chunk_size: int = settings.CHUNK_SIZE
+    chunk_overlap: int = settings.CHUNK_OVERLAP
 
 
 class TextChunk(BaseModel):
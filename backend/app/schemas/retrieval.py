@@ -1,7 +1,26 @@
+from datetime import datetime
+from typing import List, Optional
+
 from pydantic import BaseModel
 
 
+class RetrievalFilter(BaseModel):
+    document_ids: Optional[List[int]] = None
+    sources: Optional[List[str]] = None
+    file_types: Optional[List[str]] = None
+    created_after: Optional[datetime] = None
+    created_before: Optional[datetime] = None
+
+
 class TestRetrievalRequest(BaseModel):
     query: str
     kb_id: int
     top_k: int
+    filters: Optional[RetrievalFilter] = None
+
+
+class BatchRetrievalQuery(BaseModel):
+    query: str
+    id: Optional[str] = None
+    gold_chunk_ids: Optional[List[str]] = None
+    filters: Optional[RetrievalFilter] = None
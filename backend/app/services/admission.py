@@ -0,0 +1,191 @@
+import asyncio
+import math
+import time
+from collections import defaultdict, deque
+from typing import Deque, Dict, Optional
+
+from app.core.config import settings
+from app.core.logger import logger
+from app.core.metrics import ADMISSION_LIMIT, ADMISSION_REJECTIONS, ADMISSION_WAIT
+
+
+class AdmissionRejected(Exception):
+    """The request was shed; answer with `status_code` and Retry-After."""
+
+    def __init__(self, status_code: int, reason: str, retry_after: int):
+        super().__init__(reason)
+        self.status_code = status_code
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionTicket:
+    """A granted slot; report the upstream outcome, then release it once."""
+
+    def __init__(self, controller: "AdmissionController", user_id: int):
+        self.controller = controller
+        self.user_id = user_id
+        self.admitted_at = time.monotonic()
+        self.latency: Optional[float] = None
+        self.rate_limited = False
+        self.released = False
+
+    def observe(self, latency: Optional[float], rate_limited: bool = False):
+        self.latency = latency
+        self.rate_limited = rate_limited
+
+    def release(self):
+        if not self.released:
+            self.released = True
+            self.controller.release(self)
+
+
+class AdmissionController:
+    """Per-user and adaptive global concurrency limits for chat streams.
+
+    The global limit follows AIMD: every answer whose time to first token stays
+    under the latency target grows it by 1/limit (about one slot per limit's
+    worth of requests), while a slow answer or an upstream 429 cuts it by the
+    backoff factor, at most once per average request duration. Requests over
+    the limit wait in a short FIFO queue; when the queue is full or the wait
+    exceeds its deadline they are rejected with 503, and users over their own
+    limit get 429, both with a Retry-After estimated from recent durations.
+    Limits are per worker process.
+    """
+
+    def __init__(
+        self,
+        enabled: bool,
+        initial_limit: int,
+        min_limit: int,
+        max_limit: int,
+        per_user_limit: int,
+        max_queue: int,
+        queue_timeout: float,
+        latency_target: float,
+        backoff: float,
+    ):
+        self.enabled = enabled
+        self.limit = float(initial_limit)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.per_user_limit = per_user_limit
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.latency_target = latency_target
+        self.backoff = backoff
+
+        self.inflight = 0
+        self._per_user: Dict[int, int] = defaultdict(int)
+        self._waiters: Deque[asyncio.Future] = deque()
+        # Smoothed duration of admitted requests, seeded with the target
+        self._duration = latency_target
+        self._last_decrease = 0.0
+        ADMISSION_LIMIT.set(self.limit)
+
+    async def acquire(self, user_id: int) -> AdmissionTicket:
+        if not self.enabled:
+            return AdmissionTicket(self, user_id)
+        if self._per_user[user_id] >= self.per_user_limit:
+            raise self._reject(429, "per_user")
+
+        self._per_user[user_id] += 1
+        try:
+            if self.inflight < int(self.limit) and not self._waiters:
+                self.inflight += 1
+            else:
+                await self._wait()
+        except BaseException:
+            self._release_user(user_id)
+            raise
+        return AdmissionTicket(self, user_id)
+
+    async def _wait(self):
+        if len(self._waiters) >= self.max_queue:
+            raise self._reject(503, "queue_full")
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        started = time.monotonic()
+        try:
+            await asyncio.wait_for(waiter, self.queue_timeout)
+        except asyncio.TimeoutError:
+            raise self._reject(503, "queue_timeout")
+        except asyncio.CancelledError:
+            # The slot may have been handed over just before the cancellation
+            if waiter.done() and not waiter.cancelled():
+                self.inflight -= 1
+                self._wake()
+            raise
+        finally:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+            ADMISSION_WAIT.observe(time.monotonic() - started)
+
+    def release(self, ticket: AdmissionTicket):
+        if not self.enabled:
+            return
+        self.inflight -= 1
+        self._release_user(ticket.user_id)
+        duration = time.monotonic() - ticket.admitted_at
+        self._duration = 0.9 * self._duration + 0.1 * duration
+        self._adjust(ticket.latency, ticket.rate_limited)
+        self._wake()
+
+    def retry_after(self) -> int:
+        """Seconds until a slot is likely to free up."""
+        rounds = (len(self._waiters) + 1) / max(self.limit, 1.0)
+        return max(1, min(60, math.ceil(self._duration * rounds)))
+
+    def _adjust(self, latency: Optional[float], rate_limited: bool):
+        now = time.monotonic()
+        if rate_limited or (latency is not None and latency > self.latency_target):
+            if now - self._last_decrease >= self._duration:
+                self.limit = max(self.min_limit, self.limit * self.backoff)
+                self._last_decrease = now
+                logger.warning(
+                    f"Chat admission limit lowered to {self.limit:.1f} "
+                    f"({'rate limited' if rate_limited else f'ttft {latency:.2f}s'})"
+                )
+        elif latency is not None:
+            self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+        ADMISSION_LIMIT.set(self.limit)
+
+    def _wake(self):
+        while self._waiters and self.inflight < int(self.limit):
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self.inflight += 1
+                waiter.set_result(None)
+
+    def _release_user(self, user_id: int):
+        self._per_user[user_id] -= 1
+        if self._per_user[user_id] <= 0:
+            del self._per_user[user_id]
+
+    def _reject(self, status_code: int, reason: str) -> AdmissionRejected:
+        ADMISSION_REJECTIONS.labels(reason=reason).inc()
+        return AdmissionRejected(status_code, reason, self.retry_after())
+
+
+def is_rate_limited(error: BaseException) -> bool:
+    """Whether an upstream call failed with HTTP 429, looking through causes."""
+    seen = set()
+    while error is not None and id(error) not in seen:
+        if getattr(error, "status_code", None) == 429:
+            return True
+        seen.add(id(error))
+        error = error.__cause__ or error.__context__
+    return False
+
+
+chat_admission = AdmissionController(
+    enabled=settings.ADMISSION_CONTROL_ENABLED,
+    initial_limit=settings.ADMISSION_INITIAL_LIMIT,
+    min_limit=settings.ADMISSION_MIN_LIMIT,
+    max_limit=settings.ADMISSION_MAX_LIMIT,
+    per_user_limit=settings.ADMISSION_PER_USER_LIMIT,
+    max_queue=settings.ADMISSION_MAX_QUEUE,
+    queue_timeout=settings.ADMISSION_QUEUE_TIMEOUT,
+    latency_target=settings.ADMISSION_LATENCY_TARGET_MS / 1000,
+    backoff=settings.ADMISSION_BACKOFF,
+)
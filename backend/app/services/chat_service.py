@@ -1,29 +1,31 @@
 import base64
 import json
 import traceback
+from typing import Any, AsyncIterator, Optional, Tuple
 
 from app.core.config import settings
 from app.core.logger import logger
+from app.core.metrics import INFLIGHT_STREAMS, StageMetricsHandler, record_cache
 from app.crud.document import get_documents_by_knowledge_base_id
 from app.crud.knowledge import get_knowledge_base_by_ids
-from app.models.chat import Message
-from app.prompts.manager import prompt_manager
+from app.prompts.registry import prompt_registry
+from app.schemas.retrieval import RetrievalFilter
+from app.services.admission import AdmissionTicket, is_rate_limited
+from app.services.coalescing import StreamCoalescer
+from app.services.context_packer import pack_documents
 from app.services.embeddings.embedding_factory import EmbeddingFactory
-from app.services.langfuse_tracing import langfuse_handler
-from app.services.llm.factory import LLMFactory
+from app.services.langfuse_tracing import langfuse_tracing
+from app.services.llm.router import model_router
+from app.services.message_writer import MessageWriter
+from app.services.reranker.factory import RerankerFactory
+from app.services.streaming import StreamPart
 from app.services.vector_store.factory import VectorStoreFactory
-from langchain.chains.combine_documents import create_stuff_documents_chain
-from langchain.chains.history_aware_retriever import create_history_aware_retriever
-from langchain.chains.retrieval import create_retrieval_chain
 from langchain_core.messages import AIMessage, HumanMessage
-from langchain_core.prompts import (
-    ChatPromptTemplate,
-    MessagesPlaceholder,
-    PromptTemplate,
-)
-from nemoguardrails.integrations.langchain.runnable_rails import RunnableRails
+from langchain_core.runnables import Runnable, RunnableLambda
 from sqlalchemy.ext.asyncio import AsyncSession
 
+chat_coalescer = StreamCoalescer()
+
 
 async def generate_response(
     user_id: int,
@@ -32,29 +34,25 @@ async def generate_response(
     knowledge_base_ids: list[int],
     chat_id: int,
     db: AsyncSession,
-    rails_service: RunnableRails,
-):
+    rails_service: Runnable,
+    retrieval_filter: Optional[RetrievalFilter] = None,
+    include_timings: bool = False,
+    admission: Optional[AdmissionTicket] = None,
+) -> AsyncIterator[StreamPart]:
+    # langchain is only imported here, off the startup path; the models warm-up
+    # hook loads these modules before the first request
+    from langchain.chains.combine_documents import create_stuff_documents_chain
+    from langchain.chains.history_aware_retriever import (
+        create_history_aware_retriever,
+    )
+    from langchain.chains.retrieval import create_retrieval_chain
+    from langchain.retrievers import ContextualCompressionRetriever
+
+    stage_metrics = StageMetricsHandler()
+    INFLIGHT_STREAMS.inc()
+    # Store the user message and the bot message placeholder in the background
+    writer = MessageWriter(chat_id, query)
     try:
-        # create user message
-        user_message = Message(
-            role="user",
-            content=query,
-            chat_id=chat_id,
-        )
-        db.add(user_message)
-        await db.commit()
-        await db.refresh(user_message)
-
-        # create bot message placeholder
-        bot_message = Message(
-            role="assistant",
-            content="",
-            chat_id=chat_id,
-        )
-        db.add(bot_message)
-        await db.commit()
-        await db.refresh(bot_message)
-
         # get knowledge bases and their documents
         knowledge_bases = await get_knowledge_base_by_ids(db, knowledge_base_ids)
 
@@ -69,6 +67,8 @@ async def generate_response(
                     store_type=settings.VECTOR_STORE_PROVIDER,
                     collection_name=f"knowledge_base_{kb.id}",
                     embedding_function=embeddings,
+                    dense_weight=kb.dense_weight,
+                    sparse_weight=kb.sparse_weight,
                 )
                 vector_stores.append(vector_store)
                 # logger.info(
@@ -76,60 +76,58 @@ async def generate_response(
                 # )
         if not vector_stores:
             error_message = "No documents found for the provided knowledge bases"
-            yield error_message
-            bot_message.content = error_message
-            await db.commit()
+            yield StreamPart("text", error_message)
+            await writer.finish(error_message)
             return
 
         # TODO: Use multiple retrievers
-        retriever = vector_stores[0].as_retriever()
-
-        # initialize LLM model
-        llm = LLMFactory.create()
+        search_kwargs = vector_stores[0].build_filter(retrieval_filter)
+        reranker = RerankerFactory.create()
+        if reranker:
+            # Over-fetch candidates and let the cross-encoder pick the top-k
+            retriever = ContextualCompressionRetriever(
+                base_compressor=reranker,
+                base_retriever=vector_stores[0].as_retriever(
+                    search_kwargs={**search_kwargs, "k": settings.RERANK_CANDIDATES}
+                ),
+            )
+        else:
+            retriever = vector_stores[0].as_retriever(search_kwargs=search_kwargs)
 
         # Create contextualize question prompt
-        contextualize_q_system_prompt = prompt_manager.get_prompt(
+        contextualize_q_prompt = await prompt_registry.get_chat_prompt(
             "contextualize_q_system"
         )
-        contextualize_q_prompt = ChatPromptTemplate.from_messages(
-            [
-                ("system", contextualize_q_system_prompt),
-                MessagesPlaceholder("chat_history"),
-                ("human", "{input}"),
-            ]
-        )
 
         # Create history aware retriever
         history_aware_retriever = create_history_aware_retriever(
-            llm, retriever, contextualize_q_prompt
+            model_router.llm_for("query_rewrite"), retriever, contextualize_q_prompt
         )
 
         # Create QA prompt
-        qa_system_prompt = prompt_manager.get_prompt("qa_system")
-        qa_prompt = ChatPromptTemplate.from_messages(
-            [
-                ("system", qa_system_prompt),
-                MessagesPlaceholder("chat_history"),
-                ("human", "{input}"),
-            ]
-        )
-
-        # Create Document stuff chain
-        document_prompt = PromptTemplate.from_template(
-            prompt_manager.get_prompt("document_prompt")
-        )
-        question_answer_chain = create_stuff_documents_chain(
-            llm,
-            qa_prompt,
-            document_variable_name="context",
-            document_prompt=document_prompt,
+        qa_prompt = await prompt_registry.get_chat_prompt("qa_system")
+
+        document_prompt = await prompt_registry.get_prompt_template("document_prompt")
+        # Create Document stuff chain on the model routed for the question
+        question_answer_chain = model_router.answer_chain(
+            lambda llm: create_stuff_documents_chain(
+                llm,
+                qa_prompt,
+                document_variable_name="context",
+                document_prompt=document_prompt,
+            )
         )
 
-        # Create retrieval chain
+        # Create retrieval chain, packing retrieved chunks into the token budget
         rag_chain = create_retrieval_chain(
-            history_aware_retriever, question_answer_chain
+            history_aware_retriever | RunnableLambda(pack_documents),
+            question_answer_chain,
         )
         rag_chain_with_rails = rails_service | rag_chain
+        prompt_versions = {
+            prompt.metadata["prompt_name"]: prompt.metadata["prompt_version"]
+            for prompt in (contextualize_q_prompt, qa_prompt, document_prompt)
+        }
 
         # Generate response
         chat_history = []
@@ -140,39 +138,100 @@ async def generate_response(
                 message["content"] = message["content"].split("__LLM_RESPONSE__")[-1]
                 chat_history.append({"type": "ai", "content": message["content"]})
 
+        def answer_stream():
+            return _stream_answer(
+                rag_chain_with_rails,
+                {"input": query, "chat_history": chat_history},
+                stage_metrics,
+                user_id,
+            )
+
+        stage_metrics.mark_chain_start()
+        coalesced = False
+        if settings.CHAT_COALESCING_ENABLED and len(messages["messages"]) == 1:
+            # First turns have no history, so identical questions against the
+            # same knowledge bases and prompts share a single generation
+            key = (
+                tuple(sorted(knowledge_base_ids)),
+                " ".join(query.casefold().split()),
+                tuple(sorted(prompt_versions.items())),
+                retrieval_filter.model_dump_json() if retrieval_filter else None,
+            )
+            events, leader = chat_coalescer.subscribe(key, answer_stream)
+            coalesced = not leader
+            record_cache("chat_coalescing", hit=coalesced)
+        else:
+            events = answer_stream()
+
         response = ""
-        async for chunk in rag_chain_with_rails.astream(
-            {"input": query, "chat_history": chat_history},
-            config={
-                "callbacks": [langfuse_handler],
-                "metadata": {"langfuse_user_id": user_id},
-            },
-        ):
-            if "context" in chunk:
-                serializable_context = []
-                for context in chunk["context"]:
-                    serializable_context.append(
-                        {
-                            "page_content": context.page_content.replace('"', '\\"'),
-                            "metadata": context.metadata,
-                        }
-                    )
-                escaped_context = json.dumps({"context": serializable_context})
-                base64_context = base64.b64encode(escaped_context.encode()).decode()
+        timings = {}
+        writer.start_checkpoints()
+        async for kind, value in events:
+            if kind == "context":
                 separator = "__LLM_RESPONSE__"
-                yield f'0:"{base64_context}{separator}"\n'
-                response += base64_context + separator
-
-            if "answer" in chunk and chunk["answer"] is not None:
-                response += chunk["answer"]
-                escape_chunk = chunk["answer"].replace('"', '\\"').replace("\n", "\\n")
-                yield f'0:"{escape_chunk}"\n'
-        bot_message.content = response
-        await db.commit()
+                yield StreamPart("text", value + separator)
+                response += value + separator
+                writer.content = response
+            elif kind == "answer":
+                stage_metrics.mark_first_token()
+                response += value
+                writer.content = response
+                yield StreamPart("text", value)
+            elif kind == "timings":
+                # Followers report the stage breakdown of the shared generation
+                timings = {**value, "coalesced": True} if coalesced else value
+        if include_timings:
+            yield StreamPart("data", [{"type": "timings", **timings}])
+        if admission is not None:
+            admission.observe(_time_to_first_token(stage_metrics))
+        await writer.finish(response, prompt_versions=prompt_versions, timings=timings)
     except Exception as e:
+        if admission is not None:
+            admission.observe(_time_to_first_token(stage_metrics), is_rate_limited(e))
         traceback.print_exc()
         error_message = f"Error generating response: {str(e)}"
         logger.error(error_message)
-        yield f"3:{error_message}\n"
-        bot_message.content = error_message
-        await db.commit()
+        yield StreamPart("error", error_message)
+        await writer.finish(error_message, timings=stage_metrics.summary())
+    finally:
+        # Keeps whatever was streamed if the client went away mid-answer
+        writer.close()
+        INFLIGHT_STREAMS.dec()
+
+
+def _time_to_first_token(stage_metrics: StageMetricsHandler) -> Optional[float]:
+    if stage_metrics.first_token_at is None:
+        return None
+    return stage_metrics.first_token_at - stage_metrics.started_at
+
+
+async def _stream_answer(
+    rag_chain: Runnable,
+    inputs: dict,
+    stage_metrics: StageMetricsHandler,
+    user_id: int,
+) -> AsyncIterator[Tuple[str, Any]]:
+    """Run the RAG chain, yielding ("context" | "answer" | "timings", value)."""
+    async for chunk in rag_chain.astream(
+        inputs,
+        config={
+            "callbacks": langfuse_tracing.callbacks() + [stage_metrics],
+            "metadata": {"langfuse_user_id": user_id},
+        },
+    ):
+        if "context" in chunk:
+            serializable_context = []
+            for context in chunk["context"]:
+                serializable_context.append(
+                    {
+                        "page_content": context.page_content,
+                        "metadata": context.metadata,
+                    }
+                )
+            escaped_context = json.dumps({"context": serializable_context})
+            yield "context", base64.b64encode(escaped_context.encode()).decode()
+
+        if "answer" in chunk and chunk["answer"] is not None:
+            yield "answer", chunk["answer"]
+    stage_metrics.finish()
+    yield "timings", stage_metrics.summary()
@@ -0,0 +1,120 @@
+import io
+import json
+from typing import List, Optional
+
+import numpy as np
+from langchain_core.documents import Document
+
+# Chunk batches with precomputed embeddings, one row per chunk: "text", the
+# "embedding" vector and optionally "metadata" (a JSON object per chunk) and
+# "chunk_index" (the chunk's position in its document)
+ARROW_STREAM = "application/vnd.apache.arrow.stream"
+# The same columns as arrays of a .npz archive; text and metadata as unicode
+# arrays since pickled objects are refused
+NUMPY_ARCHIVE = "application/x-npz"
+CHUNK_BATCH_TYPES = (ARROW_STREAM, NUMPY_ARCHIVE)
+
+
+class ChunkBatch:
+    def __init__(
+        self,
+        texts: List[str],
+        embeddings: np.ndarray,
+        metadatas: Optional[List[str]] = None,
+        chunk_indexes: Optional[List[int]] = None,
+    ):
+        if embeddings.ndim != 2 or len(embeddings) != len(texts):
+            raise ValueError("Expected one embedding vector per chunk")
+        if not np.isfinite(embeddings).all():
+            raise ValueError("Embeddings contain NaN or infinite values")
+        for column in (metadatas, chunk_indexes):
+            if column is not None and len(column) != len(texts):
+                raise ValueError("All columns must have one value per chunk")
+        if chunk_indexes is not None and None in chunk_indexes:
+            raise ValueError("Every chunk needs a chunk_index")
+        self.texts = texts
+        self.embeddings = embeddings.astype(np.float32, copy=False)
+        self.metadatas = metadatas
+        self.chunk_indexes = chunk_indexes
+
+    @property
+    def dimension(self) -> int:
+        return self.embeddings.shape[1]
+
+    def documents(self) -> List[Document]:
+        metadatas = self.metadatas or [None] * len(self.texts)
+        documents = []
+        for text, metadata in zip(self.texts, metadatas):
+            metadata = json.loads(metadata) if metadata else {}
+            if not isinstance(metadata, dict):
+                raise ValueError("Chunk metadata must be a JSON object")
+            documents.append(Document(page_content=text, metadata=metadata))
+        return documents
+
+
+def _read_arrow(body: bytes) -> ChunkBatch:
+    import pyarrow as pa
+
+    table = pa.ipc.open_stream(body).read_all()
+    missing = {"text", "embedding"} - set(table.column_names)
+    if missing:
+        raise ValueError(f"Missing columns: {', '.join(sorted(missing))}")
+
+    # Flatten the list column into a matrix without going through Python lists
+    embedding = table.column("embedding").combine_chunks()
+    if isinstance(embedding, pa.FixedSizeListArray):
+        dimension = embedding.type.list_size
+    elif isinstance(embedding, (pa.ListArray, pa.LargeListArray)):
+        lengths = set(embedding.value_lengths().to_pylist())
+        if len(lengths) > 1:
+            raise ValueError("Embeddings have different dimensions")
+        dimension = lengths.pop() if lengths else 0
+    else:
+        raise ValueError("The embedding column must be a list of floats")
+    if embedding.null_count:
+        raise ValueError("Every chunk needs an embedding")
+    values = embedding.flatten().to_numpy(zero_copy_only=False)
+    embeddings = values.reshape(len(embedding), dimension)
+
+    def optional(name: str) -> Optional[list]:
+        if name not in table.column_names:
+            return None
+        return table.column(name).to_pylist()
+
+    return ChunkBatch(
+        table.column("text").to_pylist(),
+        embeddings,
+        metadatas=optional("metadata"),
+        chunk_indexes=optional("chunk_index"),
+    )
+
+
+def _read_numpy(body: bytes) -> ChunkBatch:
+    with np.load(io.BytesIO(body), allow_pickle=False) as archive:
+        missing = {"text", "embedding"} - set(archive.files)
+        if missing:
+            raise ValueError(f"Missing arrays: {', '.join(sorted(missing))}")
+
+        def optional(name: str) -> Optional[list]:
+            return archive[name].tolist() if name in archive.files else None
+
+        return ChunkBatch(
+            archive["text"].tolist(),
+            archive["embedding"],
+            metadatas=optional("metadata"),
+            chunk_indexes=optional("chunk_index"),
+        )
+
+
+def read_chunk_batch(body: bytes, content_type: str) -> ChunkBatch:
+    """Decode a chunk batch, raising ValueError if it is malformed."""
+    try:
+        if content_type == ARROW_STREAM:
+            return _read_arrow(body)
+        if content_type == NUMPY_ARCHIVE:
+            return _read_numpy(body)
+    except ValueError:
+        raise
+    except Exception as e:
+        raise ValueError(f"Unreadable chunk batch: {e}") from e
+    raise ValueError(f"Unsupported content type: {content_type}")
@@ -0,0 +1,80 @@
+import asyncio
+from typing import Any, AsyncIterator, Callable, Dict, Hashable, List, Optional, Tuple
+
+from app.core.logger import logger
+
+
+class _Flight:
+    def __init__(self):
+        self.events: List[Any] = []
+        self.done = False
+        self.error: Optional[BaseException] = None
+        self.subscribers = 0
+        self.changed = asyncio.Condition()
+        self.task: Optional[asyncio.Task] = None
+
+
+class StreamCoalescer:
+    """Share one in-flight async stream among identical concurrent requests.
+
+    The first request for a key (the leader) starts the stream in a background
+    task; requests arriving while it runs subscribe to it and replay every event
+    from the start, so all of them see the same sequence. The stream is
+    cancelled when its last subscriber goes away, and finished streams are
+    forgotten immediately, so nothing is cached beyond the lifetime of a flight.
+    """
+
+    def __init__(self):
+        self._flights: Dict[Hashable, _Flight] = {}
+
+    def subscribe(
+        self, key: Hashable, start: Callable[[], AsyncIterator[Any]]
+    ) -> Tuple[AsyncIterator[Any], bool]:
+        """Events of the flight for `key` and whether this caller started it."""
+        flight = self._flights.get(key)
+        leader = flight is None
+        if leader:
+            flight = _Flight()
+            self._flights[key] = flight
+            flight.task = asyncio.create_task(self._run(key, flight, start()))
+        flight.subscribers += 1
+        return self._follow(flight), leader
+
+    def inflight(self) -> int:
+        return len(self._flights)
+
+    async def _run(self, key: Hashable, flight: _Flight, stream: AsyncIterator[Any]):
+        try:
+            async for event in stream:
+                async with flight.changed:
+                    flight.events.append(event)
+                    flight.changed.notify_all()
+        except Exception as e:
+            flight.error = e
+        finally:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+            async with flight.changed:
+                flight.done = True
+                flight.changed.notify_all()
+
+    async def _follow(self, flight: _Flight) -> AsyncIterator[Any]:
+        position = 0
+        try:
+            while True:
+                async with flight.changed:
+                    await flight.changed.wait_for(
+                        lambda: flight.done or position < len(flight.events)
+                    )
+                while position < len(flight.events):
+                    yield flight.events[position]
+                    position += 1
+                if flight.done and position == len(flight.events):
+                    break
+            if flight.error is not None:
+                raise flight.error
+        finally:
+            flight.subscribers -= 1
+            if flight.subscribers == 0 and not flight.done:
+                logger.info("All subscribers left, cancelling coalesced stream")
+                flight.task.cancel()
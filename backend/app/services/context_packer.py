@@ -0,0 +1,117 @@
+from typing import List, Optional, Sequence, Tuple
+
+from app.core.config import settings
+from app.core.logger import logger
+from app.services.tokens import count_tokens, document_tokens
+from langchain_core.documents import Document
+
+
+def _strip_overlap(previous: str, current: str) -> str:
+    """Drop the prefix of `current` that repeats the tail of `previous`."""
+    max_overlap = min(len(previous), len(current), settings.CHUNK_OVERLAP * 2)
+    for size in range(max_overlap, 0, -1):
+        if previous.endswith(current[:size]):
+            return current[size:]
+    return current
+
+
+def _document_key(document: Document) -> Optional[Tuple[str, object]]:
+    """What identifies the chunk's document; older chunks only carry a source."""
+    for field in ("document_id", "source"):
+        value = document.metadata.get(field)
+        if value is not None:
+            return field, value
+    return None
+
+
+def _chunk_index(document: Document) -> int:
+    chunk_index = document.metadata.get("chunk_index")
+    return -1 if chunk_index is None else chunk_index
+
+
+def _is_next_chunk(previous: Document, current: Document) -> bool:
+    previous_index = previous.metadata.get("chunk_index")
+    current_index = current.metadata.get("chunk_index")
+    if previous_index is None or current_index is None:
+        return False
+    document_key = _document_key(previous)
+    return (
+        document_key is not None
+        and document_key == _document_key(current)
+        and previous_index + 1 == current_index
+    )
+
+
+def _merge_adjacent(
+    ranked: List[Tuple[int, Document]],
+) -> List[Tuple[int, Document]]:
+    """Merge consecutive chunks of the same document into a single context."""
+    merged: List[Tuple[int, Document]] = []
+    for rank, doc in ranked:
+        if merged and _is_next_chunk(merged[-1][1], doc):
+            best_rank, previous = merged[-1]
+            content = previous.page_content + _strip_overlap(
+                previous.page_content, doc.page_content
+            )
+            metadata = {
+                **previous.metadata,
+                "chunk_index": doc.metadata["chunk_index"],
+                "chunk_ids": previous.metadata["chunk_ids"]
+                + [doc.metadata.get("chunk_id")],
+                "token_count": count_tokens(content),
+            }
+            merged[-1] = (
+                min(best_rank, rank),
+                Document(page_content=content, metadata=metadata),
+            )
+            continue
+        metadata = {**doc.metadata, "chunk_ids": [doc.metadata.get("chunk_id")]}
+        merged.append(
+            (rank, Document(page_content=doc.page_content, metadata=metadata))
+        )
+    return merged
+
+
+def pack_documents(
+    documents: Sequence[Document], token_budget: Optional[int] = None
+) -> List[Document]:
+    """Fill the stuff-documents context with retrieved chunks up to a token budget.
+
+    Chunks are taken in retrieval order, duplicates are dropped, and neighbouring
+    chunks of the same document are merged with their overlap removed.
+    """
+    token_budget = token_budget or settings.CONTEXT_TOKEN_BUDGET
+
+    seen = set()
+    selected: List[Tuple[int, Document]] = []
+    used_tokens = 0
+    for doc in documents:
+        key = doc.metadata.get("chunk_id") or doc.page_content
+        if key in seen:
+            continue
+        seen.add(key)
+        doc_tokens = document_tokens(doc)
+        # Always keep the best chunk so the answer never runs without context
+        if selected and used_tokens + doc_tokens > token_budget:
+            continue
+        selected.append((len(selected), doc))
+        used_tokens += doc_tokens
+
+    # Put chunks of the same document in reading order so neighbours can merge,
+    # then restore relevance order for the prompt; documents are told apart as
+    # in _is_next_chunk (stringified, ids and sources don't compare)
+    selected.sort(
+        key=lambda item: (
+            str(_document_key(item[1])),
+            _chunk_index(item[1]),
+            item[0],
+        )
+    )
+    packed = [doc for _, doc in sorted(_merge_adjacent(selected), key=lambda x: x[0])]
+
+    packed_tokens = sum(document_tokens(doc) for doc in packed)
+    logger.info(
+        f"Packed {len(documents)} retrieved chunks into {len(packed)} contexts "
+        f"({packed_tokens}/{token_budget} tokens)"
+    )
+    return packed
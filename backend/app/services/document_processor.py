@@ -1,14 +1,20 @@
 import hashlib
+import os
 import re
 import traceback
+from datetime import datetime, timezone
+from typing import List, Optional, Sequence
 
 from app.core.config import settings
+from app.core.metrics import INGESTION_CHUNKS
 from app.crud.task import get_task_by_id
 from app.db.session import AsyncSessionLocal
 from app.models.document import Document
 from app.schemas.knowledge import PreviewResponse, TextChunk
+from app.services.chunk_batches import ChunkBatch
 from app.services.embeddings.embedding_factory import EmbeddingFactory
 from app.services.loaders.factory import DocumentLoaderFactory
+from app.services.tokens import count_tokens
 from app.services.vector_store.factory import VectorStoreFactory
 from langchain_core.documents import Document as LangchainDocument
 from langchain_text_splitters import RecursiveCharacterTextSplitter
@@ -26,6 +32,64 @@ def sanitize_metadata(doc: LangchainDocument):
     return doc
 
 
+def stamp_chunks(
+    chunks: List[LangchainDocument],
+    file_name: str,
+    knowledge_base_id: int,
+    document_id: int,
+    chunk_indexes: Optional[Sequence[int]] = None,
+) -> List[LangchainDocument]:
+    """Add the metadata every stored chunk carries, whichever path ingested it.
+
+    `chunk_indexes` gives each chunk's position in its document when the chunks
+    arrive in several batches; by default they are numbered from zero.
+    """
+    file_type = os.path.splitext(file_name)[1].lower().lstrip(".")
+    created_at = int(datetime.now(timezone.utc).timestamp())
+    if chunk_indexes is None:
+        chunk_indexes = range(len(chunks))
+    for chunk, chunk_index in zip(chunks, chunk_indexes):
+        chunk_id = hashlib.sha256(
+            f"{knowledge_base_id}:{file_name}:{chunk.page_content}".encode()
+        ).hexdigest()
+
+        chunk.metadata["source"] = file_name
+        chunk.metadata["file_type"] = file_type
+        chunk.metadata["created_at"] = created_at
+        chunk.metadata["knowledge_base_id"] = knowledge_base_id
+        chunk.metadata["document_id"] = document_id
+        chunk.metadata["chunk_id"] = chunk_id
+        chunk.metadata["chunk_index"] = chunk_index
+        chunk.metadata["token_count"] = count_tokens(chunk.page_content)
+    return [sanitize_metadata(chunk) for chunk in chunks]
+
+
+def store_chunk_batch(batch: ChunkBatch, document: Document, replace: bool) -> int:
+    """Store chunks embedded elsewhere under an already registered document.
+
+    With `replace` the document's chunks stored so far are dropped first, so a
+    retried ingestion doesn't leave duplicates behind.
+    """
+    chunks = stamp_chunks(
+        batch.documents(),
+        document.file_name,
+        document.knowledge_base_id,
+        document.id,
+        batch.chunk_indexes,
+    )
+    vector_store = VectorStoreFactory.create(
+        store_type=settings.VECTOR_STORE_PROVIDER,
+        collection_name=f"knowledge_base_{document.knowledge_base_id}",
+        embedding_function=EmbeddingFactory.create(),
+    )
+    if replace:
+        vector_store.delete_by_document_id(document.id)
+    if chunks:
+        vector_store.add_embeddings(chunks, batch.embeddings.tolist())
+        INGESTION_CHUNKS.inc(len(chunks))
+    return len(chunks)
+
+
 async def preview_document(
     file_path: str, chunk_size: int, chunk_overlap: int
 ) -> PreviewResponse:
@@ -94,20 +158,10 @@ async def process_document_background(
             await db.commit()
             await db.refresh(document)
 
-            # Store document chunks
-            for i, chunk in enumerate(chunks):
-                chunk_id = hashlib.sha256(
-                    f"{knowledge_base_id}:{file_name}:{chunk.page_content}".encode()
-                ).hexdigest()
-
-                chunk.metadata["source"] = file_name
-                chunk.metadata["knowledge_base_id"] = knowledge_base_id
-                chunk.metadata["document_id"] = document.id
-                chunk.metadata["chunk_id"] = chunk_id
-
             # Add chunk to vectorstore
-            chunks = [sanitize_metadata(chunk) for chunk in chunks]
+            chunks = stamp_chunks(chunks, file_name, knowledge_base_id, document.id)
             vector_store.add_documents(chunks)
+            INGESTION_CHUNKS.inc(len(chunks))
             task.status = "completed"
             task.document_id = document.id
 
@@ -1,23 +1,58 @@
+from functools import lru_cache
+
+from app.core.cache import TwoTierCache
 from app.core.config import settings
-from langchain_ollama import OllamaEmbeddings
-from langchain_openai import OpenAIEmbeddings
+from app.services.embeddings.instrumented import InstrumentedEmbeddings
+from app.services.http_clients import (
+    get_async_http_client,
+    get_async_transport,
+    get_http_client,
+    get_transport,
+    http_timeout,
+)
 
 
 class EmbeddingFactory:
     @staticmethod
+    @lru_cache(maxsize=None)
     def create():
         embedding_provider = settings.EMBEDDING_PROVIDER.lower()
 
+        # Provider packages are imported only once selected
         if embedding_provider == "ollama":
-            return OllamaEmbeddings(
+            from langchain_ollama import OllamaEmbeddings
+
+            # The Ollama client builds its own httpx clients; share the pools
+            embeddings = OllamaEmbeddings(
                 model=settings.OLLAMA_EMBEDDINGS_MODEL,
                 base_url=settings.OLLAMA_API_BASE,
+                client_kwargs={"timeout": http_timeout()},
+                sync_client_kwargs={"transport": get_transport()},
+                async_client_kwargs={"transport": get_async_transport()},
             )
         elif embedding_provider == "vllm":
-            return OpenAIEmbeddings(
+            from langchain_openai import OpenAIEmbeddings
+
+            embeddings = OpenAIEmbeddings(
                 model=settings.EMBEDDING_MODEL,
                 base_url=settings.MODEL_BASE_URL,
                 api_key=settings.API_KEY,
+                timeout=http_timeout(),
+                max_retries=settings.HTTP_MAX_RETRIES,
+                http_client=get_http_client(),
+                http_async_client=get_async_http_client(),
             )
         else:
             raise ValueError(f"Unsupported embedding provider: {embedding_provider}")
+        query_cache = TwoTierCache(
+            "query_embedding",
+            settings.QUERY_EMBEDDING_CACHE_TTL,
+            settings.QUERY_EMBEDDING_CACHE_SIZE,
+        )
+        return InstrumentedEmbeddings(embeddings, query_cache=query_cache)
+
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def dimension() -> int:
+        """Length of the configured model's vectors, probed once per process."""
+        return len(EmbeddingFactory.create().embed_query("dimension"))
@@ -0,0 +1,54 @@
+import hashlib
+from typing import List, Optional
+
+from app.core.cache import TwoTierCache
+from app.core.metrics import EMBEDDING_SECONDS, observe
+from langchain_core.embeddings import Embeddings
+
+
+class InstrumentedEmbeddings(Embeddings):
+    """Record the latency of every embedding call made through the wrapped model.
+
+    With a `query_cache`, query vectors are looked up there first, so a question
+    asked on any worker is only embedded once.
+    """
+
+    def __init__(
+        self, embeddings: Embeddings, query_cache: Optional[TwoTierCache] = None
+    ):
+        self.embeddings = embeddings
+        self.query_cache = query_cache
+        self.model = getattr(embeddings, "model", "")
+
+    def _query_key(self, text: str) -> str:
+        return hashlib.sha256(f"{self.model}\0{text}".encode()).hexdigest()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        with observe(EMBEDDING_SECONDS, "embedding", operation="documents"):
+            return self.embeddings.embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        if self.query_cache is not None:
+            vector = self.query_cache.get(self._query_key(text))
+            if vector is not None:
+                return vector
+        with observe(EMBEDDING_SECONDS, "embedding", operation="query"):
+            vector = self.embeddings.embed_query(text)
+        if self.query_cache is not None:
+            self.query_cache.set(self._query_key(text), vector)
+        return vector
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        with observe(EMBEDDING_SECONDS, "embedding", operation="documents"):
+            return await self.embeddings.aembed_documents(texts)
+
+    async def aembed_query(self, text: str) -> List[float]:
+        if self.query_cache is not None:
+            vector = await self.query_cache.aget(self._query_key(text))
+            if vector is not None:
+                return vector
+        with observe(EMBEDDING_SECONDS, "embedding", operation="query"):
+            vector = await self.embeddings.aembed_query(text)
+        if self.query_cache is not None:
+            await self.query_cache.aset(self._query_key(text), vector)
+        return vector
@@ -0,0 +1,35 @@
+from typing import Dict, List
+
+from langchain_core.embeddings import Embeddings
+
+
+class PrecomputedEmbeddings(Embeddings):
+    """Serve query embeddings computed ahead of time for a batch of queries.
+
+    Vector stores embed each query on their own; wrapping the embedding function
+    lets callers embed many queries up front and hand out the cached vectors.
+    Queries go through `embed_query`, since models with instruction prefixes
+    embed queries and documents differently.
+    """
+
+    def __init__(self, embeddings: Embeddings):
+        self.embeddings = embeddings
+        self.vectors: Dict[str, List[float]] = {}
+
+    def precompute(self, texts: List[str]) -> None:
+        missing = list(dict.fromkeys(t for t in texts if t not in self.vectors))
+        if missing:
+            self.vectors.update((t, self.embeddings.embed_query(t)) for t in missing)
+
+    def discard(self, texts: List[str]) -> None:
+        for text in texts:
+            self.vectors.pop(text, None)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embeddings.embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        vector = self.vectors.get(text)
+        if vector is None:
+            return self.embeddings.embed_query(text)
+        return vector
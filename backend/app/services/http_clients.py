@@ -0,0 +1,58 @@
+from functools import lru_cache
+
+import httpx
+from app.core.config import settings
+
+
+def _limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=settings.HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY,
+    )
+
+
+def http_timeout() -> httpx.Timeout:
+    return httpx.Timeout(
+        settings.HTTP_READ_TIMEOUT,
+        connect=settings.HTTP_CONNECT_TIMEOUT,
+        pool=settings.HTTP_CONNECT_TIMEOUT,
+    )
+
+
+@lru_cache(maxsize=None)
+def get_transport() -> httpx.HTTPTransport:
+    """Connection pool shared by every synchronous model client."""
+    return httpx.HTTPTransport(
+        limits=_limits(),
+        http2=settings.HTTP2_ENABLED,
+        retries=settings.HTTP_CONNECT_RETRIES,
+    )
+
+
+@lru_cache(maxsize=None)
+def get_async_transport() -> httpx.AsyncHTTPTransport:
+    """Connection pool shared by every asynchronous model client."""
+    return httpx.AsyncHTTPTransport(
+        limits=_limits(),
+        http2=settings.HTTP2_ENABLED,
+        retries=settings.HTTP_CONNECT_RETRIES,
+    )
+
+
+@lru_cache(maxsize=None)
+def get_http_client() -> httpx.Client:
+    return httpx.Client(transport=get_transport(), timeout=http_timeout())
+
+
+@lru_cache(maxsize=None)
+def get_async_http_client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(transport=get_async_transport(), timeout=http_timeout())
+
+
+async def close_http_clients():
+    """Close the shared pools; called once on application shutdown."""
+    if get_async_http_client.cache_info().currsize:
+        await get_async_http_client().aclose()
+    if get_http_client.cache_info().currsize:
+        get_http_client().close()
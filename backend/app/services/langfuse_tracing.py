@@ -1,3 +1,93 @@
-from langfuse.langchain import CallbackHandler
+import os
+import random
+from typing import TYPE_CHECKING, List, Optional
 
-langfuse_handler = CallbackHandler()
+from app.core.config import settings
+from app.core.logger import logger
+from app.core.metrics import TRACES
+from langchain_core.callbacks import BaseCallbackHandler
+
+if TYPE_CHECKING:
+    from app.services.tail_sampling import TailSamplingTracerProvider
+    from langfuse import Langfuse
+    from langfuse.langchain import CallbackHandler
+
+
+class LangfuseTracing:
+    """Owns the Langfuse client and decides which requests get traced.
+
+    Spans are exported in batches by a bounded background queue, never on the
+    request path. Without tail sampling, requests outside the head sample get no
+    callbacks at all; with it, every request is recorded and only sampled,
+    failed or slow traces are exported.
+
+    Langfuse and the OpenTelemetry SDK take about half a second to import, so
+    the client is only created by `start`, which runs as a warm-up hook.
+    """
+
+    def __init__(self):
+        self.configured = bool(
+            settings.LANGFUSE_HOST
+            and settings.LANGFUSE_PUBLIC_KEY
+            and settings.LANGFUSE_SECRET_KEY
+        )
+        self.enabled = self.configured and settings.LANGFUSE_TRACING_ENABLED
+        self.tracer_provider: Optional["TailSamplingTracerProvider"] = None
+        self.client: Optional["Langfuse"] = None
+        self.handler: Optional["CallbackHandler"] = None
+        self._started = False
+
+    def start(self):
+        """Create the Langfuse client; requests aren't traced until it exists."""
+        if self._started or not self.configured:
+            return
+        self._started = True
+        from app.services.tail_sampling import TailSamplingTracerProvider
+        from langfuse import Langfuse
+        from langfuse.langchain import CallbackHandler
+
+        if self.enabled and settings.LANGFUSE_TAIL_SAMPLING:
+            self.tracer_provider = TailSamplingTracerProvider(
+                sample_rate=settings.LANGFUSE_SAMPLE_RATE,
+                slow_trace_ms=settings.LANGFUSE_SLOW_TRACE_MS,
+                max_pending_spans=settings.LANGFUSE_MAX_PENDING_SPANS,
+            )
+        # The batch span processor reads its queue bound from the environment
+        os.environ.setdefault(
+            "OTEL_BSP_MAX_QUEUE_SIZE", str(settings.LANGFUSE_MAX_QUEUE_SIZE)
+        )
+        try:
+            self.client = Langfuse(
+                host=settings.LANGFUSE_HOST,
+                public_key=settings.LANGFUSE_PUBLIC_KEY,
+                secret_key=settings.LANGFUSE_SECRET_KEY,
+                tracing_enabled=self.enabled,
+                flush_at=settings.LANGFUSE_FLUSH_AT,
+                flush_interval=settings.LANGFUSE_FLUSH_INTERVAL,
+                tracer_provider=self.tracer_provider,
+            )
+            if self.enabled:
+                self.handler = CallbackHandler(public_key=settings.LANGFUSE_PUBLIC_KEY)
+        except Exception as e:
+            logger.error(f"Error initializing Langfuse tracing: {e}")
+            self.client = None
+            self.enabled = False
+
+    def callbacks(self) -> List[BaseCallbackHandler]:
+        """Callbacks to attach to a single chain invocation."""
+        if not self.enabled or self.handler is None:
+            return []
+        if (
+            self.tracer_provider is None
+            and random.random() >= settings.LANGFUSE_SAMPLE_RATE
+        ):
+            TRACES.labels(decision="sampled_out").inc()
+            return []
+        return [self.handler]
+
+    def flush(self):
+        if self.client is not None:
+            self.client.flush()
+
+
+langfuse_tracing = LangfuseTracing()
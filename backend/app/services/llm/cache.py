@@ -0,0 +1,14 @@
+from typing import Optional
+
+from app.core.metrics import record_cache
+from langchain_community.cache import RedisCache
+from langchain_core.caches import RETURN_VAL_TYPE
+
+
+class InstrumentedRedisCache(RedisCache):
+    """Redis LLM cache that counts its hits and misses."""
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[RETURN_VAL_TYPE]:
+        result = super().lookup(prompt, llm_string)
+        record_cache("llm", hit=result is not None)
+        return result
@@ -1,19 +1,36 @@
+from functools import lru_cache
 from typing import Optional
 
 from app.core.config import settings
+from app.services.http_clients import (
+    get_async_http_client,
+    get_http_client,
+    http_timeout,
+)
 from langchain_core.language_models import BaseChatModel
-from langchain_openai import ChatOpenAI
 
 
 class LLMFactory:
     @staticmethod
-    def create(provider: Optional[str] = None) -> BaseChatModel:
+    @lru_cache(maxsize=None)
+    def create(
+        provider: Optional[str] = None, model: Optional[str] = None
+    ) -> BaseChatModel:
         provider = provider or settings.CHAT_PROVIDER.lower()
+        # Provider packages are imported only once selected
         if provider == "gemini":
+            from langchain_openai import ChatOpenAI
+
             return ChatOpenAI(
-                model=settings.GOOGLE_GENAI_MODEL,
+                model=model or settings.GOOGLE_GENAI_MODEL,
                 api_key=settings.API_KEY,
                 base_url=settings.MODEL_BASE_URL,
+                # Report token usage on streamed responses too
+                stream_usage=True,
+                timeout=http_timeout(),
+                max_retries=settings.HTTP_MAX_RETRIES,
+                http_client=get_http_client(),
+                http_async_client=get_async_http_client(),
             )
         else:
             raise ValueError(f"Unsupported LLM provider: {provider}")
@@ -0,0 +1,107 @@
+import re
+from dataclasses import dataclass, field
+from typing import Callable, List, Sequence
+
+from app.core.config import settings
+from app.core.metrics import record_route
+from app.services.llm.factory import LLMFactory
+from app.services.tokens import count_tokens
+from langchain_core.documents import Document
+from langchain_core.language_models import BaseChatModel
+from langchain_core.runnables import Runnable, RunnableLambda
+
+# Questions asking for reasoning rather than a lookup
+REASONING_CUES = re.compile(
+    r"\b(why|how does|how do|compare|comparison|difference|differences|versus|vs|"
+    r"explain|analy[sz]e|pros and cons|trade-?offs?|step by step|evaluate|impact)\b",
+    re.IGNORECASE,
+)
+
+
+@dataclass
+class RouteDecision:
+    tier: str
+    model: str
+    score: float = 0.0
+    reasons: List[str] = field(default_factory=list)
+
+
+class ModelRouter:
+    """Pick the model for each LLM stage of the chat chain.
+
+    Query rewrite and guardrails are short, formulaic calls and always use
+    their configured cheap models. The answer is routed per request by a small
+    additive score over the question length, reasoning cues, conversation depth
+    and, when a reranker is configured, how confident retrieval was; questions
+    reaching the threshold go to the strong model, the rest to the fast one.
+    With routing disabled every stage uses the default chat model.
+    """
+
+    def __init__(self, enabled: bool):
+        self.enabled = enabled
+
+    def model_for(self, stage: str) -> str:
+        if not self.enabled:
+            return settings.GOOGLE_GENAI_MODEL
+        if stage == "query_rewrite":
+            return settings.QUERY_REWRITE_MODEL
+        if stage == "guardrails":
+            return settings.GUARDRAILS_MODEL
+        return settings.ROUTER_FAST_MODEL
+
+    def llm_for(self, stage: str) -> BaseChatModel:
+        return LLMFactory.create(model=self.model_for(stage))
+
+    def classify(
+        self, query: str, history_depth: int, documents: Sequence[Document]
+    ) -> RouteDecision:
+        score, reasons = 0.0, []
+        if count_tokens(query) >= settings.ROUTER_LONG_QUERY_TOKENS:
+            score += 1
+            reasons.append("long_query")
+        if REASONING_CUES.search(query):
+            score += 1
+            reasons.append("reasoning")
+        if history_depth >= settings.ROUTER_DEEP_HISTORY:
+            score += 1
+            reasons.append("deep_history")
+
+        rerank_scores = [
+            doc.metadata["rerank_score"]
+            for doc in documents
+            if doc.metadata.get("rerank_score") is not None
+        ]
+        if rerank_scores and max(rerank_scores) < settings.ROUTER_LOW_RERANK_SCORE:
+            score += 1
+            reasons.append("low_retrieval_score")
+        if len({doc.metadata.get("document_id") for doc in documents}) > 2:
+            # The answer has to be put together from several documents
+            score += 0.5
+            reasons.append("many_sources")
+
+        if score >= settings.ROUTER_STRONG_THRESHOLD:
+            return RouteDecision("strong", settings.ROUTER_STRONG_MODEL, score, reasons)
+        return RouteDecision("fast", settings.ROUTER_FAST_MODEL, score, reasons)
+
+    def answer_chain(self, build: Callable[[BaseChatModel], Runnable]) -> Runnable:
+        """Answer chain whose model is chosen once the context is retrieved.
+
+        `build` creates the chain for a given model; it receives the retrieval
+        chain's inputs ("input", "chat_history" and "context").
+        """
+        if not self.enabled:
+            return build(self.llm_for("answer"))
+
+        def route(inputs: dict) -> Runnable:
+            decision = self.classify(
+                inputs["input"],
+                len(inputs.get("chat_history") or []),
+                inputs["context"],
+            )
+            record_route("answer", decision.tier, decision.model)
+            return build(LLMFactory.create(model=decision.model))
+
+        return RunnableLambda(route, name="route_answer")
+
+
+model_router = ModelRouter(enabled=settings.MODEL_ROUTING_ENABLED)
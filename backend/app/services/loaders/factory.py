@@ -1,31 +1,23 @@
+import importlib
 import os
 from typing import Any
 
-from langchain_community.document_loaders import (
-    Docx2txtLoader,
-    PyPDFLoader,
-    TextLoader,
-    UnstructuredExcelLoader,
-    UnstructuredHTMLLoader,
-)
+# Loaders by extension, imported on first use since some pull in heavy
+# dependencies (unstructured, pypdf) that most workers never need
+LOADERS = {
+    ".pdf": "PyPDFLoader",
+    ".docx": "Docx2txtLoader",
+    ".xlsx": "UnstructuredExcelLoader",
+    ".html": "UnstructuredHTMLLoader",
+    ".txt": "TextLoader",
+    ".md": "TextLoader",
+}
 
 
 class DocumentLoaderFactory:
     @staticmethod
     def create(file_path: str) -> Any:
         _, ext = os.path.splitext(file_path)
-        ext = ext.lower()
-        if ext == ".pdf":
-            return PyPDFLoader(file_path)
-        elif ext == ".docx":
-            return Docx2txtLoader(file_path)
-        elif ext == ".xlsx":
-            return UnstructuredExcelLoader(file_path)
-        elif ext == ".html":
-            return UnstructuredHTMLLoader(file_path)
-        elif ext == ".txt":
-            return TextLoader(file_path)
-        elif ext == ".md":
-            return TextLoader(file_path)
-        else:
-            return TextLoader(file_path)
+        loader_name = LOADERS.get(ext.lower(), "TextLoader")
+        module = importlib.import_module("langchain_community.document_loaders")
+        return getattr(module, loader_name)(file_path)
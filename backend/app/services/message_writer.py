@@ -0,0 +1,113 @@
+import asyncio
+from typing import Any, Optional, Set
+
+from app.core.config import settings
+from app.core.logger import logger
+from app.crud.chat import create_messages, update_message
+from app.db.session import AsyncSessionLocal
+
+# Last-chance flushes of abandoned streams, kept referenced until they finish
+_pending_flushes: Set[asyncio.Task] = set()
+
+
+class MessageWriter:
+    """Write-behind persistence of one chat turn.
+
+    The user message and the assistant placeholder are inserted in a single
+    statement on a separate session while retrieval runs, so the database is
+    no longer on the path to the first token. The streamed answer is
+    checkpointed every `checkpoint_interval` seconds, and the final content
+    with its metadata is written once the answer completes.
+    """
+
+    def __init__(
+        self,
+        chat_id: int,
+        query: str,
+        checkpoint_interval: float = settings.MESSAGE_CHECKPOINT_INTERVAL,
+    ):
+        self.chat_id = chat_id
+        self.checkpoint_interval = checkpoint_interval
+        self.content = ""
+        self.bot_message_id: Optional[int] = None
+        self._saved_content = ""
+        self._created = asyncio.create_task(self._create(query))
+        self._created.add_done_callback(self._log_create_error)
+        self._checkpoints: Optional[asyncio.Task] = None
+
+    async def _create(self, query: str):
+        async with AsyncSessionLocal() as db:
+            _, self.bot_message_id = await create_messages(
+                db,
+                self.chat_id,
+                [
+                    {"role": "user", "content": query},
+                    {"role": "assistant", "content": ""},
+                ],
+            )
+
+    def _log_create_error(self, task: asyncio.Task):
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(
+                f"Failed to store messages of chat {self.chat_id}: {task.exception()}"
+            )
+
+    async def _stored(self) -> bool:
+        """Wait for the insert; False if it failed, leaving nothing to update."""
+        try:
+            await self._created
+        except Exception:
+            # Already logged by _log_create_error
+            return False
+        return True
+
+    def start_checkpoints(self):
+        if self._checkpoints is None and self.checkpoint_interval > 0:
+            self._checkpoints = asyncio.create_task(self._checkpoint_loop())
+
+    async def _checkpoint_loop(self):
+        if not await self._stored():
+            return
+        while True:
+            await asyncio.sleep(self.checkpoint_interval)
+            await self._checkpoint()
+
+    async def _checkpoint(self):
+        try:
+            await self.flush()
+        except Exception as e:
+            logger.warning(f"Failed to checkpoint message {self.bot_message_id}: {e}")
+
+    async def flush(self):
+        """Persist the answer streamed so far, if it changed."""
+        if not await self._stored():
+            return
+        content = self.content
+        if content == self._saved_content:
+            return
+        async with AsyncSessionLocal() as db:
+            await update_message(db, self.bot_message_id, content=content)
+        self._saved_content = content
+
+    async def finish(self, content: str, **values: Any):
+        """Write the final answer along with any other columns."""
+        self._stop_checkpoints()
+        self.content = content
+        if not await self._stored():
+            return
+        async with AsyncSessionLocal() as db:
+            await update_message(db, self.bot_message_id, content=content, **values)
+        self._saved_content = content
+
+    def close(self):
+        """Stop checkpointing; an unfinished answer gets one last flush."""
+        self._stop_checkpoints()
+        if self.content != self._saved_content:
+            task = asyncio.create_task(self._checkpoint())
+            _pending_flushes.add(task)
+            task.add_done_callback(_pending_flushes.discard)
+
+    def _stop_checkpoints(self):
+        if self._checkpoints is not None:
+            self._checkpoints.cancel()
+            self._checkpoints = None
@@ -0,0 +1,92 @@
+import hashlib
+from typing import Any, List, Optional, Sequence
+
+from app.core.cache import TwoTierCache
+from app.core.config import settings
+from app.services.tokens import document_tokens
+from langchain_core.callbacks import Callbacks
+from langchain_core.documents import BaseDocumentCompressor, Document
+from pydantic import PrivateAttr
+
+
+class CrossEncoderReranker(BaseDocumentCompressor):
+    """Rerank over-fetched candidates with an ONNX cross-encoder.
+
+    Scores are cached per (model, query, chunk_id) in the cache shared by all
+    workers, so repeated questions skip the model entirely, and the top-k
+    documents are trimmed to a token budget.
+    """
+
+    model_name: str
+    top_k: int = 4
+    token_budget: int = 2000
+    batch_size: int = 32
+    cache_size: int = 10000
+    threads: Optional[int] = None
+
+    _encoder: Any = PrivateAttr(default=None)
+    _scores: TwoTierCache = PrivateAttr(default=None)
+
+    def model_post_init(self, __context: Any):
+        self._scores = TwoTierCache(
+            "rerank", settings.RERANK_CACHE_TTL, self.cache_size
+        )
+
+    def _get_encoder(self):
+        if self._encoder is None:
+            from fastembed.rerank.cross_encoder import TextCrossEncoder
+
+            self._encoder = TextCrossEncoder(
+                model_name=self.model_name, threads=self.threads
+            )
+        return self._encoder
+
+    def warm_up(self):
+        """Load the model ahead of the first request."""
+        self._get_encoder()
+
+    def _cache_key(self, query_digest: str, document: Document) -> str:
+        chunk_id = document.metadata.get("chunk_id")
+        if chunk_id is None:
+            chunk_id = hashlib.sha256(document.page_content.encode()).hexdigest()
+        return f"{self.model_name}:{query_digest}:{chunk_id}"
+
+    def score(self, query: str, documents: Sequence[Document]) -> List[float]:
+        query_digest = hashlib.sha256(query.encode()).hexdigest()
+        keys = [self._cache_key(query_digest, doc) for doc in documents]
+        scores = self._scores.get_many(keys)
+        missing = [i for i, score in enumerate(scores) if score is None]
+        if missing:
+            new_scores = self._get_encoder().rerank(
+                query,
+                [documents[i].page_content for i in missing],
+                batch_size=self.batch_size,
+            )
+            for i, score in zip(missing, new_scores):
+                scores[i] = float(score)
+            self._scores.set_many({keys[i]: scores[i] for i in missing})
+        return scores
+
+    def compress_documents(
+        self,
+        documents: Sequence[Document],
+        query: str,
+        callbacks: Optional[Callbacks] = None,
+    ) -> Sequence[Document]:
+        if not documents:
+            return []
+        scores = self.score(query, documents)
+        ranked = sorted(zip(documents, scores), key=lambda x: x[1], reverse=True)
+
+        selected = []
+        used_tokens = 0
+        for doc, score in ranked:
+            if len(selected) >= self.top_k:
+                break
+            doc_tokens = document_tokens(doc)
+            if selected and used_tokens + doc_tokens > self.token_budget:
+                continue
+            doc.metadata["rerank_score"] = score
+            selected.append(doc)
+            used_tokens += doc_tokens
+        return selected
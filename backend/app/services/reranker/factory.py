@@ -0,0 +1,24 @@
+from functools import lru_cache
+from typing import Optional
+
+from app.core.config import settings
+from app.services.reranker.cross_encoder import CrossEncoderReranker
+
+
+class RerankerFactory:
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def create(provider: Optional[str] = None) -> Optional[CrossEncoderReranker]:
+        provider = provider or settings.RERANKER_PROVIDER.lower()
+        if provider == "none":
+            return None
+        elif provider == "fastembed":
+            return CrossEncoderReranker(
+                model_name=settings.RERANKER_MODEL,
+                top_k=settings.RERANK_TOP_K,
+                token_budget=settings.RERANK_TOKEN_BUDGET,
+                batch_size=settings.RERANK_BATCH_SIZE,
+                cache_size=settings.RERANK_CACHE_SIZE,
+            )
+        else:
+            raise ValueError(f"Unsupported reranker provider: {provider}")
@@ -1,14 +1,143 @@
+import asyncio
+import json
+import math
+import time
+from typing import AsyncGenerator, List, Optional, Sequence
+
 from app.core.config import settings
+from app.schemas.retrieval import BatchRetrievalQuery, RetrievalFilter
 from app.services.embeddings.embedding_factory import EmbeddingFactory
+from app.services.embeddings.precomputed import PrecomputedEmbeddings
 from app.services.vector_store.factory import VectorStoreFactory
 
 
-def retrieve_documents(query: str, knowledge_base_id: int, top_k: int = 10):
+def retrieve_documents(
+    query: str,
+    knowledge_base_id: int,
+    top_k: int = 10,
+    dense_weight: Optional[float] = None,
+    sparse_weight: Optional[float] = None,
+    retrieval_filter: Optional[RetrievalFilter] = None,
+):
     embeddings = EmbeddingFactory.create()
     vector_store = VectorStoreFactory.create(
         store_type=settings.VECTOR_STORE_PROVIDER,
         collection_name=f"knowledge_base_{knowledge_base_id}",
         embedding_function=embeddings,
+        dense_weight=dense_weight,
+        sparse_weight=sparse_weight,
+    )
+    results = vector_store.similarity_search_with_score(
+        query, k=top_k, **vector_store.build_filter(retrieval_filter)
     )
-    results = vector_store.similarity_search_with_score(query, k=top_k)
     return results
+
+
+def percentile(values: Sequence[float], p: float) -> Optional[float]:
+    """Nearest-rank percentile, `p` in [0, 100]."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(math.ceil(p / 100 * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+async def evaluate_retrieval(
+    queries: List[BatchRetrievalQuery],
+    knowledge_base_id: int,
+    top_k: int = 10,
+    batch_size: int = 64,
+    concurrency: int = 8,
+    dense_weight: Optional[float] = None,
+    sparse_weight: Optional[float] = None,
+) -> AsyncGenerator[str, None]:
+    """Run a query set against one knowledge base and stream NDJSON results.
+
+    Queries are embedded in batches and searched concurrently against a single
+    vector store. Each line holds one query's hits; the last line summarises
+    recall@k and MRR over queries with gold chunk ids, plus latency percentiles.
+    """
+    embeddings = PrecomputedEmbeddings(EmbeddingFactory.create())
+    vector_store = VectorStoreFactory.create(
+        store_type=settings.VECTOR_STORE_PROVIDER,
+        collection_name=f"knowledge_base_{knowledge_base_id}",
+        embedding_function=embeddings,
+        dense_weight=dense_weight,
+        sparse_weight=sparse_weight,
+    )
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def search(index: int, item: BatchRetrievalQuery) -> dict:
+        async with semaphore:
+            start = time.perf_counter()
+            results = await asyncio.to_thread(
+                vector_store.similarity_search_with_score,
+                item.query,
+                k=top_k,
+                **vector_store.build_filter(item.filters),
+            )
+            latency_ms = (time.perf_counter() - start) * 1000
+
+        chunk_ids = [doc.metadata.get("chunk_id") for doc, _ in results]
+        result = {
+            "index": index,
+            "id": item.id,
+            "query": item.query,
+            "latency_ms": round(latency_ms, 2),
+            "results": [
+                {
+                    "chunk_id": doc.metadata.get("chunk_id"),
+                    "document_id": doc.metadata.get("document_id"),
+                    "score": float(score),
+                }
+                for doc, score in results
+            ],
+        }
+        if item.gold_chunk_ids:
+            gold = set(item.gold_chunk_ids)
+            ranks = [i for i, chunk_id in enumerate(chunk_ids, 1) if chunk_id in gold]
+            result["recall"] = len(gold.intersection(chunk_ids)) / len(gold)
+            result["reciprocal_rank"] = 1 / ranks[0] if ranks else 0.0
+        return result
+
+    latencies, recalls, reciprocal_ranks = [], [], []
+    embed_ms = 0.0
+    started = time.perf_counter()
+    for offset in range(0, len(queries), batch_size):
+        batch = queries[offset : offset + batch_size]
+        texts = [item.query for item in batch]
+        start = time.perf_counter()
+        await asyncio.to_thread(embeddings.precompute, texts)
+        embed_ms += (time.perf_counter() - start) * 1000
+
+        tasks = [search(offset + i, item) for i, item in enumerate(batch)]
+        for task in asyncio.as_completed(tasks):
+            result = await task
+            latencies.append(result["latency_ms"])
+            if "recall" in result:
+                recalls.append(result["recall"])
+                reciprocal_ranks.append(result["reciprocal_rank"])
+            yield json.dumps(result) + "\n"
+        embeddings.discard(texts)
+
+    summary = {
+        "summary": {
+            "queries": len(queries),
+            "queries_with_gold": len(recalls),
+            "top_k": top_k,
+            f"recall@{top_k}": sum(recalls) / len(recalls) if recalls else None,
+            "mrr": (
+                sum(reciprocal_ranks) / len(reciprocal_ranks)
+                if reciprocal_ranks
+                else None
+            ),
+            "latency_ms": {
+                "p50": percentile(latencies, 50),
+                "p95": percentile(latencies, 95),
+                "p99": percentile(latencies, 99),
+            },
+            "embedding_ms": round(embed_ms, 2),
+            "total_ms": round((time.perf_counter() - started) * 1000, 2),
+        }
+    }
+    yield json.dumps(summary) + "\n"
@@ -0,0 +1,135 @@
+import asyncio
+import json
+import zlib
+from typing import Any, AsyncIterator, Callable, List, NamedTuple, Optional
+
+from app.core.config import settings
+from fastapi.responses import StreamingResponse
+from starlette.types import Receive, Scope, Send
+
+# Part type codes of the AI SDK data stream protocol
+DATA_STREAM_CODES = {"text": "0", "data": "2", "error": "3"}
+STREAM_PROTOCOLS = ("data", "sse")
+
+
+class StreamPart(NamedTuple):
+    kind: str  # "text", "data" or "error"
+    value: Any
+
+
+def encode_part(part: StreamPart, protocol: str = "data") -> str:
+    """Encode a part as a data stream line or as a server-sent event."""
+    payload = json.dumps(part.value, ensure_ascii=False)
+    if protocol == "sse":
+        return f"event: {part.kind}\ndata: {payload}\n\n"
+    return f"{DATA_STREAM_CODES[part.kind]}:{payload}\n"
+
+
+async def batch_parts(
+    parts: AsyncIterator[StreamPart],
+    flush_interval: float = settings.STREAM_FLUSH_INTERVAL_MS / 1000,
+    flush_bytes: int = settings.STREAM_FLUSH_BYTES,
+) -> AsyncIterator[StreamPart]:
+    """Merge consecutive text parts into micro-batches.
+
+    Text is held until `flush_bytes` have accumulated or the oldest buffered
+    token is `flush_interval` old, whichever comes first; the first text part
+    and any other part type are forwarded right away so time to first token is
+    unaffected. The source is consumed by a single task feeding a bounded
+    queue, which keeps its context variables intact across parts and lets the
+    timer fire while the source is waiting on the model.
+    """
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue(maxsize=256)
+    done = object()
+
+    async def pump():
+        try:
+            async for part in parts:
+                await queue.put(part)
+        except Exception as e:
+            await queue.put(e)
+        finally:
+            # Run the source's cleanup now when the consumer went away
+            if hasattr(parts, "aclose"):
+                await parts.aclose()
+        await queue.put(done)
+
+    producer = asyncio.create_task(pump())
+    buffer: List[str] = []
+    size = 0
+    deadline: Optional[float] = None
+    sent_text = False
+    try:
+        while True:
+            try:
+                timeout = None if deadline is None else max(deadline - loop.time(), 0)
+                item = await asyncio.wait_for(queue.get(), timeout)
+            except asyncio.TimeoutError:
+                item = None
+
+            if isinstance(item, StreamPart) and item.kind == "text":
+                buffer.append(item.value)
+                size += len(item.value.encode())
+                if deadline is None:
+                    deadline = loop.time() + flush_interval
+                if sent_text and size < flush_bytes:
+                    continue
+
+            if buffer:
+                yield StreamPart("text", "".join(buffer))
+                buffer, size, deadline, sent_text = [], 0, None, True
+            if item is done:
+                break
+            if isinstance(item, Exception):
+                raise item
+            if isinstance(item, StreamPart) and item.kind != "text":
+                yield item
+    finally:
+        producer.cancel()
+
+
+async def encode_stream(
+    parts: AsyncIterator[StreamPart],
+    protocol: str = "data",
+    compress: bool = False,
+) -> AsyncIterator[bytes]:
+    """Batch, encode and optionally gzip a stream of parts.
+
+    Compressed output is sync-flushed after every batch so the client can
+    decode each one as soon as it arrives.
+    """
+    compressor = zlib.compressobj(wbits=31) if compress else None
+    async for part in batch_parts(parts):
+        data = encode_part(part, protocol).encode()
+        if compressor is not None:
+            data = compressor.compress(data) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        yield data
+    if compressor is not None:
+        yield compressor.flush()
+
+
+def accepts_gzip(accept_encoding: str) -> bool:
+    for coding in accept_encoding.split(","):
+        name, _, params = coding.strip().partition(";")
+        if name.strip().lower() in ("gzip", "*"):
+            return params.replace(" ", "") not in ("q=0", "q=0.0", "q=0.00")
+    return False
+
+
+class ClosingStreamingResponse(StreamingResponse):
+    """Streaming response calling `on_close` however the response ends.
+
+    Unlike the response's background task or the body generator's `finally`,
+    this also runs when the client disconnects before or while streaming.
+    """
+
+    def __init__(self, *args: Any, on_close: Callable[[], None], **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self.on_close = on_close
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            self.on_close()
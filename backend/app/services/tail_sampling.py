@@ -0,0 +1,120 @@
+import threading
+from collections import OrderedDict
+from typing import List, Optional
+
+from app.core.metrics import TRACE_SPANS, TRACES
+from opentelemetry.context import Context
+from opentelemetry.sdk.trace import ReadableSpan, Span, SpanProcessor, TracerProvider
+from opentelemetry.trace import StatusCode
+
+OBSERVATION_LEVEL = "langfuse.observation.level"
+_TRACE_ID_MASK = (1 << 64) - 1
+
+
+class TailSamplingSpanProcessor(SpanProcessor):
+    """Hold the spans of a trace until its root ends, then keep or drop it.
+
+    A trace is exported when its trace id falls inside the head sample, when any
+    of its spans failed, or when the root took longer than the slow threshold.
+    Open traces are kept in a bounded buffer; when it is full the oldest trace
+    is dropped so a Langfuse outage can't grow memory without limit.
+    """
+
+    def __init__(
+        self,
+        delegate: SpanProcessor,
+        sample_rate: float,
+        slow_trace_ms: int,
+        max_pending_spans: int,
+    ):
+        self.delegate = delegate
+        self.sample_bound = int(sample_rate * (_TRACE_ID_MASK + 1))
+        self.slow_trace_ns = slow_trace_ms * 1_000_000
+        self.max_pending_spans = max_pending_spans
+
+        self._pending: "OrderedDict[int, List[ReadableSpan]]" = OrderedDict()
+        self._pending_spans = 0
+        self._lock = threading.Lock()
+
+    def on_start(self, span: Span, parent_context: Optional[Context] = None) -> None:
+        self.delegate.on_start(span, parent_context=parent_context)
+
+    def on_end(self, span: ReadableSpan) -> None:
+        trace_id = span.context.trace_id
+        with self._lock:
+            self._pending.setdefault(trace_id, []).append(span)
+            self._pending_spans += 1
+            if span.parent is not None:
+                self._evict_overflow()
+                return
+            spans = self._pending.pop(trace_id)
+            self._pending_spans -= len(spans)
+            reason = self._keep_reason(trace_id, span, spans)
+        TRACES.labels(decision=reason or "sampled_out").inc()
+        if reason is None:
+            TRACE_SPANS.labels(outcome="sampled_out").inc(len(spans))
+            return
+
+        dropped = 0
+        for pending_span in spans:
+            # The batch queue discards a span for each one added while it's full
+            if self._delegate_queue_full():
+                dropped += 1
+            self.delegate.on_end(pending_span)
+        TRACE_SPANS.labels(outcome="exported").inc(len(spans) - dropped)
+        if dropped:
+            TRACE_SPANS.labels(outcome="dropped").inc(dropped)
+
+    def _keep_reason(
+        self, trace_id: int, root: ReadableSpan, spans: List[ReadableSpan]
+    ) -> Optional[str]:
+        if any(_is_error(s) for s in spans):
+            return "kept_error"
+        if (root.end_time or 0) - (root.start_time or 0) >= self.slow_trace_ns:
+            return "kept_slow"
+        if trace_id & _TRACE_ID_MASK < self.sample_bound:
+            return "sampled"
+        return None
+
+    def _evict_overflow(self) -> None:
+        while self._pending_spans > self.max_pending_spans and self._pending:
+            _, spans = self._pending.popitem(last=False)
+            self._pending_spans -= len(spans)
+            TRACE_SPANS.labels(outcome="dropped").inc(len(spans))
+
+    def _delegate_queue_full(self) -> bool:
+        """Whether the batch span processor's bounded queue is at capacity."""
+        batch_processor = getattr(self.delegate, "_batch_processor", None)
+        queue = getattr(batch_processor, "_queue", None)
+        return (
+            queue is not None
+            and queue.maxlen is not None
+            and len(queue) >= queue.maxlen
+        )
+
+    def shutdown(self) -> None:
+        self.delegate.shutdown()
+
+    def force_flush(self, timeout_millis: int = 30000) -> bool:
+        return self.delegate.force_flush(timeout_millis)
+
+
+def _is_error(span: ReadableSpan) -> bool:
+    if span.status.status_code == StatusCode.ERROR:
+        return True
+    return (span.attributes or {}).get(OBSERVATION_LEVEL) == "ERROR"
+
+
+class TailSamplingTracerProvider(TracerProvider):
+    """Tracer provider that puts tail sampling in front of every exporter."""
+
+    def __init__(self, sample_rate: float, slow_trace_ms: int, max_pending_spans: int):
+        super().__init__()
+        self.sampling_processor: Optional[TailSamplingSpanProcessor] = None
+        self._sampling_args = (sample_rate, slow_trace_ms, max_pending_spans)
+
+    def add_span_processor(self, span_processor: SpanProcessor) -> None:
+        self.sampling_processor = TailSamplingSpanProcessor(
+            span_processor, *self._sampling_args
+        )
+        super().add_span_processor(self.sampling_processor)
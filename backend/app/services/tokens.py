@@ -0,0 +1,35 @@
+from functools import lru_cache
+from typing import Optional
+
+import tiktoken
+from app.core.logger import logger
+from langchain_core.documents import Document
+
+TOKEN_ENCODING = "cl100k_base"
+# Rough characters-per-token ratio used when the BPE ranks can't be loaded
+CHARS_PER_TOKEN = 4
+
+
+@lru_cache(maxsize=1)
+def get_encoding() -> Optional[tiktoken.Encoding]:
+    try:
+        return tiktoken.get_encoding(TOKEN_ENCODING)
+    except Exception as e:
+        logger.warning(f"Falling back to approximate token counts: {e}")
+        return None
+
+
+def count_tokens(text: str) -> int:
+    """Approximate the prompt token count of a piece of text."""
+    encoding = get_encoding()
+    if encoding is None:
+        return len(text) // CHARS_PER_TOKEN + 1
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def document_tokens(document: Document) -> int:
+    """Token count of a chunk, using the count cached at ingest time if any."""
+    token_count = document.metadata.get("token_count")
+    if token_count is None:
+        token_count = count_tokens(document.page_content)
+    return int(token_count)
@@ -1,6 +1,7 @@
 from abc import ABC, abstractmethod
-from typing import Any, List
+from typing import Any, Dict, List, Optional, Sequence
 
+from app.schemas.retrieval import RetrievalFilter
 from langchain_core.documents import Document
 from langchain_core.embeddings import Embeddings
 
@@ -18,11 +19,30 @@ class BaseVectorStore(ABC):
         """Add documents to the vector store"""
         pass
 
+    @abstractmethod
+    def add_embeddings(
+        self, documents: List[Document], embeddings: Sequence[Sequence[float]]
+    ) -> None:
+        """Add documents whose embeddings were computed elsewhere"""
+        pass
+
     @abstractmethod
     def delete(self, ids: List[str]) -> None:
         """Delete documents from the vector store"""
         pass
 
+    @abstractmethod
+    def delete_by_document_id(self, document_id: int) -> None:
+        """Delete every chunk of a document, raising if the delete fails"""
+        pass
+
+    @abstractmethod
+    def build_filter(
+        self, retrieval_filter: Optional[RetrievalFilter]
+    ) -> Dict[str, Any]:
+        """Compile a metadata filter into search keyword arguments"""
+        pass
+
     @abstractmethod
     def as_retriever(self, **kwargs: Any):
         """Return a retriever interface for the vector store"""
@@ -1,13 +1,14 @@
-from typing import Any, Dict, Type
+import importlib
+from typing import Any, Dict
 
 from langchain_core.embeddings import Embeddings
 
 from .base import BaseVectorStore
-from .milvus import MilvusVectorStore
 
 
 class VectorStoreFactory:
-    _stores: Dict[str, Type[BaseVectorStore]] = {"milvus": MilvusVectorStore}
+    # Store classes by provider, imported when first created
+    _stores: Dict[str, str] = {"milvus": f"{__package__}.milvus:MilvusVectorStore"}
 
     @classmethod
     def create(
@@ -17,8 +18,10 @@ class VectorStoreFactory:
         embedding_function: Embeddings,
         **kwargs: Any,
     ) -> BaseVectorStore:
-        store_class = cls._stores.get(store_type.lower())
-        if not store_class:
+        store_path = cls._stores.get(store_type.lower())
+        if not store_path:
             raise ValueError(f"Unsupported vector store provider: {store_type}")
 
+        module_name, class_name = store_path.split(":")
+        store_class = getattr(importlib.import_module(module_name), class_name)
         return store_class(collection_name, embedding_function, **kwargs)
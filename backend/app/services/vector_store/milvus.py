@@ -1,30 +1,182 @@
-from typing import Any, List, Tuple
+import json
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Sequence, Tuple
 
 from app.core.config import settings
 from app.core.logger import logger
+from app.core.metrics import VECTOR_SEARCH_SECONDS, observe
+from app.schemas.retrieval import RetrievalFilter
 from langchain_core.documents import Document
 from langchain_core.embeddings import Embeddings
 from langchain_core.retrievers import BaseRetriever
-from langchain_milvus import Milvus
+from langchain_milvus import BM25BuiltInFunction, Milvus
+from pymilvus import Collection, DataType, FieldSchema, MilvusClient
 
 from .base import BaseVectorStore
 
+DENSE_VECTOR_FIELD = "vector"
+SPARSE_VECTOR_FIELD = "sparse"
+
+# Chunk metadata promoted from the dynamic field to indexed scalar fields
+SCALAR_FILTER_FIELDS: Dict[str, Tuple[DataType, dict]] = {
+    "knowledge_base_id": (DataType.INT64, {}),
+    "document_id": (DataType.INT64, {}),
+    "source": (DataType.VARCHAR, {"max_length": 1024}),
+    "file_type": (DataType.VARCHAR, {"max_length": 32}),
+    "created_at": (DataType.INT64, {}),
+}
+
+
+def _literal(value: Any) -> str:
+    return json.dumps(value, ensure_ascii=False)
+
+
+def compile_filter_expr(retrieval_filter: Optional[RetrievalFilter]) -> Optional[str]:
+    """Compile a retrieval filter into a Milvus boolean expression."""
+    if retrieval_filter is None:
+        return None
+
+    clauses = []
+    if retrieval_filter.document_ids:
+        clauses.append(f"document_id in {_literal(retrieval_filter.document_ids)}")
+    if retrieval_filter.sources:
+        clauses.append(f"source in {_literal(retrieval_filter.sources)}")
+    if retrieval_filter.file_types:
+        file_types = [t.lower().lstrip(".") for t in retrieval_filter.file_types]
+        clauses.append(f"file_type in {_literal(file_types)}")
+    if retrieval_filter.created_after:
+        clauses.append(
+            f"created_at >= {int(retrieval_filter.created_after.timestamp())}"
+        )
+    if retrieval_filter.created_before:
+        clauses.append(
+            f"created_at <= {int(retrieval_filter.created_before.timestamp())}"
+        )
+    return " and ".join(clauses) or None
+
+
+class FilterableMilvus(Milvus):
+    """Milvus store keeping the filterable chunk metadata in indexed scalar fields.
+
+    Everything else still lands in the dynamic field. Collections created
+    before these fields existed fall back to filtering on the dynamic field.
+    Searches are timed; hybrid timings include embedding the query.
+    """
+
+    def _prepare_metadata_fields(
+        self, metadatas: Optional[list[dict]] = None
+    ) -> List[FieldSchema]:
+        fields = super()._prepare_metadata_fields(metadatas)
+        for name, (dtype, kwargs) in SCALAR_FILTER_FIELDS.items():
+            fields.append(FieldSchema(name, dtype, nullable=True, **kwargs))
+        return fields
+
+    def _collection_search(self, *args: Any, **kwargs: Any):
+        with observe(VECTOR_SEARCH_SECONDS, "vector_search", mode="dense"):
+            return super()._collection_search(*args, **kwargs)
+
+    def _collection_hybrid_search(self, *args: Any, **kwargs: Any):
+        with observe(VECTOR_SEARCH_SECONDS, "vector_search", mode="hybrid"):
+            return super()._collection_hybrid_search(*args, **kwargs)
+
+    async def _acollection_search(self, *args: Any, **kwargs: Any):
+        with observe(VECTOR_SEARCH_SECONDS, "vector_search", mode="dense"):
+            return await super()._acollection_search(*args, **kwargs)
+
+    async def _acollection_hybrid_search(self, *args: Any, **kwargs: Any):
+        with observe(VECTOR_SEARCH_SECONDS, "vector_search", mode="hybrid"):
+            return await super()._acollection_hybrid_search(*args, **kwargs)
+
+    def _create_index(self) -> None:
+        super()._create_index()
+        if not isinstance(self.col, Collection):
+            return
+        for field_name in SCALAR_FILTER_FIELDS:
+            if field_name in self.fields and not self._get_index(field_name):
+                self.col.create_index(
+                    field_name,
+                    index_params={"index_type": "INVERTED"},
+                    index_name=f"{field_name}_index",
+                    using=self.alias,
+                )
+
+
+@lru_cache(maxsize=1)
+def get_milvus_client() -> MilvusClient:
+    return MilvusClient(uri=settings.MILVUS_URI)
+
+
+@lru_cache(maxsize=None)
+def collection_supports_hybrid(collection_name: str) -> bool:
+    """Whether a collection is (or will be created) with a BM25 sparse field.
+
+    Collections created before hybrid search was introduced only have the dense
+    field, so they keep being searched dense-only. A collection's schema only
+    changes when it is dropped and created again, so the answer is cached.
+    """
+    client = get_milvus_client()
+    if not client.has_collection(collection_name):
+        return True
+    fields = client.describe_collection(collection_name).get("fields", [])
+    return any(field["name"] == SPARSE_VECTOR_FIELD for field in fields)
+
 
 class MilvusVectorStore(BaseVectorStore):
     def __init__(self, collection_name: str, embedding_function: Embeddings, **kwargs):
         self.collection_name = collection_name
-        self._store = Milvus(
+        self.hybrid = settings.HYBRID_SEARCH_ENABLED and collection_supports_hybrid(
+            collection_name
+        )
+        dense_weight = kwargs.get("dense_weight")
+        sparse_weight = kwargs.get("sparse_weight")
+        self.dense_weight: float = (
+            settings.HYBRID_DENSE_WEIGHT if dense_weight is None else dense_weight
+        )
+        self.sparse_weight: float = (
+            settings.HYBRID_SPARSE_WEIGHT if sparse_weight is None else sparse_weight
+        )
+
+        hybrid_kwargs = {}
+        if self.hybrid:
+            hybrid_kwargs = {
+                "builtin_function": BM25BuiltInFunction(
+                    output_field_names=SPARSE_VECTOR_FIELD
+                ),
+                "vector_field": [DENSE_VECTOR_FIELD, SPARSE_VECTOR_FIELD],
+            }
+        self._store = FilterableMilvus(
             embedding_function=embedding_function,
             connection_args={
                 "uri": settings.MILVUS_URI,
             },
             collection_name=collection_name,
             enable_dynamic_field=True,
+            **hybrid_kwargs,
         )
 
+    def _ranker_kwargs(self) -> dict:
+        """Fusion settings for the dense + BM25 hybrid search."""
+        if not self.hybrid:
+            return {}
+        if settings.HYBRID_RANKER.lower() == "rrf":
+            return {"ranker_type": "rrf", "ranker_params": {"k": settings.HYBRID_RRF_K}}
+        return {
+            "ranker_type": "weighted",
+            "ranker_params": {"weights": [self.dense_weight, self.sparse_weight]},
+        }
+
     def add_documents(self, documents: List[Document]) -> None:
         self._store.add_documents(documents)
 
+    def add_embeddings(
+        self, documents: List[Document], embeddings: Sequence[Sequence[float]]
+    ) -> None:
+        self._store.add_embeddings(
+            texts=[doc.page_content for doc in documents],
+            embeddings=embeddings,
+            metadatas=[doc.metadata for doc in documents],
+        )
+
     def delete(self, ids: List[str]) -> None:
         self._store.delete(ids)
 
@@ -40,19 +192,32 @@ class MilvusVectorStore(BaseVectorStore):
                 self.delete(ids_to_delete)
         except Exception as e:
             logger.error(f"Failed to delete document from Milvus: {e}")
+            raise
+
+    def build_filter(
+        self, retrieval_filter: Optional[RetrievalFilter]
+    ) -> Dict[str, Any]:
+        expr = compile_filter_expr(retrieval_filter)
+        return {"expr": expr} if expr else {}
 
     def as_retriever(self, **kwargs: Any) -> BaseRetriever:
-        return self._store.as_retriever(**kwargs)
+        search_kwargs = {**self._ranker_kwargs(), **kwargs.pop("search_kwargs", {})}
+        return self._store.as_retriever(search_kwargs=search_kwargs, **kwargs)
 
     def similarity_search(
         self, query: str, k: int = 4, **kwargs: Any
     ) -> List[Document]:
-        return self._store.similarity_search(query, k, **kwargs)
+        return self._store.similarity_search(
+            query, k, **{**self._ranker_kwargs(), **kwargs}
+        )
 
     def similarity_search_with_score(
         self, query: str, k: int = 4, **kwargs: Any
     ) -> List[Tuple[Document, float]]:
-        return self._store.similarity_search_with_score(query, k, **kwargs)
+        return self._store.similarity_search_with_score(
+            query, k, **{**self._ranker_kwargs(), **kwargs}
+        )
 
     def delete_collection(self) -> None:
         self._store._milvus_client.delete(self._store.collection_name)
+        collection_supports_hybrid.cache_clear()
@@ -0,0 +1,143 @@
+"""Measure backend cold start and write a comparable JSON report.
+
+Imports `main` in fresh interpreters with -X importtime, then starts a single
+uvicorn worker and times how long it takes to answer /health (serving) and
+/ready (warm-up finished), reading the per-phase breakdown from /metrics.
+
+    python -m benchmarks.cold_start --runs 5 --output cold_start.json
+
+The backend's environment (.env, database, Redis) should match the one being
+compared. Optional warm-up hooks that fail still count as finished, but the
+worker only becomes ready once the guardrails load. Compare two reports with
+benchmarks/compare.py.
+"""
+
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, List, Optional
+
+import httpx
+from prometheus_client.parser import text_string_to_metric_families
+
+from benchmarks.run import git_revision
+
+STARTUP_METRIC = "rag_startup_seconds"
+IMPORT_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def profile_imports() -> Dict[str, float]:
+    """Cumulative import seconds of every top-level module imported by main."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    modules = {}
+    for line in result.stderr.splitlines():
+        match = IMPORT_LINE.match(line)
+        if match:
+            modules[match.group(4)] = int(match.group(2)) / 1e6
+    return modules
+
+
+def wait_for(url: str, deadline: float, started: float) -> Optional[float]:
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(url, timeout=1).status_code == 200:
+                return round(time.monotonic() - started, 2)
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.05)
+    return None
+
+
+def startup_phases(metrics_url: str) -> Dict[str, float]:
+    text = httpx.get(metrics_url, timeout=5).text
+    return {
+        sample.labels["phase"]: round(sample.value, 2)
+        for family in text_string_to_metric_families(text)
+        for sample in family.samples
+        if sample.name == STARTUP_METRIC
+    }
+
+
+def measure_server(port: int, timeout: float) -> Dict:
+    base_url = f"http://127.0.0.1:{port}"
+    started = time.monotonic()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port)],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        deadline = started + timeout
+        serving = wait_for(f"{base_url}/health", deadline, started)
+        ready = wait_for(f"{base_url}/ready", deadline, started)
+        phases = startup_phases(f"{base_url}/metrics") if serving else {}
+    finally:
+        server.terminate()
+        server.wait()
+    return {"serving_seconds": serving, "ready_seconds": ready, "phases": phases}
+
+
+def median_of(runs: List[Dict], key: str) -> Optional[float]:
+    values = [run[key] for run in runs if run[key] is not None]
+    return round(statistics.median(values), 2) if values else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--timeout", type=float, default=120)
+    parser.add_argument("--top", type=int, default=15, help="Slowest imports shown")
+    parser.add_argument("--label", help="Name of the run, defaults to the git revision")
+    parser.add_argument("--output", default="cold_start.json")
+    args = parser.parse_args()
+
+    # Metrics of the measured worker must not mix with a previous run's
+    os.environ.pop("PROMETHEUS_MULTIPROC_DIR", None)
+
+    imports: List[Dict[str, float]] = [profile_imports() for _ in range(args.runs)]
+    servers = [measure_server(args.port, args.timeout) for _ in range(args.runs)]
+
+    # Top-level packages only, their submodules are included in the totals
+    packages = sorted(
+        (
+            (name, seconds)
+            for name, seconds in imports[-1].items()
+            if "." not in name and name != "main"
+        ),
+        key=lambda item: item[1],
+        reverse=True,
+    )
+    report = {
+        "label": args.label or git_revision(),
+        "timestamp": int(time.time()),
+        "config": {"runs": args.runs},
+        "cold_start": {
+            "import_seconds": round(
+                statistics.median(run.get("main", 0.0) for run in imports), 2
+            ),
+            "serving_seconds": median_of(servers, "serving_seconds"),
+            "ready_seconds": median_of(servers, "ready_seconds"),
+            "phases": servers[-1]["phases"],
+        },
+        "slowest_imports": {
+            name: round(seconds, 3) for name, seconds in packages[: args.top]
+        },
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
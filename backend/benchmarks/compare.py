@@ -0,0 +1,82 @@
+"""Compare two benchmark reports and flag regressions.
+
+    python -m benchmarks.compare baseline.json current.json --threshold 10
+
+Throughput metrics (`*_per_second`) regress when they drop, everything else
+(latencies, lag, memory) when it grows. Exits with status 1 if any metric
+regressed by more than --threshold percent.
+"""
+
+import argparse
+import json
+import sys
+from typing import Dict, Optional
+
+# Sections that describe the run rather than measure it
+SKIPPED = ("label", "timestamp", "config", "slowest_imports")
+
+
+def flatten(report: Dict, prefix: str = "") -> Dict[str, float]:
+    values = {}
+    for key, value in report.items():
+        if not prefix and key in SKIPPED:
+            continue
+        name = f"{prefix}.{key}" if prefix else key
+        if isinstance(value, dict):
+            values.update(flatten(value, name))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            values[name] = float(value)
+    return values
+
+
+def change(baseline: float, current: float) -> Optional[float]:
+    if baseline == 0:
+        return None
+    return (current - baseline) / baseline * 100
+
+
+def is_regression(name: str, delta: float, threshold: float) -> bool:
+    if name.endswith("_per_second"):
+        return delta < -threshold
+    if name.endswith((".requests", ".documents", ".pages")):
+        return False
+    return delta > threshold
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("baseline")
+    parser.add_argument("current")
+    parser.add_argument("--threshold", type=float, default=10.0)
+    args = parser.parse_args()
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+    before, after = flatten(baseline), flatten(current)
+
+    print(
+        f"{'metric':<48} {baseline.get('label')!s:>12} {current.get('label')!s:>12} {'change':>9}"
+    )
+    regressions = []
+    for name in sorted(before.keys() & after.keys()):
+        delta = change(before[name], after[name])
+        flag = ""
+        if delta is not None and is_regression(name, delta, args.threshold):
+            regressions.append(name)
+            flag = "  <- regression"
+        delta_text = f"{delta:+.1f}%" if delta is not None else "n/a"
+        print(
+            f"{name:<48} {before[name]:>12.2f} {after[name]:>12.2f} {delta_text:>9}{flag}"
+        )
+
+    if regressions:
+        print(
+            f"\n{len(regressions)} metric(s) regressed by more than {args.threshold}%"
+        )
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
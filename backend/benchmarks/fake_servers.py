@@ -0,0 +1,211 @@
+"""Fake OpenAI-compatible LLM and embedding server for benchmarks.
+
+Streams chat completions with a fixed time to first token and token rate and
+returns deterministic embeddings, so backend timings can be measured without
+a GPU or an API key. Point the backend at it with
+
+    CHAT_PROVIDER=gemini EMBEDDING_PROVIDER=vllm MODEL_BASE_URL=http://localhost:4000
+
+(the guardrails config calls http://litellm:4000, so map `litellm` to this
+host as well), then start it with
+
+    python -m benchmarks.fake_servers --port 4000 --ttft-ms 300 --tokens-per-second 50
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import time
+import uuid
+from dataclasses import dataclass
+from typing import List, Optional, Union
+
+import numpy as np
+import uvicorn
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+
+WORDS = (
+    "the answer is based on the retrieved context and cites each source "
+    "where the information was found in the documents"
+).split()
+
+
+@dataclass
+class FakeModelConfig:
+    ttft_ms: float = 300.0
+    tokens_per_second: float = 50.0
+    output_tokens: int = 128
+    embedding_dim: int = 768
+    embedding_latency_ms: float = 10.0
+
+
+config = FakeModelConfig()
+app = FastAPI(title="Fake model server")
+
+
+class ChatCompletionRequest(BaseModel):
+    model: str = "fake"
+    messages: List[dict]
+    stream: bool = False
+    max_tokens: Optional[int] = None
+    stream_options: Optional[dict] = None
+
+
+class EmbeddingRequest(BaseModel):
+    model: str = "fake"
+    # OpenAI clients may send pre-tokenized input
+    input: Union[str, List[str], List[int], List[List[int]]]
+
+    def texts(self) -> List[str]:
+        if isinstance(self.input, str):
+            return [self.input]
+        if self.input and isinstance(self.input[0], int):
+            return [str(self.input)]
+        return [item if isinstance(item, str) else str(item) for item in self.input]
+
+
+def prompt_tokens(messages: List[dict]) -> int:
+    text = " ".join(str(m.get("content", "")) for m in messages)
+    return len(text) // 4 + 1
+
+
+def completion_tokens(request: ChatCompletionRequest) -> int:
+    return min(request.max_tokens or config.output_tokens, config.output_tokens)
+
+
+def usage(request: ChatCompletionRequest) -> dict:
+    prompt, completion = prompt_tokens(request.messages), completion_tokens(request)
+    return {
+        "prompt_tokens": prompt,
+        "completion_tokens": completion,
+        "total_tokens": prompt + completion,
+    }
+
+
+def chunk(completion_id: str, model: str, delta: dict, finish_reason=None) -> str:
+    payload = {
+        "id": completion_id,
+        "object": "chat.completion.chunk",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+    }
+    return f"data: {json.dumps(payload)}\n\n"
+
+
+async def stream_completion(request: ChatCompletionRequest):
+    completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+    await asyncio.sleep(config.ttft_ms / 1000)
+    yield chunk(completion_id, request.model, {"role": "assistant", "content": ""})
+
+    interval = 1 / config.tokens_per_second
+    started = time.perf_counter()
+    for i in range(completion_tokens(request)):
+        # Sleep against the schedule so slow scheduling doesn't lower the rate
+        delay = started + i * interval - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        content = WORDS[i % len(WORDS)] + " "
+        yield chunk(completion_id, request.model, {"content": content})
+
+    yield chunk(completion_id, request.model, {}, finish_reason="stop")
+    if (request.stream_options or {}).get("include_usage"):
+        payload = {
+            "id": completion_id,
+            "object": "chat.completion.chunk",
+            "created": int(time.time()),
+            "model": request.model,
+            "choices": [],
+            "usage": usage(request),
+        }
+        yield f"data: {json.dumps(payload)}\n\n"
+    yield "data: [DONE]\n\n"
+
+
+@app.post("/chat/completions")
+@app.post("/v1/chat/completions")
+async def chat_completions(request: ChatCompletionRequest):
+    if request.stream:
+        return StreamingResponse(
+            stream_completion(request), media_type="text/event-stream"
+        )
+
+    tokens = completion_tokens(request)
+    await asyncio.sleep(config.ttft_ms / 1000 + tokens / config.tokens_per_second)
+    content = " ".join(WORDS[i % len(WORDS)] for i in range(tokens))
+    return {
+        "id": f"chatcmpl-{uuid.uuid4().hex}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": request.model,
+        "choices": [
+            {
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop",
+            }
+        ],
+        "usage": usage(request),
+    }
+
+
+def embed(text: str) -> List[float]:
+    """Deterministic unit vector so identical texts always embed identically."""
+    seed = int.from_bytes(hashlib.sha256(text.encode()).digest()[:8], "little")
+    vector = np.random.default_rng(seed).standard_normal(config.embedding_dim)
+    return (vector / np.linalg.norm(vector)).tolist()
+
+
+@app.post("/embeddings")
+@app.post("/v1/embeddings")
+async def embeddings(request: EmbeddingRequest):
+    texts = request.texts()
+    await asyncio.sleep(config.embedding_latency_ms / 1000)
+    return {
+        "object": "list",
+        "model": request.model,
+        "data": [
+            {"object": "embedding", "index": i, "embedding": embed(text)}
+            for i, text in enumerate(texts)
+        ],
+        "usage": {
+            "prompt_tokens": sum(len(t) // 4 + 1 for t in texts),
+            "total_tokens": sum(len(t) // 4 + 1 for t in texts),
+        },
+    }
+
+
+@app.get("/models")
+@app.get("/v1/models")
+async def models():
+    return {"object": "list", "data": [{"id": "fake", "object": "model"}]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=4000)
+    parser.add_argument("--ttft-ms", type=float, default=config.ttft_ms)
+    parser.add_argument(
+        "--tokens-per-second", type=float, default=config.tokens_per_second
+    )
+    parser.add_argument("--output-tokens", type=int, default=config.output_tokens)
+    parser.add_argument("--embedding-dim", type=int, default=config.embedding_dim)
+    parser.add_argument(
+        "--embedding-latency-ms", type=float, default=config.embedding_latency_ms
+    )
+    args = parser.parse_args()
+
+    config.ttft_ms = args.ttft_ms
+    config.tokens_per_second = args.tokens_per_second
+    config.output_tokens = args.output_tokens
+    config.embedding_dim = args.embedding_dim
+    config.embedding_latency_ms = args.embedding_latency_ms
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,367 @@
+"""Load test the chat and ingestion endpoints and write a comparable JSON report.
+
+Runs against a backend pointed at the fake model server (see
+benchmarks/fake_servers.py) and a local Milvus (or Milvus Lite via a file
+MILVUS_URI). Documents are uploaded and processed into a fresh knowledge base,
+then chat questions are streamed against it at the requested concurrency.
+
+    python -m benchmarks.run --documents ./docs --chat-requests 200 \\
+        --chat-concurrency 16 --output bench.json
+
+The report holds TTFT and latency percentiles, token throughput, ingestion
+pages/s, per-stage timings and the server's event loop lag and RSS, sampled
+from /metrics. Compare two reports with benchmarks/compare.py.
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import httpx
+from prometheus_client.parser import text_string_to_metric_families
+
+LAG_METRIC = "rag_event_loop_lag_seconds"
+RSS_METRIC = "rag_process_resident_memory_bytes"
+CONTEXT_SEPARATOR = "__LLM_RESPONSE__"
+
+
+def percentile(values: List[float], p: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = max(math.ceil(p / 100 * len(ordered)) - 1, 0)
+    return round(ordered[index], 2)
+
+
+def distribution(values: List[float]) -> Dict[str, Optional[float]]:
+    return {
+        "p50": percentile(values, 50),
+        "p95": percentile(values, 95),
+        "p99": percentile(values, 99),
+        "max": round(max(values), 2) if values else None,
+    }
+
+
+def count_pages(path: Path) -> int:
+    if path.suffix.lower() != ".pdf":
+        return 1
+    from pypdf import PdfReader
+
+    return len(PdfReader(str(path)).pages)
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"],
+            text=True,
+            stderr=subprocess.DEVNULL,
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class ServerSampler:
+    """Poll /metrics for resident memory and event loop lag during the run."""
+
+    def __init__(self, client: httpx.AsyncClient, url: str, interval: float = 1.0):
+        self.client = client
+        self.url = url
+        self.interval = interval
+        self.rss: List[float] = []
+        self.lag_start: Dict[float, float] = {}
+        self.lag_end: Dict[float, float] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    async def scrape(self) -> Dict[str, Dict]:
+        response = await self.client.get(self.url)
+        response.raise_for_status()
+        buckets, rss = {}, 0.0
+        for family in text_string_to_metric_families(response.text):
+            for sample in family.samples:
+                if sample.name == f"{LAG_METRIC}_bucket":
+                    bound = float(sample.labels["le"])
+                    buckets[bound] = buckets.get(bound, 0.0) + sample.value
+                elif sample.name == RSS_METRIC:
+                    rss += sample.value
+        return {"buckets": buckets, "rss": rss}
+
+    async def start(self):
+        try:
+            self.lag_start = (await self.scrape())["buckets"]
+        except httpx.HTTPError as e:
+            print(f"Server metrics unavailable: {e}", file=sys.stderr)
+            return
+        self._task = asyncio.create_task(self._poll())
+
+    async def _poll(self):
+        while True:
+            try:
+                snapshot = await self.scrape()
+                self.rss.append(snapshot["rss"])
+                self.lag_end = snapshot["buckets"]
+            except httpx.HTTPError:
+                pass
+            await asyncio.sleep(self.interval)
+
+    async def stop(self) -> Dict:
+        if self._task is None:
+            return {}
+        self._task.cancel()
+        snapshot = await self.scrape()
+        self.rss.append(snapshot["rss"])
+        self.lag_end = snapshot["buckets"]
+        return {
+            "event_loop_lag_ms": {
+                f"p{q}": self._lag_quantile(q / 100) for q in (50, 95, 99)
+            },
+            "rss_bytes": {"max": max(self.rss), "end": self.rss[-1]},
+        }
+
+    def _lag_quantile(self, q: float) -> Optional[float]:
+        """histogram_quantile over the lag observed between start and end."""
+        bounds = sorted(self.lag_end)
+        counts = [self.lag_end[b] - self.lag_start.get(b, 0.0) for b in bounds]
+        if not counts or counts[-1] <= 0:
+            return None
+        rank = q * counts[-1]
+        previous_bound, previous_count = 0.0, 0.0
+        for bound, count in zip(bounds, counts):
+            if count >= rank:
+                if math.isinf(bound):
+                    return round(previous_bound * 1000, 2)
+                share = (rank - previous_count) / max(count - previous_count, 1e-9)
+                value = previous_bound + (bound - previous_bound) * share
+                return round(value * 1000, 2)
+            previous_bound, previous_count = bound, count
+        return None
+
+
+async def login(client: httpx.AsyncClient, username: str, password: str):
+    response = await client.post(
+        "/auth/token", data={"username": username, "password": password}
+    )
+    response.raise_for_status()
+    client.headers["Authorization"] = f"Bearer {response.json()['access_token']}"
+
+
+async def ingest_document(
+    client: httpx.AsyncClient, kb_id: int, path: Path, poll_interval: float
+) -> Dict:
+    started = time.perf_counter()
+    with open(path, "rb") as f:
+        response = await client.post(
+            f"/knowledge-base/{kb_id}/documents/upload",
+            files={"files": (path.name, f)},
+        )
+    response.raise_for_status()
+    response = await client.post(
+        f"/knowledge-base/{kb_id}/documents/process", json=response.json()
+    )
+    response.raise_for_status()
+    task_ids = [str(task["task_id"]) for task in response.json()["tasks"]]
+
+    status = "completed"
+    while task_ids:
+        await asyncio.sleep(poll_interval)
+        response = await client.get(
+            f"/knowledge-base/{kb_id}/documents/tasks",
+            params={"task_ids": ",".join(task_ids)},
+        )
+        response.raise_for_status()
+        tasks = response.json()
+        if any(task["status"] == "error" for task in tasks.values()):
+            status = "error"
+            break
+        if all(task["status"] == "completed" for task in tasks.values()):
+            break
+    return {"seconds": time.perf_counter() - started, "status": status}
+
+
+async def run_ingestion(
+    client: httpx.AsyncClient, kb_id: int, files: List[Path], args
+) -> Dict:
+    semaphore = asyncio.Semaphore(args.ingest_concurrency)
+
+    async def ingest(path: Path):
+        async with semaphore:
+            return await ingest_document(client, kb_id, path, args.poll_interval)
+
+    pages = sum(count_pages(path) for path in files)
+    started = time.perf_counter()
+    results = await asyncio.gather(*(ingest(path) for path in files))
+    elapsed = time.perf_counter() - started
+    return {
+        "documents": len(files),
+        "pages": pages,
+        "errors": sum(r["status"] != "completed" for r in results),
+        "seconds": round(elapsed, 2),
+        "pages_per_second": round(pages / elapsed, 2),
+        "document_latency_ms": distribution([r["seconds"] * 1000 for r in results]),
+    }
+
+
+async def chat_once(client: httpx.AsyncClient, chat_id: int, question: str) -> Dict:
+    result = {"ttft": None, "tokens": 0, "error": None, "timings": None}
+    started = time.perf_counter()
+    async with client.stream(
+        "POST",
+        f"/chat/{chat_id}/messages",
+        json={"messages": [{"role": "user", "content": question}], "debug": True},
+    ) as response:
+        response.raise_for_status()
+        async for line in response.aiter_lines():
+            prefix, _, payload = line.partition(":")
+            if prefix == "0":
+                # Text parts are micro-batched, so the context may share a
+                # part with the first answer tokens
+                text = json.loads(payload).split(CONTEXT_SEPARATOR)[-1]
+                if not text:
+                    continue
+                if result["ttft"] is None:
+                    result["ttft"] = time.perf_counter() - started
+                result["tokens"] += 1
+            elif prefix == "2":
+                for item in json.loads(payload):
+                    if item.get("type") == "timings":
+                        result["timings"] = item
+            elif prefix == "3":
+                result["error"] = json.loads(payload)
+    result["latency"] = time.perf_counter() - started
+    if result["timings"]:
+        result["tokens"] = result["timings"]["tokens"]["output"] or result["tokens"]
+    return result
+
+
+async def run_chat(client: httpx.AsyncClient, kb_id: int, args) -> Dict:
+    response = await client.post(
+        "/chat", json={"title": "benchmark", "knowledge_base_ids": [kb_id]}
+    )
+    response.raise_for_status()
+    chat_id = response.json()["id"]
+    semaphore = asyncio.Semaphore(args.chat_concurrency)
+
+    async def ask(i: int):
+        async with semaphore:
+            # Vary the question so the LLM cache doesn't answer from Redis
+            try:
+                return await chat_once(client, chat_id, f"{args.question} (#{i})")
+            except httpx.HTTPError as e:
+                return {"error": str(e)}
+
+    started = time.perf_counter()
+    results = await asyncio.gather(*(ask(i) for i in range(args.chat_requests)))
+    elapsed = time.perf_counter() - started
+
+    ok = [r for r in results if not r.get("error")]
+    stages: Dict[str, List[float]] = {}
+    for r in ok:
+        for stage, ms in ((r.get("timings") or {}).get("stages_ms") or {}).items():
+            stages.setdefault(stage, []).append(ms)
+    tokens = sum(r["tokens"] for r in ok)
+    return {
+        "requests": len(results),
+        "errors": len(results) - len(ok),
+        "seconds": round(elapsed, 2),
+        "requests_per_second": round(len(ok) / elapsed, 2),
+        "tokens_per_second": round(tokens / elapsed, 2),
+        "ttft_ms": distribution([r["ttft"] * 1000 for r in ok if r["ttft"]]),
+        "latency_ms": distribution([r["latency"] * 1000 for r in ok]),
+        "stages_ms": {stage: distribution(v) for stage, v in sorted(stages.items())},
+    }
+
+
+def document_files(paths: List[str]) -> List[Path]:
+    files = []
+    for path in map(Path, paths):
+        files.extend(
+            sorted(p for p in path.rglob("*") if p.is_file())
+            if path.is_dir()
+            else [path]
+        )
+    return files
+
+
+async def main_async(args) -> Dict:
+    timeout = httpx.Timeout(args.timeout, connect=10)
+    limits = httpx.Limits(
+        max_connections=max(args.chat_concurrency, args.ingest_concurrency) + 4
+    )
+    async with httpx.AsyncClient(
+        base_url=args.base_url, timeout=timeout, limits=limits
+    ) as client:
+        await login(client, args.username, args.password)
+        sampler = ServerSampler(client, args.metrics_url)
+        await sampler.start()
+
+        report = {
+            "label": args.label or git_revision(),
+            "timestamp": int(time.time()),
+            "config": {
+                "chat_requests": args.chat_requests,
+                "chat_concurrency": args.chat_concurrency,
+                "ingest_concurrency": args.ingest_concurrency,
+            },
+        }
+        kb_id = args.kb_id
+        files = document_files(args.documents)
+        if files:
+            if kb_id is None:
+                response = await client.post(
+                    "/knowledge-base",
+                    json={"name": f"benchmark-{report['timestamp']}"},
+                )
+                response.raise_for_status()
+                kb_id = response.json()["id"]
+            report["ingestion"] = await run_ingestion(client, kb_id, files, args)
+        if args.chat_requests:
+            if kb_id is None:
+                raise SystemExit("--kb-id or --documents is required for chat")
+            report["chat"] = await run_chat(client, kb_id, args)
+
+        report["server"] = await sampler.stop()
+        return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--base-url", default=os.getenv("BASE_URL", "http://localhost:8000/api/v1")
+    )
+    parser.add_argument(
+        "--metrics-url",
+        default=os.getenv("METRICS_URL", "http://localhost:8000/metrics"),
+    )
+    parser.add_argument("--username", default=os.getenv("USERNAME", "superadmin"))
+    parser.add_argument("--password", default=os.getenv("PASSWORD", "superadmin123"))
+    parser.add_argument(
+        "--documents", nargs="*", default=[], help="Files or folders to ingest"
+    )
+    parser.add_argument(
+        "--kb-id", type=int, help="Chat against an existing knowledge base"
+    )
+    parser.add_argument("--ingest-concurrency", type=int, default=4)
+    parser.add_argument("--poll-interval", type=float, default=0.5)
+    parser.add_argument("--chat-requests", type=int, default=100)
+    parser.add_argument("--chat-concurrency", type=int, default=8)
+    parser.add_argument("--question", default="What are the main topics covered?")
+    parser.add_argument("--timeout", type=float, default=300)
+    parser.add_argument("--label", help="Name of the run, defaults to the git revision")
+    parser.add_argument("--output", default="benchmark.json")
+    args = parser.parse_args()
+
+    report = asyncio.run(main_async(args))
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -22,5 +22,11 @@ else
   exit 1
 fi
 
+echo "Preparing metrics directory..."
+# Workers share metrics through files so /metrics reports all of them
+export PROMETHEUS_MULTIPROC_DIR=${PROMETHEUS_MULTIPROC_DIR:-/tmp/prometheus}
+rm -rf "$PROMETHEUS_MULTIPROC_DIR"
+mkdir -p "$PROMETHEUS_MULTIPROC_DIR"
+
 echo "Starting application..."
 uvicorn main:app --host 0.0.0.0 --port 8000 --workers 4
\ No newline at end of file
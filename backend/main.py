@@ -1,27 +1,120 @@
+import asyncio
+import importlib
 from contextlib import asynccontextmanager
 
 import redis
 from app.api.main import api_router
+from app.core.cache import cache_bus, close_cache_clients, get_redis
 from app.core.config import settings
-from fastapi import FastAPI
-from langchain.globals import set_llm_cache
-from langchain_community.cache import RedisCache
-from nemoguardrails import RailsConfig
-from nemoguardrails.integrations.langchain.runnable_rails import RunnableRails
+from app.core.metrics import monitor_event_loop, render_metrics
+from app.core.startup import startup_profile, warm_up
+from app.db.session import async_engine
+from app.prompts.manager import prompt_manager
+from app.services.embeddings.embedding_factory import EmbeddingFactory
+from app.services.http_clients import close_http_clients
+from app.services.langfuse_tracing import langfuse_tracing
+from app.services.llm.router import model_router
+from app.services.reranker.factory import RerankerFactory
+from fastapi import FastAPI, Response
+from fastapi.responses import JSONResponse
+from prometheus_client import CONTENT_TYPE_LATEST
+from sqlalchemy import text
 
 
-@asynccontextmanager
-async def lifespan(app: FastAPI):
+def load_rails():
+    # nemoguardrails is only imported here, off the startup path
+    from nemoguardrails import RailsConfig
+    from nemoguardrails.integrations.langchain.runnable_rails import RunnableRails
+
     config = RailsConfig.from_path("app/nemoguard")
-    app.state.llm_rails = RunnableRails(
-        config=config, verbose=True, output_key="answer"
-    )
+    # Without routing the model set in app/nemoguard/config.yml is kept
+    if model_router.enabled:
+        for model in config.models:
+            if model.type == "main":
+                model.model = model_router.model_for("guardrails")
+    return RunnableRails(config=config, verbose=True, output_key="answer")
+
+
+async def warm_rails(app: FastAPI):
+    app.state.llm_rails = await asyncio.to_thread(load_rails)
+
+
+async def warm_database():
+    async def connect():
+        async with async_engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+
+    # Fill the pool so the first requests don't pay for connection setup
+    await asyncio.gather(*(connect() for _ in range(async_engine.pool.size())))
+
+
+async def warm_cache():
+    # Listen for cache invalidations broadcast by the other workers
+    await asyncio.to_thread(cache_bus.start)
+    await asyncio.to_thread(get_redis().ping)
+
+
+def load_llm_cache():
+    # langchain_community is only imported here, off the startup path
+    from app.services.llm.cache import InstrumentedRedisCache
+    from langchain.globals import set_llm_cache
+
     set_llm_cache(
-        RedisCache(
+        InstrumentedRedisCache(
             redis_=redis.Redis(host=settings.REDIS_HOST, port=settings.REDIS_PORT)
         )
     )
+
+
+def load_models():
+    EmbeddingFactory.create()
+    model_router.llm_for("answer")
+    importlib.import_module("app.services.vector_store.milvus")
+    # The chat chain's modules, imported lazily by generate_response
+    importlib.import_module("langchain.chains.retrieval")
+    importlib.import_module("langchain.chains.history_aware_retriever")
+    importlib.import_module("langchain.retrievers")
+
+
+def load_reranker():
+    reranker = RerankerFactory.create()
+    if reranker is not None:
+        reranker.warm_up()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Time from process start to here is mostly spent importing
+    startup_profile.mark("boot")
+    with startup_profile.phase("lifespan"):
+        app.state.loop_monitor = asyncio.create_task(monitor_event_loop())
+        # Connect and load in the background instead of holding up startup;
+        # heavy imports run one after another so they don't contend
+        warm_up.add("rails", lambda: warm_rails(app), required=True)
+        warm_up.add("models", lambda: asyncio.to_thread(load_models), after=["rails"])
+        warm_up.add(
+            "reranker", lambda: asyncio.to_thread(load_reranker), after=["models"]
+        )
+        warm_up.add(
+            "tracing",
+            lambda: asyncio.to_thread(langfuse_tracing.start),
+            after=["rails"],
+        )
+        warm_up.add(
+            "llm_cache", lambda: asyncio.to_thread(load_llm_cache), after=["rails"]
+        )
+        warm_up.add("prompts", prompt_manager.warm_up, after=["tracing"])
+        warm_up.add("database", warm_database)
+        warm_up.add("cache", warm_cache)
+        warm_up.start()
     yield
+    await warm_up.stop()
+    app.state.loop_monitor.cancel()
+    # Export whatever is still queued before the process exits
+    langfuse_tracing.flush()
+    await close_http_clients()
+    cache_bus.stop()
+    await close_cache_clients()
 
 
 app = FastAPI(
@@ -32,3 +125,20 @@ app = FastAPI(
 )
 
 app.include_router(api_router, prefix=settings.API_V1_STR)
+
+
+@app.get("/health", include_in_schema=False)
+def health():
+    return {"status": "ok"}
+
+
+@app.get("/ready", include_in_schema=False)
+def ready():
+    # Ready once warm-up finished and the guardrails are loaded
+    status = {"ready": warm_up.ready, "warm_up": warm_up.status()}
+    return JSONResponse(status, status_code=200 if warm_up.ready else 503)
+
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    return Response(render_metrics(), media_type=CONTENT_TYPE_LATEST)
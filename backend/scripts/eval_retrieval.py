@@ -0,0 +1,73 @@
+"""Evaluate retrieval quality over a JSONL query set.
+
+Each input line is a JSON object with a `query` and optional `id`,
+`gold_chunk_ids` and `filters`. Per-query results are written to --output and
+the recall@k / MRR / latency summary is printed at the end.
+
+    python scripts/eval_retrieval.py queries.jsonl --kb-id 1 --top-k 5
+"""
+
+import argparse
+import json
+import os
+import sys
+
+import requests
+
+
+def login(base_url: str, username: str, password: str) -> str:
+    response = requests.post(
+        f"{base_url}/auth/token",
+        data={"username": username, "password": password},
+    )
+    response.raise_for_status()
+    return response.json()["access_token"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("queries", help="JSONL file with one query per line")
+    parser.add_argument("--kb-id", type=int, required=True)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--output", default="retrieval_results.jsonl")
+    parser.add_argument(
+        "--base-url", default=os.getenv("BASE_URL", "http://localhost/api/v1")
+    )
+    parser.add_argument("--username", default=os.getenv("USERNAME", "superadmin"))
+    parser.add_argument("--password", default=os.getenv("PASSWORD", "superadmin123"))
+    args = parser.parse_args()
+
+    token = login(args.base_url, args.username, args.password)
+    summary = None
+    with open(args.queries, "rb") as queries, open(args.output, "w") as output:
+        response = requests.post(
+            f"{args.base_url}/knowledge-base/test-retrieval/batch",
+            params={
+                "kb_id": args.kb_id,
+                "top_k": args.top_k,
+                "batch_size": args.batch_size,
+                "concurrency": args.concurrency,
+            },
+            files={"file": (os.path.basename(args.queries), queries)},
+            headers={"Authorization": f"Bearer {token}"},
+            stream=True,
+        )
+        response.raise_for_status()
+        for i, line in enumerate(response.iter_lines(), 1):
+            if not line:
+                continue
+            result = json.loads(line)
+            if "summary" in result:
+                summary = result["summary"]
+                continue
+            output.write(line.decode() + "\n")
+            if i % 100 == 0:
+                print(f"Evaluated {i} queries", file=sys.stderr)
+
+    print(json.dumps(summary, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,7 @@
+import os
+import sys
+from pathlib import Path
+
+# Settings require an API key; tests never call a model
+os.environ.setdefault("API_KEY", "test")
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
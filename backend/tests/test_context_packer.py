@@ -0,0 +1,49 @@
+from app.services.context_packer import pack_documents
+from langchain_core.documents import Document
+
+
+def chunk(source: str, index: int, text: str, **metadata) -> Document:
+    return Document(
+        page_content=text,
+        metadata={
+            "source": source,
+            "chunk_index": index,
+            "chunk_id": f"{source}#{index}",
+            "token_count": 1,
+            **metadata,
+        },
+    )
+
+
+def test_merges_neighbours_of_the_same_document():
+    packed = pack_documents(
+        [
+            chunk("a.pdf", 4, "second", document_id=1),
+            chunk("a.pdf", 3, "first ", document_id=1),
+        ],
+        token_budget=100,
+    )
+
+    assert [doc.page_content for doc in packed] == ["first second"]
+    assert packed[0].metadata["chunk_ids"] == ["a.pdf#3", "a.pdf#4"]
+
+
+def test_merges_by_source_without_document_id():
+    packed = pack_documents(
+        [chunk("a.pdf", 3, "a3 "), chunk("b.pdf", 4, "b4"), chunk("a.pdf", 4, "a4")],
+        token_budget=100,
+    )
+
+    assert [doc.page_content for doc in packed] == ["a3 a4", "b4"]
+
+
+def test_does_not_merge_chunks_of_different_documents():
+    packed = pack_documents(
+        [
+            chunk("a.pdf", 3, "a3", document_id=1),
+            chunk("a.pdf", 4, "a4", document_id=2),
+        ],
+        token_budget=100,
+    )
+
+    assert len(packed) == 2
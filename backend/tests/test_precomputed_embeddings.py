@@ -0,0 +1,42 @@
+from typing import List
+
+from app.services.embeddings.precomputed import PrecomputedEmbeddings
+from langchain_core.embeddings import Embeddings
+
+
+class PrefixedEmbeddings(Embeddings):
+    """Embeds queries and documents differently, like instruction-tuned models."""
+
+    def __init__(self):
+        self.query_calls: List[str] = []
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [[0.0, float(len(text))] for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        self.query_calls.append(text)
+        return [1.0, float(len(text))]
+
+
+def test_precompute_embeds_queries_with_the_query_path():
+    model = PrefixedEmbeddings()
+    embeddings = PrecomputedEmbeddings(model)
+
+    embeddings.precompute(["a", "bb", "a"])
+
+    assert model.query_calls == ["a", "bb"]
+    assert embeddings.embed_query("bb") == model.embed_query("bb")
+    assert embeddings.embed_query("bb") != model.embed_documents(["bb"])[0]
+
+
+def test_embed_query_serves_cached_vectors():
+    model = PrefixedEmbeddings()
+    embeddings = PrecomputedEmbeddings(model)
+    embeddings.precompute(["a"])
+
+    embeddings.embed_query("a")
+    assert model.query_calls == ["a"]
+
+    embeddings.discard(["a"])
+    embeddings.embed_query("a")
+    assert model.query_calls == ["a", "a"]
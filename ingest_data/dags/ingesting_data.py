@@ -1,19 +1,53 @@
+import os
 import sys
+from datetime import timedelta
 from pathlib import Path
 
 from airflow import DAG
+from airflow.decorators import task_group
 from airflow.operators.python import PythonOperator
 
 # Add plugins directory to Python path
 AIRFLOW_HOME = Path("/opt/airflow")
 sys.path.append(str(AIRFLOW_HOME))
 from plugins.jobs.download import download_arxiv_papers
-from plugins.jobs.embed_and_store import embed_and_store
+from plugins.jobs.embed_and_store import embed_and_store, prepare_knowledge_base
 from plugins.jobs.load_and_chunk import load_and_chunk
+from plugins.utils.helper import list_input_shards
+
+# Files per mapped task instance; raise it when per-task overhead dominates
+INGEST_SHARD_SIZE = int(os.getenv("INGEST_SHARD_SIZE", "1"))
+INGEST_TASK_RETRIES = int(os.getenv("INGEST_TASK_RETRIES", "2"))
+# Airflow pool capping concurrent shards embedding at once (created by airflow-init)
+EMBEDDING_POOL = os.getenv("EMBEDDING_POOL", "embedding_service")
+
+
+@task_group(group_id="ingest_shard")
+def ingest_shard(file_names, knowledge_base_id):
+    # Mapped per shard: a slow or failing file only holds up and retries its
+    # own shard, and each shard is embedded as soon as it is chunked
+    load_and_chunk_task = PythonOperator(
+        task_id="load_and_chunk",
+        python_callable=load_and_chunk,
+        op_kwargs={"file_names": file_names},
+    )
+    embed_and_store_task = PythonOperator(
+        task_id="embed_and_store",
+        python_callable=embed_and_store,
+        op_kwargs={"file_names": file_names, "kb_id": knowledge_base_id},
+        pool=EMBEDDING_POOL,
+    )
+    _ = load_and_chunk_task >> embed_and_store_task
+
 
 with DAG(
     dag_id="ingest_pipeline",
     schedule=None,
+    default_args={
+        "retries": INGEST_TASK_RETRIES,
+        "retry_delay": timedelta(minutes=1),
+        "retry_exponential_backoff": True,
+    },
 ) as dag:
 
     download_arxiv_papers_task = PythonOperator(
@@ -21,14 +55,19 @@ with DAG(
         python_callable=download_arxiv_papers,
     )
 
-    load_and_chunk_task = PythonOperator(
-        task_id="load_and_chunk",
-        python_callable=load_and_chunk,
+    list_input_shards_task = PythonOperator(
+        task_id="list_input_shards",
+        python_callable=list_input_shards,
+        op_kwargs={"shard_size": INGEST_SHARD_SIZE},
     )
 
-    embed_and_store_task = PythonOperator(
-        task_id="embed_and_store",
-        python_callable=embed_and_store,
+    prepare_knowledge_base_task = PythonOperator(
+        task_id="prepare_knowledge_base",
+        python_callable=prepare_knowledge_base,
     )
 
-    _ = download_arxiv_papers_task >> load_and_chunk_task >> embed_and_store_task
+    ingest_shard_tasks = ingest_shard.partial(
+        knowledge_base_id=prepare_knowledge_base_task.output
+    ).expand(file_names=list_input_shards_task.output)
+
+    _ = download_arxiv_papers_task >> list_input_shards_task >> ingest_shard_tasks
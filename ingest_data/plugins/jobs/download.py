@@ -1,7 +1,75 @@
 import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 import arxiv
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+DOWNLOAD_WORKERS = int(os.getenv("DOWNLOAD_WORKERS", "4"))
+DOWNLOAD_RETRIES = int(os.getenv("DOWNLOAD_RETRIES", "3"))
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+
+
+def create_session(pool_size: int = DOWNLOAD_WORKERS) -> requests.Session:
+    """Session whose connection pool fits the download workers."""
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=pool_size,
+        pool_maxsize=pool_size,
+        max_retries=Retry(
+            total=DOWNLOAD_RETRIES,
+            backoff_factor=0.5,
+            status_forcelist=[429, 500, 502, 503, 504],
+        ),
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def download_file(
+    session: requests.Session,
+    url: str,
+    filename: str,
+    retries: int = DOWNLOAD_RETRIES,
+    timeout: float = 60,
+):
+    """Stream `url` to `filename`, resuming a partial download if one exists.
+
+    Data goes to `filename.part` and is renamed once complete, so `filename`
+    only ever exists in full. After a dropped connection the download picks
+    up where it stopped with a range request; servers ignoring the range
+    make it start over.
+    """
+    part_path = f"{filename}.part"
+    for attempt in range(retries + 1):
+        offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+        headers = {"Range": f"bytes={offset}-"} if offset else {}
+        try:
+            with session.get(
+                url, headers=headers, stream=True, timeout=timeout
+            ) as response:
+                if response.status_code == 416:
+                    # Nothing left to fetch, the part file is complete
+                    break
+                response.raise_for_status()
+                mode = "ab" if response.status_code == 206 else "wb"
+                with open(part_path, mode) as f:
+                    for chunk in response.iter_content(DOWNLOAD_CHUNK_SIZE):
+                        f.write(chunk)
+            break
+        except (
+            requests.ConnectionError,
+            requests.Timeout,
+            requests.exceptions.ChunkedEncodingError,
+        ) as e:
+            if attempt == retries:
+                raise
+            print(f"Retrying {url} after error: {e}")
+            time.sleep(2**attempt)
+    os.replace(part_path, filename)
 
 
 # Download arxiv papers
@@ -12,17 +80,25 @@ def download_arxiv_papers():
     search = arxiv.Search(
         query="RAG", max_results=20, sort_by=arxiv.SortCriterion.SubmittedDate
     )
-    results = client.results(search)
-    for result in results:
-        filename = os.path.join(datadir, f"{result.title}.pdf")
+    downloads = {}
+    for result in client.results(search):
+        # Titles may contain path separators
+        filename = os.path.join(datadir, f"{result.title.replace('/', '_')}.pdf")
         if os.path.exists(filename):
             print(f"Skipping {result.title} as it already exists")
             continue
-        try:
-            response = requests.get(result.pdf_url)
-            response.raise_for_status()
-            with open(filename, "wb") as f:
-                f.write(response.content)
-            print(f"Downloaded {result.title}")
-        except Exception as e:
-            print(f"Failed to download {result.title}: {e}")
+        downloads[result.title] = (result.pdf_url, filename)
+
+    session = create_session()
+    with ThreadPoolExecutor(max_workers=DOWNLOAD_WORKERS) as executor:
+        futures = {
+            executor.submit(download_file, session, url, filename): title
+            for title, (url, filename) in downloads.items()
+        }
+        for future in as_completed(futures):
+            title = futures[future]
+            try:
+                future.result()
+                print(f"Downloaded {title}")
+            except Exception as e:
+                print(f"Failed to download {title}: {e}")
@@ -1,46 +1,84 @@
 import os
 import sys
+import tempfile
 from pathlib import Path
+from typing import List
 
 # Add plugins directory to Python path
 AIRFLOW_HOME = Path("/opt/airflow")
 sys.path.append(str(AIRFLOW_HOME))
 from plugins.utils.api import (
-    find_or_create_document,
+    add_document_chunks,
+    find_or_create_documents,
     find_or_create_knowledge_base,
     login,
 )
-from plugins.utils.helper import download_from_minio
-from plugins.utils.vector_store import EmbeddingFactory, VectorStoreFactory
+from plugins.utils.chunks import encode_chunk_batch, iter_chunks
+from plugins.utils.embeddings import EmbeddingFactory
+from plugins.utils.helper import download_from_minio, object_exists, write_marker
 
 
-def embed_and_store():
+def prepare_knowledge_base() -> int:
+    """Find or create the target knowledge base once, before the mapped tasks."""
     token = login()
     kb = find_or_create_knowledge_base(
         token, "GENERAL_KNOWLEDGE_BASE", "General knowledge base"
     )
-    kb_id = kb["id"]
+    return kb["id"]
+
+
+def embed_and_store(file_names: List[str], kb_id: int):
+    """Embed one shard of the input files and store them through the backend."""
+    token = login()
 
     embeddings = EmbeddingFactory.create()
-    vector_store = VectorStoreFactory.create(
-        store_type="milvus",
-        collection_name=f"knowledge_base_{kb_id}",
-        embedding_function=embeddings,
-    )
-    # List all input uri
-    for input_path in os.listdir(os.getenv("INLINE_DATA_VOLUME", "/opt/data")):
-        # Add document to knowledge base
-        file_path = os.path.join(
-            os.getenv("INLINE_DATA_VOLUME", "/opt/data"), input_path
+    datadir = os.getenv("INLINE_DATA_VOLUME", "/opt/data")
+    file_paths = [os.path.join(datadir, input_path) for input_path in file_names]
+    # One lookup for the whole shard
+    registered = {
+        document["file_name"]
+        for document in find_or_create_documents(token, kb_id, file_paths, create=False)
+        if document["status"] == "exists"
+    }
+    for input_path, file_path in zip(file_names, file_paths):
+        # Registered documents may be missing chunks if an earlier try was
+        # killed mid-file; only the marker written after the last batch
+        # proves the file is fully stored
+        stored_uri = os.path.join(
+            os.getenv("MINIO_BUCKET", "llmops"),
+            "stored",
+            str(kb_id),
+            os.path.basename(input_path),
         )
-        document = find_or_create_document(token, kb_id, file_path)
-        if document["status"] == "exists":
+        if os.path.basename(file_path) in registered and object_exists(stored_uri):
             print(f"Skipping {input_path} as it already exists in knowledge base")
             continue
 
         input_uri = os.path.join(
-            os.getenv("MINIO_BUCKET", "llmops"), f"{os.path.basename(input_path)}.pkl"
+            os.getenv("MINIO_BUCKET", "llmops"),
+            f"{os.path.basename(input_path)}.parquet",
         )
-        splits = download_from_minio(input_uri)
-        # Embed
-        vector_store.add_documents(splits)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            local_path = os.path.join(tmpdir, "chunks.parquet")
+            if not download_from_minio(input_uri, local_path):
+                print(f"Skipping {input_path} as its chunks are missing in minio")
+                continue
+            # The backend stamps the chunks with the document's id, so the
+            # document is registered first (or found, on a retry)
+            (document,) = find_or_create_documents(token, kb_id, [file_path])
+            # Embed batch by batch so memory stays flat for large documents;
+            # the first batch replaces chunks left by an earlier attempt
+            for i, (splits, vectors) in enumerate(iter_chunks(local_path)):
+                if vectors is None:
+                    vectors = embeddings.embed_documents(
+                        [split.page_content for split in splits]
+                    )
+                add_document_chunks(
+                    token,
+                    kb_id,
+                    document["document_id"],
+                    encode_chunk_batch(splits, vectors),
+                    embeddings.model,
+                    replace=i == 0,
+                )
+        write_marker(stored_uri)
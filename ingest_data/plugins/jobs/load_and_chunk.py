@@ -1,7 +1,8 @@
 import os
 import sys
+import tempfile
 from pathlib import Path
-from typing import Any
+from typing import Any, List
 
 from langchain_community.document_loaders import (
     Docx2txtLoader,
@@ -15,7 +16,12 @@ from langchain_text_splitters import RecursiveCharacterTextSplitter
 # Add plugins directory to Python path
 AIRFLOW_HOME = Path("/opt/airflow")
 sys.path.append(str(AIRFLOW_HOME))
-from plugins.utils.helper import download_from_minio, upload_to_minio
+from plugins.utils.chunks import write_chunks
+from plugins.utils.helper import object_exists, upload_to_minio
+
+# Keep in line with the backend's CHUNK_SIZE / CHUNK_OVERLAP settings
+CHUNK_SIZE = int(os.getenv("CHUNK_SIZE", "1000"))
+CHUNK_OVERLAP = int(os.getenv("CHUNK_OVERLAP", "200"))
 
 
 class DocumentLoaderFactory:
@@ -39,19 +45,20 @@ class DocumentLoaderFactory:
             return TextLoader(file_path)
 
 
-def load_and_chunk():
-    print("Loading and chunking documents")
-    print(os.listdir(os.getenv("INLINE_DATA_VOLUME", "/opt/data")))
-    for input_path in os.listdir(os.getenv("INLINE_DATA_VOLUME", "/opt/data")):
+def load_and_chunk(file_names: List[str]):
+    """Chunk one shard of the input files; a failing file fails the shard."""
+    print(f"Loading and chunking {len(file_names)} documents")
+    for input_path in file_names:
         print(f"Processing {input_path}")
         input_local_path = os.path.join(
             os.getenv("INLINE_DATA_VOLUME", "/opt/data"), input_path
         )
         output_uri = os.path.join(
-            os.getenv("MINIO_BUCKET", "llmops"), f"{os.path.basename(input_path)}.pkl"
+            os.getenv("MINIO_BUCKET", "llmops"),
+            f"{os.path.basename(input_path)}.parquet",
         )
-        # using minio to check output_uri is exist
-        if download_from_minio(output_uri):
+        # Chunks uploaded by an earlier try of this shard are kept
+        if object_exists(output_uri):
             print(f"Skipping {input_path} as it already exists in minio")
             continue
 
@@ -59,7 +66,14 @@ def load_and_chunk():
         loader = DocumentLoaderFactory.create(input_local_path)
         documents = loader.load()
         # Split document into chunks
-        splitter = RecursiveCharacterTextSplitter(chunk_size=400, chunk_overlap=100)
+        splitter = RecursiveCharacterTextSplitter(
+            chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP
+        )
         splits = splitter.split_documents(documents)
-        upload_to_minio(splits, output_uri)
+        for i, split in enumerate(splits):
+            split.metadata["chunk_index"] = i
+        with tempfile.TemporaryDirectory() as tmpdir:
+            local_path = os.path.join(tmpdir, "chunks.parquet")
+            write_chunks(splits, local_path)
+            upload_to_minio(local_path, output_uri)
         print(f"Uploaded chunks to MinIO: {input_path}/{output_uri}")
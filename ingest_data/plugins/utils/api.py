@@ -1,18 +1,39 @@
 import hashlib
 import mimetypes
 import os
-from typing import Any, Dict
+from functools import lru_cache
+from typing import Any, Dict, List, Sequence
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 BASE_URL = os.getenv("BASE_URL", "http://llmops-backend:8000")
 API_PREFIX = os.getenv("API_PREFIX", "/api/v1")
 USERNAME = os.getenv("USERNAME", "admin")
 PASSWORD = os.getenv("PASSWORD", "Password123")
+# Records per bulk registration call, the backend accepts up to 1000
+DOCUMENT_BATCH_SIZE = int(os.getenv("DOCUMENT_BATCH_SIZE", "500"))
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+@lru_cache(maxsize=None)
+def get_session() -> requests.Session:
+    """One pooled session per process, reusing connections to the backend."""
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_maxsize=10,
+        max_retries=Retry(
+            total=3, backoff_factor=0.5, status_forcelist=[502, 503, 504]
+        ),
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
 
 
 def login(username: str = USERNAME, password: str = PASSWORD) -> str:
-    response = requests.post(
+    response = get_session().post(
         f"{BASE_URL}{API_PREFIX}/auth/token",
         data={"username": username, "password": password},
     )
@@ -27,57 +48,103 @@ def auth_headers(token: str) -> Dict[str, str]:
 def find_or_create_knowledge_base(
     token: str, name: str, description: str = ""
 ) -> Dict[str, Any]:
-    list_kb_url = f"{BASE_URL}{API_PREFIX}/knowledge-base"
-    response = requests.get(list_kb_url, headers=auth_headers(token))
+    kb_url = f"{BASE_URL}{API_PREFIX}/knowledge-base"
+    response = get_session().get(
+        kb_url, headers=auth_headers(token), params={"name": name, "limit": 1}
+    )
     response.raise_for_status()
     kb_list = response.json()
-    for kb in kb_list:
-        if kb["name"] == name:
-            return kb
+    if kb_list:
+        return kb_list[0]
 
     # Create KB if not found
-    create_kb_url = f"{BASE_URL}{API_PREFIX}/knowledge-base"
     payload = {"name": name, "description": description}
-    response = requests.post(create_kb_url, headers=auth_headers(token), json=payload)
+    response = get_session().post(kb_url, headers=auth_headers(token), json=payload)
     response.raise_for_status()
     return response.json()
 
 
-def find_or_create_document(
-    token: str, knowledge_base_id: int, file_path: str
-) -> Dict[str, Any]:
-    create_document_url = (
-        f"{BASE_URL}{API_PREFIX}/knowledge-base/{knowledge_base_id}/documents/create"
-    )
-    list_document_url = (
-        f"{BASE_URL}{API_PREFIX}/knowledge-base/{knowledge_base_id}/documents"
+def file_sha256(file_path: str) -> str:
+    """Hash a file in chunks instead of reading it into memory at once."""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def document_record(file_path: str) -> Dict[str, Any]:
+    return {
+        "file_name": os.path.basename(file_path),
+        "file_path": file_path,
+        "file_size": os.path.getsize(file_path),
+        "file_hash": file_sha256(file_path),
+        "content_type": mimetypes.guess_type(file_path)[0]
+        or "application/octet-stream",
+    }
+
+
+def find_or_create_documents(
+    token: str, knowledge_base_id: int, file_paths: Sequence[str], create: bool = True
+) -> List[Dict[str, Any]]:
+    """Register files with the knowledge base in bulk.
+
+    Returns one `{"file_name", "document_id", "file_hash", "status"}` record per
+    file, with status "exists", "created" or, when `create` is False and the
+    file is not registered yet, "missing".
+    """
+    bulk_url = (
+        f"{BASE_URL}{API_PREFIX}/knowledge-base/{knowledge_base_id}/documents/bulk"
     )
-    response = requests.get(list_document_url, headers=auth_headers(token))
-    response.raise_for_status()
-    documents = response.json()
-    for doc in documents.get("documents", []):
-        if doc["file_name"] == os.path.basename(file_path):
-            return {"status": "exists", "document": doc}
-
-    try:
-        # get file type, file hash, file size, file name
-        file_type = mimetypes.guess_type(file_path)[0]
-        file_hash = hashlib.sha256(open(file_path, "rb").read()).hexdigest()
-        file_size = os.path.getsize(file_path)
-        file_name = os.path.basename(file_path)
-
-        response = requests.post(
-            create_document_url,
+    results = []
+    for start in range(0, len(file_paths), DOCUMENT_BATCH_SIZE):
+        batch = file_paths[start : start + DOCUMENT_BATCH_SIZE]
+        if create:
+            records = [document_record(file_path) for file_path in batch]
+        else:
+            # Only the names are looked up, skip hashing the files
+            records = [
+                {
+                    "file_name": os.path.basename(file_path),
+                    "file_path": file_path,
+                    "file_size": 0,
+                    "file_hash": "",
+                    "content_type": "",
+                }
+                for file_path in batch
+            ]
+        response = get_session().post(
+            bulk_url,
             headers=auth_headers(token),
-            json={
-                "file_name": file_name,
-                "file_path": file_path,
-                "file_size": file_size,
-                "file_hash": file_hash,
-                "content_type": file_type,
-            },
+            params={"create": str(create).lower()},
+            json={"documents": records},
         )
         response.raise_for_status()
-        return {"status": "created", "document": response.json()}
-    except Exception as e:
-        print(f"Failed to create document: {e}")
+        results.extend(response.json()["documents"])
+    return results
+
+
+def add_document_chunks(
+    token: str,
+    knowledge_base_id: int,
+    document_id: int,
+    batch: bytes,
+    embedding_model: str,
+    replace: bool = False,
+) -> Dict[str, Any]:
+    """Store an Arrow encoded batch of embedded chunks under a document."""
+    chunks_url = (
+        f"{BASE_URL}{API_PREFIX}/knowledge-base/{knowledge_base_id}"
+        f"/documents/{document_id}/chunks"
+    )
+    response = get_session().post(
+        chunks_url,
+        headers={
+            **auth_headers(token),
+            "Content-Type": "application/vnd.apache.arrow.stream",
+        },
+        params={"embedding_model": embedding_model, "replace": str(replace).lower()},
+        data=batch,
+    )
+    response.raise_for_status()
+    return response.json()
@@ -0,0 +1,72 @@
+import json
+from typing import Iterator, List, Optional, Sequence, Tuple
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+from langchain_core.documents import Document
+
+# Chunks are handed from load_and_chunk to embed_and_store as Parquet: the
+# text, the metadata as JSON (its keys differ between loaders) and, when the
+# chunks were embedded upstream, their vectors
+CHUNK_SCHEMA = pa.schema(
+    [
+        ("text", pa.string()),
+        ("metadata", pa.string()),
+        ("embedding", pa.list_(pa.float32())),
+    ]
+)
+
+
+def write_chunks(
+    documents: Sequence[Document],
+    path: str,
+    embeddings: Optional[Sequence[Sequence[float]]] = None,
+):
+    table = pa.table(
+        {
+            "text": [doc.page_content for doc in documents],
+            "metadata": [json.dumps(doc.metadata, default=str) for doc in documents],
+            "embedding": (
+                list(embeddings) if embeddings is not None else [None] * len(documents)
+            ),
+        },
+        schema=CHUNK_SCHEMA,
+    )
+    pq.write_table(table, path, compression="zstd")
+
+
+def encode_chunk_batch(
+    documents: Sequence[Document], embeddings: Sequence[Sequence[float]]
+) -> bytes:
+    """Arrow IPC stream of a batch, as the backend's chunks endpoint reads it."""
+    dimension = len(embeddings[0]) if embeddings else 0
+    columns = {
+        "text": [doc.page_content for doc in documents],
+        "metadata": [json.dumps(doc.metadata, default=str) for doc in documents],
+        "embedding": pa.array(list(embeddings), pa.list_(pa.float32(), dimension)),
+    }
+    chunk_indexes = [doc.metadata.get("chunk_index") for doc in documents]
+    if None not in chunk_indexes:
+        columns["chunk_index"] = pa.array(chunk_indexes, pa.int64())
+    table = pa.table(columns)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def iter_chunks(
+    path: str, batch_size: int = 256
+) -> Iterator[Tuple[List[Document], Optional[List[List[float]]]]]:
+    """Yield (documents, embeddings) batches; embeddings is None if absent."""
+    parquet_file = pq.ParquetFile(path)
+    for batch in parquet_file.iter_batches(batch_size=batch_size):
+        columns = batch.to_pydict()
+        documents = [
+            Document(page_content=text, metadata=json.loads(metadata))
+            for text, metadata in zip(columns["text"], columns["metadata"])
+        ]
+        embeddings = columns["embedding"]
+        if any(vector is None for vector in embeddings):
+            embeddings = None
+        yield documents, embeddings
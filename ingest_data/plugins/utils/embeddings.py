@@ -0,0 +1,21 @@
+import os
+
+from langchain_ollama import OllamaEmbeddings
+
+# Must match the backend's embedding model, it refuses vectors from another one
+OLLAMA_API_BASE = os.getenv("OLLAMA_API_BASE", "http://host.docker.internal:11434")
+OLLAMA_EMBEDDINGS_MODEL = os.getenv("OLLAMA_EMBEDDINGS_MODEL", "nomic-embed-text")
+
+
+class EmbeddingFactory:
+    @staticmethod
+    def create():
+        embedding_provider = "ollama"
+
+        if embedding_provider == "ollama":
+            return OllamaEmbeddings(
+                model=OLLAMA_EMBEDDINGS_MODEL,
+                base_url=OLLAMA_API_BASE,
+            )
+        else:
+            raise ValueError(f"Unsupported embedding provider: {embedding_provider}")
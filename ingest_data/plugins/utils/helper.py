@@ -1,14 +1,26 @@
+import io
 import logging
 import os
-import pickle
-from io import BytesIO
+from functools import lru_cache
+from typing import List
 
+import urllib3
 from minio import Minio
 from minio.error import S3Error
 
 MINIO_ENDPOINT = os.getenv("MINIO_ENDPOINT", "minio:9000")
 MINIO_ACCESS_KEY = os.getenv("MINIO_ACCESS_KEY", "minioadmin")
 MINIO_SECRET_KEY = os.getenv("MINIO_SECRET_KEY", "minioadmin")
+# Connections kept open to MinIO, shared by all threads of a task
+MINIO_MAX_CONNECTIONS = int(os.getenv("MINIO_MAX_CONNECTIONS", "10"))
+
+
+def list_input_shards(shard_size: int = 1) -> List[List[str]]:
+    """Input file names split into shards of `shard_size` for the mapped tasks."""
+    file_names = sorted(os.listdir(os.getenv("INLINE_DATA_VOLUME", "/opt/data")))
+    return [
+        file_names[i : i + shard_size] for i in range(0, len(file_names), shard_size)
+    ]
 
 
 def get_info_from_minio(s3_path: str):
@@ -17,56 +29,81 @@ def get_info_from_minio(s3_path: str):
     return s3_bucket, s3_key
 
 
-def upload_to_minio(data, s3_path: str):
-    s3_bucket, s3_key = get_info_from_minio(s3_path)
-    print(f"Bucket: {s3_bucket}")
-    print(f"Key: {s3_key}")
-    client = Minio(
+@lru_cache(maxsize=None)
+def get_minio_client() -> Minio:
+    """One client per process; it is thread safe and pools its connections."""
+    http_client = urllib3.PoolManager(
+        maxsize=MINIO_MAX_CONNECTIONS,
+        timeout=urllib3.Timeout(connect=10, read=300),
+        retries=urllib3.Retry(
+            total=5, backoff_factor=0.2, status_forcelist=[500, 502, 503, 504]
+        ),
+    )
+    return Minio(
         MINIO_ENDPOINT,
         access_key=MINIO_ACCESS_KEY,
         secret_key=MINIO_SECRET_KEY,
         secure=False,  # Set to True if using HTTPS
+        http_client=http_client,
     )
 
-    found = client.bucket_exists(s3_bucket)
-    if not found:
+
+@lru_cache(maxsize=None)
+def ensure_bucket(s3_bucket: str):
+    """Create the bucket if needed; checked once per process and bucket."""
+    client = get_minio_client()
+    if not client.bucket_exists(s3_bucket):
         client.make_bucket(s3_bucket)
         print("Created bucket", s3_bucket)
-    else:
-        print("Bucket", s3_bucket, "already exists")
 
-    buffer = BytesIO()
-    pickle.dump(data, buffer)
-    buffer.seek(0)
+
+def object_exists(s3_path: str) -> bool:
+    """Check for an object with a HEAD request instead of downloading it."""
+    s3_bucket, s3_key = get_info_from_minio(s3_path)
     try:
-        client.put_object(
-            bucket_name=s3_bucket,
-            object_name=s3_key,
-            data=buffer,
-            length=buffer.getbuffer().nbytes,
+        get_minio_client().stat_object(bucket_name=s3_bucket, object_name=s3_key)
+        return True
+    except S3Error as e:
+        if e.code in ("NoSuchKey", "NoSuchBucket"):
+            return False
+        raise
+
+
+def write_marker(s3_path: str):
+    """Store an empty object whose existence records that a step completed."""
+    s3_bucket, s3_key = get_info_from_minio(s3_path)
+    ensure_bucket(s3_bucket)
+    get_minio_client().put_object(
+        bucket_name=s3_bucket, object_name=s3_key, data=io.BytesIO(b""), length=0
+    )
+
+
+def upload_to_minio(local_path: str, s3_path: str):
+    """Upload a local file; large files go up as parallel multipart parts."""
+    s3_bucket, s3_key = get_info_from_minio(s3_path)
+    print(f"Bucket: {s3_bucket}")
+    print(f"Key: {s3_key}")
+    ensure_bucket(s3_bucket)
+    try:
+        get_minio_client().fput_object(
+            bucket_name=s3_bucket, object_name=s3_key, file_path=local_path
         )
     except S3Error as e:
         logger.error(f"Failed to upload to MinIO: {e}")
         raise
 
 
-def download_from_minio(s3_path: str):
+def download_from_minio(s3_path: str, local_path: str) -> bool:
+    """Stream an object to a local file; False if it doesn't exist."""
     s3_bucket, s3_key = get_info_from_minio(s3_path)
-    client = Minio(
-        MINIO_ENDPOINT,
-        access_key=MINIO_ACCESS_KEY,
-        secret_key=MINIO_SECRET_KEY,
-        secure=False,  # Set to True if using HTTPS
-    )
-    buffer = BytesIO()
     try:
-        response = client.get_object(bucket_name=s3_bucket, object_name=s3_key)
-        buffer.write(response.read())
-        buffer.seek(0)
-        return pickle.load(buffer)
+        get_minio_client().fget_object(
+            bucket_name=s3_bucket, object_name=s3_key, file_path=local_path
+        )
+        return True
     except S3Error as e:
         logger.error(f"Failed to download from MinIO: {e}")
-        return None
+        return False
 
 
 def get_logger():
@@ -0,0 +1,130 @@
+"""Check the paper downloader against a local stand-in for arXiv.
+
+Serves a random file from a local HTTP server that supports range requests and
+can drop a response halfway through, then checks that `download_file`:
+
+- resumes a dropped download with a range request,
+- treats a 416 for a complete .part file as finished,
+- starts over when the server ignores the range,
+
+and that each time only the finished file is left, renamed from its .part.
+Run it from ingest_data with
+
+    python -m scripts.check_download
+"""
+
+import os
+import sys
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Optional
+
+from plugins.jobs.download import create_session, download_file
+
+PAYLOAD = os.urandom(3 * 1024 * 1024 + 17)
+
+
+class FakeFileServer(ThreadingHTTPServer):
+    def __init__(self, payload: bytes):
+        super().__init__(("127.0.0.1", 0), FakeFileHandler)
+        self.payload = payload
+        # Bytes sent before the next response is cut off, None to send it whole
+        self.drop_after: Optional[int] = None
+        self.honor_range = True
+        self.ranges: List[Optional[str]] = []
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}/paper.pdf"
+
+
+class FakeFileHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: FakeFileServer
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        payload = self.server.payload
+        range_header = self.headers.get("Range")
+        self.server.ranges.append(range_header)
+        start = 0
+        if range_header and self.server.honor_range:
+            start = int(range_header.split("=")[1].split("-")[0])
+            if start >= len(payload):
+                self.send_response(416)
+                self.send_header("Content-Range", f"bytes */{len(payload)}")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+
+        body = payload[start:]
+        self.send_response(206 if start else 200)
+        if start:
+            self.send_header(
+                "Content-Range", f"bytes {start}-{len(payload) - 1}/{len(payload)}"
+            )
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        drop_after, self.server.drop_after = self.server.drop_after, None
+        if drop_after is not None:
+            self.wfile.write(body[:drop_after])
+            self.wfile.flush()
+            self.close_connection = True
+            self.connection.shutdown(2)
+            return
+        self.wfile.write(body)
+
+
+def check(name: str, condition: bool, failures: List[str]):
+    print(f"{'ok' if condition else 'FAILED'}: {name}")
+    if not condition:
+        failures.append(name)
+
+
+def main() -> int:
+    server = FakeFileServer(PAYLOAD)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    session = create_session()
+    failures: List[str] = []
+
+    with tempfile.TemporaryDirectory() as datadir:
+        filename = os.path.join(datadir, "paper.pdf")
+
+        def downloaded() -> bool:
+            with open(filename, "rb") as f:
+                return f.read() == PAYLOAD and os.listdir(datadir) == ["paper.pdf"]
+
+        # Dropped connection: the second request continues where the first stopped
+        server.drop_after = 1024 * 1024
+        download_file(session, server.url, filename, retries=1)
+        check("resumes after a dropped connection", downloaded(), failures)
+        check(
+            "resume asks for the missing range",
+            server.ranges == [None, f"bytes={1024 * 1024}-"],
+            failures,
+        )
+
+        # A complete .part file left by a run that died before renaming it
+        os.replace(filename, f"{filename}.part")
+        server.ranges.clear()
+        download_file(session, server.url, filename)
+        check("416 finishes a complete .part file", downloaded(), failures)
+        check("416 needs a single request", len(server.ranges) == 1, failures)
+
+        # A server ignoring ranges answers 200, the .part file is rewritten
+        os.remove(filename)
+        with open(f"{filename}.part", "wb") as f:
+            f.write(b"stale bytes")
+        server.honor_range = False
+        download_file(session, server.url, filename)
+        check("restarts when the range is ignored", downloaded(), failures)
+
+    server.shutdown()
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())